@@ -0,0 +1,55 @@
+import sys
+import json
+import argparse
+from typing import Dict, List
+
+
+# Metric: True when higher is better
+METRICS = {
+    "examples_per_second": True,
+    "requests_per_second": True,
+    "cpu_seconds": False,
+    "peak_rss_mb": False,
+}
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float = 0.1) -> List[str]:
+    """
+    Compare the cases that both result files ran
+    :return: The regressions larger than threshold (relative), one message per case and metric
+    """
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    print(f"{'case':<60} {'metric':<22} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for result in candidate["results"]:
+        baseline_result = baseline_results.get(result["name"])
+        if baseline_result is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = baseline_result[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            print(f"{result['name']:<60} {metric:<22} {old:>12} {new:>12} {change:>+8.1%}")
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{result['name']} {metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files and fail on regressions")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as baseline_file, open(args.candidate, encoding='utf-8') as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+    print(f"Baseline {baseline.get('commit')} vs candidate {candidate.get('commit')}\n")
+    regressions = compare(baseline, candidate, threshold=args.threshold)
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(regressions))
+        sys.exit(1)
+    print("\nNo regression")
+
+
+if __name__ == '__main__':
+    main()
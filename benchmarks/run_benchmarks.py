@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import resource
+import statistics
+import itertools
+import subprocess
+import tempfile
+import multiprocessing
+sys.path.insert(0,r'./')
+from typing import Any, Dict, List
+
+from benchmarks.synthetic_data import GENERATORS, write_dataset
+
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _run_case(case: Dict, dataset_path: str, result_queue: multiprocessing.Queue) -> None:
+    """
+    Run read/convert/save of one case, in a fresh process so that the peak RSS and the CPU time are its own
+    """
+    # The progress bars and prints of the parser would dominate the output and the CPU time of small runs
+    os.environ["TQDM_DISABLE"] = "1"
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    from translator import DataParser, JsonlReader
+    from providers import SimulatedProvider
+    from providers.utils import get_metrics_registry
+
+    config, _, target_fields = GENERATORS[case["config"]]
+
+    class SyntheticParser(DataParser):
+        def __init__(self, file_path: str, output_dir: str, **kwargs):
+            super().__init__(file_path, output_dir,
+                             parser_name=f"benchmark_{case['config']}",
+                             target_config=config,
+                             target_fields=target_fields,
+                             do_translate=True,
+                             translator=SimulatedProvider.configure(**case["provider"]),
+                             **kwargs)
+
+        def read(self) -> None:
+            super(SyntheticParser, self).read()
+            self.data_read = JsonlReader(self.file_path, use_index_file=False)
+
+        def convert(self) -> None:
+            super(SyntheticParser, self).convert()
+            self.converted_data = iter(self.data_read) if self.streaming else list(self.data_read)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start_time = time.perf_counter()
+        parser = SyntheticParser(dataset_path, output_dir, **case["params"])
+        stage_seconds = {}
+        stage_start = time.perf_counter()
+        parser.read()
+        stage_seconds["read"] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+        parser.convert()
+        stage_seconds["convert"] = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
+        parser.save
+        stage_seconds["save"] = time.perf_counter() - stage_start
+        seconds = time.perf_counter() - start_time
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    summary = get_metrics_registry().summary()
+    provider_stats = summary["providers"].get("SimulatedProvider", {})
+    num_examples = case["num_examples"]
+    num_requests = provider_stats.get("requests", 0)
+    cpu_seconds = usage.ru_utime + usage.ru_stime
+    result_queue.put({
+        "seconds": round(seconds, 4),
+        "examples_per_second": round(num_examples / seconds, 2),
+        "requests": num_requests,
+        "requests_per_second": round(num_requests / seconds, 2),
+        "examples_translated": summary["examples"].get("translated", 0),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "cpu_utilisation": round(cpu_seconds / seconds, 4),
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        "peak_rss_mb": round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2),
+        "stage_seconds": {stage: round(value, 4) for stage, value in stage_seconds.items()},
+        "latency_seconds": provider_stats.get("latency_seconds", {}),
+    })
+
+
+def run_case(case: Dict, dataset_path: str) -> Dict:
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    process = context.Process(target=_run_case, args=(case, dataset_path, result_queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Benchmark case {case_name(case)} failed with exit code {process.exitcode}")
+    return result_queue.get()
+
+
+def case_name(case: Dict) -> str:
+    params = ",".join(f"{key}={value}" for key, value in sorted(case["params"].items()))
+    return f"{case['config']}[{params}]" if params else case["config"]
+
+
+def parse_grid(grid_args: List[str]) -> List[Dict[str, Any]]:
+    """
+    Expand ["max_example_per_thread=100,400", "translation_backend=thread,async"] into every combination of the
+    DataParser arguments, values are parsed as JSON when possible
+    """
+    grid = {}
+    for grid_arg in grid_args:
+        key, values = grid_arg.split("=", 1)
+        parsed_values = []
+        for value in values.split(","):
+            try:
+                parsed_values.append(json.loads(value))
+            except json.JSONDecodeError:
+                parsed_values.append(value)
+        grid[key] = parsed_values
+    keys = list(grid)
+    return [dict(zip(keys, combination)) for combination in itertools.product(*[grid[key] for key in keys])]
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End to end throughput benchmark of read/convert/save with a simulated provider")
+    parser.add_argument("--configs", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--num-examples", type=int, default=2000)
+    parser.add_argument("--mean-chars", type=int, default=200, help="Mean length of the generated texts")
+    parser.add_argument("--grid", nargs="*", default=[],
+                        help="DataParser arguments to sweep, e.g. max_example_per_thread=100,400 large_chunks_threshold=20000")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the median is reported")
+    parser.add_argument("--latency-median", type=float, default=0.05, help="Median simulated request latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result file, default to benchmarks/results/<commit>.json")
+    args = parser.parse_args()
+
+    provider_config = {"latency_median": args.latency_median, "latency_sigma": args.latency_sigma,
+                       "error_rate": args.error_rate, "seed": args.seed}
+    revision = git_revision()
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        for config_name in args.configs:
+            dataset_path = write_dataset(os.path.join(data_dir, f"{config_name}.jsonl"), config_name,
+                                         args.num_examples, mean_chars=args.mean_chars, seed=args.seed)
+            for params in parse_grid(args.grid):
+                case = {"config": config_name, "params": params, "provider": provider_config,
+                        "num_examples": args.num_examples}
+                runs = [run_case(case, dataset_path) for _ in range(args.repeat)]
+                # The run with the median duration is kept whole so its numbers stay consistent with each other
+                result = sorted(runs, key=lambda run: run["seconds"])[len(runs) // 2]
+                result["seconds_stdev"] = round(statistics.pstdev(run["seconds"] for run in runs), 4)
+                results.append({"name": case_name(case), "config": config_name, "params": params, **result})
+                print(f"{case_name(case)}: {result['examples_per_second']} examples/s, "
+                      f"{result['requests_per_second']} requests/s, {result['cpu_seconds']} cpu s, "
+                      f"{result['peak_rss_mb']} MB peak RSS")
+
+    report = {
+        **revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": socket.gethostname(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"num_examples": args.num_examples, "mean_chars": args.mean_chars, "repeat": args.repeat,
+                     "provider": provider_config},
+        "results": results,
+    }
+    output_path = args.output
+    if output_path is None:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(DEFAULT_RESULTS_DIR, f"{(revision['commit'] or 'unknown')[:12]}.json")
+    with open(output_path, 'w', encoding='utf-8') as jfile:
+        json.dump(report, jfile, ensure_ascii=False, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import abc
+import sys
+import timeit
+import argparse
+import tempfile
+sys.path.insert(0,r'./')
+from abc import abstractmethod
+
+from configs import BaseConfig
+from translator import DataParser
+from translator.utils import force_super_call, ForceBaseCallMeta
+
+
+def legacy__getattribute__(self, name):
+    """
+    The per attribute access lookup ForceBaseCallMeta used to install on every class, kept to measure the overhead
+    """
+    cls = type(self)
+    method = object.__getattribute__(self, name)
+    registry = LegacyForceBaseCallMeta.forcecall_registry
+    for superclass in cls.__mro__[1:]:
+        if superclass in registry and name in registry[superclass]:
+            method = registry[superclass][name](method)
+            break
+    return method
+
+
+class LegacyForceBaseCallMeta(abc.ABCMeta):
+    forcecall_registry = {}
+
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+        mcls.forcecall_registry[cls] = {}
+        for attr_name, method in cls.__dict__.items():
+            if hasattr(method, "client_decorator"):
+                mcls.forcecall_registry[cls][attr_name] = method.client_decorator
+        cls.__getattribute__ = legacy__getattribute__
+        return cls
+
+
+def _make_parser_class(metaclass: type) -> type:
+    class Base(metaclass=metaclass):
+        def __init__(self):
+            self.target_fields = ["question_text", "orig_answer_texts"]
+
+        @abstractmethod
+        @force_super_call
+        def convert(self) -> None:
+            pass
+
+    class Parser(Base):
+        def convert(self) -> None:
+            super().convert()
+
+    return Parser
+
+
+class _Parser(DataParser):
+    def read(self) -> None:
+        super().read()
+
+    def convert(self) -> None:
+        super().convert()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cost of attribute access and enforced super calls on parser instances")
+    parser.add_argument("--number", type=int, default=1000000)
+    args = parser.parse_args()
+
+    cases = {"plain class": _make_parser_class(abc.ABCMeta),
+             "legacy __getattribute__": _make_parser_class(LegacyForceBaseCallMeta),
+             "class creation wrapping": _make_parser_class(ForceBaseCallMeta)}
+    print(f"{'case':<26} {'attribute access':>18} {'convert() call':>16}")
+    for case, parser_class in cases.items():
+        instance = parser_class()
+        attribute_seconds = timeit.timeit(lambda: instance.target_fields, number=args.number)
+        call_seconds = timeit.timeit(lambda: instance.convert(), number=args.number // 10)
+        print(f"{case:<26} {attribute_seconds / args.number * 1e9:>15.1f} ns {call_seconds / (args.number // 10) * 1e9:>13.1f} ns")
+
+    # The attribute reads of the per example translation loop (self.target_config, self.translator...), on a real DataParser
+    with tempfile.TemporaryDirectory() as output_dir:
+        data_parser = _Parser(__file__, output_dir, parser_name="benchmark", target_fields=["question_text"],
+                              target_config=BaseConfig)
+        attribute_seconds = timeit.timeit(lambda: data_parser.target_config, number=args.number)
+        print(f"{'DataParser':<26} {attribute_seconds / args.number * 1e9:>15.1f} ns")
+
+
+if __name__ == '__main__':
+    main()
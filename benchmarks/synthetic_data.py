@@ -0,0 +1,94 @@
+import sys
+import json
+import math
+import random
+sys.path.insert(0,r'./')
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from configs import BaseConfig, QAConfig, DialogsConfig, KTOConfig, CorpusConfig
+
+
+# Frequent English words, texts are drawn from it so their length distribution is the only knob
+VOCABULARY = ("the of and to in is you that it he was for on are as with his they at be this have from or one had by "
+              "word but not what all were we when your can said there use an each which she do how their if will up "
+              "other about out many then them these so some her would make like him into time has look two more write "
+              "go see number no way could people my than first water been call who oil its now find long down day did "
+              "get come made may part").split()
+
+
+def _text(rng: random.Random, mean_chars: int) -> str:
+    """
+    A sentence-like text whose length follows a log-normal distribution around mean_chars
+    """
+    num_chars = max(8, int(rng.lognormvariate(math.log(mean_chars), 0.6)))
+    words, length = [], 0
+    while length < num_chars:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+    sentences = [" ".join(words[idx:idx + 12]).capitalize() + "." for idx in range(0, len(words), 12)]
+    return " ".join(sentences)
+
+
+def _base_example(rng: random.Random, idx: int, mean_chars: int) -> Dict:
+    return {"qas_id": str(idx), "system_prompt": "You are a helpful assistant.",
+            "question_text": _text(rng, mean_chars), "orig_answer_texts": _text(rng, mean_chars * 2),
+            "answer_lengths": None}
+
+
+def _qa_example(rng: random.Random, idx: int, mean_chars: int) -> Dict:
+    return {"qas_id": str(idx), "system_prompt": "Answer the question from the context.",
+            "question_text": _text(rng, mean_chars),
+            "context_list": [_text(rng, mean_chars * 2) for _ in range(rng.randint(1, 5))],
+            "answers_list": [_text(rng, mean_chars) for _ in range(rng.randint(1, 3))],
+            "answer_lengths": None, "context_lengths": None}
+
+
+def _dialogs_example(rng: random.Random, idx: int, mean_chars: int) -> Dict:
+    num_turns = rng.randint(1, 6)
+    return {"qas_id": str(idx), "system_prompt": "You are a helpful assistant.",
+            "user_prompts": [_text(rng, mean_chars) for _ in range(num_turns)],
+            "agent_responses": [_text(rng, mean_chars * 2) for _ in range(num_turns)],
+            "answer_lengths": None, "prompt_lengths": None}
+
+
+def _kto_example(rng: random.Random, idx: int, mean_chars: int) -> Dict:
+    num_turns = rng.randint(1, 4) * 2 - 1
+    return {"qas_id": str(idx), "system_prompt": "You are a helpful assistant.",
+            "conversation_history": [_text(rng, mean_chars) for _ in range(num_turns)],
+            "conversation_roles": ["user" if turn % 2 == 0 else "assistant" for turn in range(num_turns)],
+            "agent_prompt_completion": _text(rng, mean_chars * 2),
+            "label": rng.random() < 0.5}
+
+
+def _corpus_example(rng: random.Random, idx: int, mean_chars: int) -> Dict:
+    return {"qas_id": str(idx), "orig_corpus_texts": _text(rng, mean_chars * 4), "corpus_lengths": None}
+
+
+# Config name: (config class, example generator, fields to translate)
+GENERATORS: Dict[str, Tuple[type, Callable[[random.Random, int, int], Dict], List[str]]] = {
+    "BaseConfig": (BaseConfig, _base_example, ["question_text", "orig_answer_texts"]),
+    "QAConfig": (QAConfig, _qa_example, ["question_text", "context_list", "answers_list"]),
+    "DialogsConfig": (DialogsConfig, _dialogs_example, ["user_prompts", "agent_responses"]),
+    "KTOConfig": (KTOConfig, _kto_example, ["conversation_history", "agent_prompt_completion"]),
+    "CorpusConfig": (CorpusConfig, _corpus_example, ["orig_corpus_texts"]),
+}
+
+
+def generate_examples(config_name: str, num_examples: int, mean_chars: int = 200, seed: int = 42) -> Iterator[Dict]:
+    """
+    Deterministic synthetic examples already in the shape of config_name, the same arguments always give the same
+    dataset so results of different commits can be compared
+    """
+    assert config_name in GENERATORS, f"Invalid config {config_name}, choose from {list(GENERATORS)}"
+    rng = random.Random(seed)
+    make_example = GENERATORS[config_name][1]
+    for idx in range(num_examples):
+        yield make_example(rng, idx, mean_chars)
+
+
+def write_dataset(path: str, config_name: str, num_examples: int, mean_chars: int = 200, seed: int = 42) -> str:
+    with open(path, 'w', encoding='utf-8') as jfile:
+        for example in generate_examples(config_name, num_examples, mean_chars=mean_chars, seed=seed):
+            jfile.write(json.dumps(example, ensure_ascii=False) + "\n")
+    return path
@@ -36,10 +36,9 @@ class ELI5ValQAConfig(DataParser):
         # I just want to be sure that the file path is correct
         super(ELI5ValQAConfig, self).read()
 
+        # The file holds the whole dataset as a single JSON document
         with open(self.file_path, encoding='utf-8') as jfile:
-            json_data = [json.loads(example) for example in jfile]
-
-        self.data_read = json_data[0]
+            self.data_read = json.load(jfile)
         return None
 
     def convert(self) -> None:
@@ -7,7 +7,7 @@ from tqdm.auto import tqdm
 from configs import BaseConfig
 from translator import DataParser
 from translator import VerboseCallback
-from providers import *
+from providers import Provider, GoogleProvider
 
 PARSER_NAME = "ELI5_val"
 
@@ -42,10 +42,9 @@ class ELI5Val(DataParser):
         # I just want to be sure that the file path is correct
         super(ELI5Val, self).read()
 
+        # The file holds the whole dataset as a single JSON document
         with open(self.file_path, encoding='utf-8') as jfile:
-            json_data = [json.loads(example) for example in jfile]
-
-        self.data_read = json_data[0]
+            self.data_read = json.load(jfile)
         return None
 
     def convert(self) -> None:
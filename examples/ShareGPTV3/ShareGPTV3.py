@@ -4,7 +4,7 @@ sys.path.insert(0,r'./')
 from tqdm.auto import tqdm
 
 from configs import DialogsConfig
-from translator import DataParser
+from translator import DataParser, iter_json_array
 
 
 PARSER_NAME = "ShareGPT_V3"
@@ -13,7 +13,7 @@ PARSER_NAME = "ShareGPT_V3"
 class ShareGPTV3(DataParser):
     def __init__(self, file_path: str, output_path: str, target_lang: str="vi",
                  max_example_per_thread=300, large_chunks_threshold=20000,
-                 max_list_length_per_thread=3):
+                 max_list_length_per_thread=3, streaming: bool=False):
         super().__init__(file_path, output_path,
                          parser_name=PARSER_NAME,
                          do_translate=True,
@@ -23,7 +23,8 @@ class ShareGPTV3(DataParser):
                          target_lang=target_lang,
                          max_example_per_thread=max_example_per_thread,
                          large_chunks_threshold=large_chunks_threshold,
-                         max_list_length_per_thread=max_list_length_per_thread)
+                         max_list_length_per_thread=max_list_length_per_thread,
+                         streaming=streaming)
 
     # Read function must assign data that has been read to self.data_read
     def read(self) -> None:
@@ -31,10 +32,8 @@ class ShareGPTV3(DataParser):
         # I just want to be sure that the file path is correct
         super(ShareGPTV3, self).read()
 
-        with open(self.file_path, encoding='utf-8') as jfile:
-            json_data = json.load(jfile)
-
-        self.data_read = json_data
+        # The file is a single JSON array of hundreds of MB, its conversations are read one at a time
+        self.data_read = iter_json_array(self.file_path)
         return None
 
     def convert(self) -> None:
@@ -42,32 +41,36 @@ class ShareGPTV3(DataParser):
         # I just want to be sure the read function has actually assigned the self.data_read
         super(ShareGPTV3, self).convert()
 
-        data_converted = []
-        for data in tqdm(self.data_read, desc="Converting data"):
-            data_dict = {}
-            data_dict['system_prompt'] = ""
-            data_dict['qas_id'] = data['id']
-
-            user_prompts = []
-            agent_responses = []
-            for conversation in data['conversations']:
-                if conversation["from"] == "human":
-                    user_prompts.append(conversation['value'])
-                if conversation["from"] == "gpt":
-                    agent_responses.append(conversation['value'])
-
-            data_dict['user_prompts'] = user_prompts
-            data_dict['agent_responses'] = agent_responses
+        def convert_data():
+            for data in tqdm(self.data_read, desc="Converting data"):
+                yield self.convert_example(data)
 
-            data_dict['prompt_lengths'] = None
-            data_dict['answer_lengths'] = None
-            data_converted.append(data_dict)
-
-        # Be sure to assign the final data list to self.converted_data
-        self.converted_data = data_converted
+        # Be sure to assign the final data list to self.converted_data, a generator is only accepted in streaming mode
+        self.converted_data = convert_data() if self.streaming else list(convert_data())
 
         return None
 
+    @staticmethod
+    def convert_example(data: dict) -> dict:
+        data_dict = {}
+        data_dict['system_prompt'] = ""
+        data_dict['qas_id'] = data['id']
+
+        user_prompts = []
+        agent_responses = []
+        for conversation in data['conversations']:
+            if conversation["from"] == "human":
+                user_prompts.append(conversation['value'])
+            if conversation["from"] == "gpt":
+                agent_responses.append(conversation['value'])
+
+        data_dict['user_prompts'] = user_prompts
+        data_dict['agent_responses'] = agent_responses
+
+        data_dict['prompt_lengths'] = None
+        data_dict['answer_lengths'] = None
+        return data_dict
+
 
 if __name__ == '__main__':
     share_gpt_v3_parser = ShareGPTV3(r"examples/ShareGPTV3/ShareGPT_V3_unfiltered_cleaned_split.json",
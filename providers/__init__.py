@@ -1,4 +1,21 @@
 from .base_provider import Provider
-from .google_provider import GoogleProvider
-from .multiple_providers import MultipleProviders
-from .groq_provider import GroqProvider
\ No newline at end of file
+from .registry import ENTRY_POINT_GROUP, available_providers, get_provider, register_provider
+
+# The provider classes are imported on first access, the client libraries they wrap (googletrans, translators, groq)
+# take seconds to import and a run only uses one or two of them
+_LAZY_PROVIDERS = ["GoogleProvider", "MultipleProviders", "GroqProvider", "SimulatedProvider", "HedgedProvider"]
+
+# The lazy providers are left out so that "from providers import *" does not import every client library
+__all__ = ["Provider", "ENTRY_POINT_GROUP", "available_providers", "get_provider", "register_provider"]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_PROVIDERS:
+        provider = get_provider(name)
+        globals()[name] = provider
+        return provider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return __all__ + _LAZY_PROVIDERS
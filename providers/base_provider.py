@@ -1,11 +1,32 @@
-from typing import Union, List
+import socket
+import asyncio
+import threading
+from functools import partial
+from typing import Union, List, Dict, Tuple
 from abc import ABC, abstractmethod
 
+from .utils.metrics import get_metrics_registry
+
+
+# Addresses that answered a health check, shared by every provider of the process
+_HEALTHY_ADDRESSES = set()
+_HEALTH_CHECK_LOCK = threading.Lock()
+
 
 class Provider(ABC):
     """
     Base Provider that must be inherited by all Provider class, implement your own provider by inheriting this class
     """
+    # Optional providers.utils.TranslationCache shared by the provider instances, assigned by the caller
+    cache = None
+    # Marker template (with an {idx} placeholder) for providers that translate a list with one request per item,
+    # translator.packing.RequestPacker then joins a whole batch of strings into a single request
+    pack_separator = None
+    # providers.utils.MetricsRegistry recording the requests, shared by every provider of the process by default
+    metrics = get_metrics_registry()
+    # (host, port) the provider needs to reach, checked once per process before its first request, None to skip
+    health_check_address = None
+
     @abstractmethod
     def __init__(self):
         self.translator = None
@@ -17,6 +38,20 @@ class Provider(ABC):
                       **kwargs) -> Union[str, List[str]]:
         raise NotImplemented(" The function _do_translate has not been implemented.")
 
+    async def _ado_translate(self, input_data: Union[str, List[str]],
+                             src: str, dest: str,
+                             fail_translation_code: str = "P1OP1_F",
+                             **kwargs) -> Union[str, List[str]]:
+        """
+        Async variant of self._do_translate, override it when the provider has a native async client.
+        The default runs self._do_translate in the default executor of the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(self._do_translate, input_data,
+                                                        src=src, dest=dest,
+                                                        fail_translation_code=fail_translation_code,
+                                                        **kwargs))
+
     def translate(self, input_data: Union[str, List[str]],
                   src: str, dest: str,
                   fail_translation_code: str="P1OP1_F") -> Union[str, List[str]]:
@@ -29,6 +64,63 @@ class Provider(ABC):
         :return: str or list of str
         """
 
+        self._check_input(input_data)
+
+        if self.cache is None:
+            return self._translate_checked(input_data, src=src, dest=dest,
+                                           fail_translation_code=fail_translation_code)
+
+        keys, cached, missing_data = self._cache_lookup(input_data, src=src, dest=dest)
+        translated_missing_data = None
+        if missing_data is not None:
+            translated_missing_data = self._translate_checked(missing_data, src=src, dest=dest,
+                                                              fail_translation_code=fail_translation_code)
+        return self._cache_merge(input_data, keys, cached, translated_missing_data, fail_translation_code)
+
+    async def translate_async(self, input_data: Union[str, List[str]],
+                              src: str, dest: str,
+                              fail_translation_code: str="P1OP1_F") -> Union[str, List[str]]:
+        """
+        Async counterpart of self.translate, same parameters and return type
+        """
+
+        self._check_input(input_data)
+
+        if self.cache is None:
+            return await self._atranslate_checked(input_data, src=src, dest=dest,
+                                                  fail_translation_code=fail_translation_code)
+
+        keys, cached, missing_data = self._cache_lookup(input_data, src=src, dest=dest)
+        translated_missing_data = None
+        if missing_data is not None:
+            translated_missing_data = await self._atranslate_checked(missing_data, src=src, dest=dest,
+                                                                     fail_translation_code=fail_translation_code)
+        return self._cache_merge(input_data, keys, cached, translated_missing_data, fail_translation_code)
+
+    @classmethod
+    def check_health(cls, timeout: float = 5.0) -> None:
+        """
+        Make sure cls.health_check_address can be reached, a successful check is remembered for the whole process
+        :raises ConnectionError: If the address can not be reached
+        """
+        address = cls.health_check_address
+        if address is None or address in _HEALTHY_ADDRESSES:
+            return
+        with _HEALTH_CHECK_LOCK:
+            if address in _HEALTHY_ADDRESSES:
+                return
+            try:
+                # A connection with its own timeout, the default timeout of every other socket is left untouched
+                socket.create_connection(address, timeout=timeout).close()
+            except OSError as e:
+                raise ConnectionError(f"{cls.__name__} can not reach {address[0]}:{address[1]} ({e}), "
+                                      f"please provide internet connection as this provider requires external api calls") from e
+            _HEALTHY_ADDRESSES.add(address)
+
+    def _needs_health_check(self) -> bool:
+        return self.health_check_address is not None and self.health_check_address not in _HEALTHY_ADDRESSES
+
+    def _check_input(self, input_data: Union[str, List[str]]) -> None:
         # Type check for input_data
         if not isinstance(input_data, (str, list)):
             raise TypeError(f"input_data must be of type str or List[str], not {type(input_data).__name__}")
@@ -39,15 +131,91 @@ class Provider(ABC):
         # Ensure the translator is set
         assert self.translator, "Please assign the translator object instance to self.translator"
 
-        # Perform the translation
-        translated_instance = self._do_translate(input_data,
-                                                 src=src, dest=dest,
-                                                 fail_translation_code=fail_translation_code)
-
+    @staticmethod
+    def _check_output(input_data: Union[str, List[str]], translated_instance: Union[str, List[str]]) -> None:
         assert type(input_data) == type(translated_instance),\
             f" The function self._do_translate() return mismatch datatype from the input_data," \
             f" expected {type(input_data)} from self._do_translate() but got {type(translated_instance)}"
 
+    def _translate_checked(self, input_data: Union[str, List[str]],
+                           src: str, dest: str,
+                           fail_translation_code: str="P1OP1_F") -> Union[str, List[str]]:
+        if self._needs_health_check():
+            self.check_health()
+        # Perform the translation
+        with self.metrics.track_request(type(self).__name__, num_chars=self._num_chars(input_data)):
+            translated_instance = self._do_translate(input_data,
+                                                     src=src, dest=dest,
+                                                     fail_translation_code=fail_translation_code)
+        self._check_output(input_data, translated_instance)
+        self._count_fail_codes(translated_instance, fail_translation_code)
+        return translated_instance
+
+    async def _atranslate_checked(self, input_data: Union[str, List[str]],
+                                  src: str, dest: str,
+                                  fail_translation_code: str="P1OP1_F") -> Union[str, List[str]]:
+        if self._needs_health_check():
+            await asyncio.get_running_loop().run_in_executor(None, self.check_health)
+        with self.metrics.track_request(type(self).__name__, num_chars=self._num_chars(input_data)):
+            translated_instance = await self._ado_translate(input_data,
+                                                            src=src, dest=dest,
+                                                            fail_translation_code=fail_translation_code)
+        self._check_output(input_data, translated_instance)
+        self._count_fail_codes(translated_instance, fail_translation_code)
         return translated_instance
 
+    @staticmethod
+    def _num_chars(input_data: Union[str, List[str]]) -> int:
+        return len(input_data) if isinstance(input_data, str) else sum(len(text) for text in input_data)
+
+    def _count_fail_codes(self, translated_instance: Union[str, List[str]], fail_translation_code: str) -> None:
+        texts = translated_instance if isinstance(translated_instance, list) else [translated_instance]
+        num_failed = sum(1 for text in texts if isinstance(text, str) and fail_translation_code in text)
+        if num_failed:
+            self.metrics.inc("provider_fail_codes_total", num_failed, provider=type(self).__name__)
+
+    def _cache_lookup(self, input_data: Union[str, List[str]],
+                      src: str, dest: str) -> Tuple[List[str], Dict[str, str], Union[str, List[str], None]]:
+        """
+        Look up the texts of input_data in self.cache
+        :return: The cache keys, the cached translations and the part of input_data that still needs
+                 to be translated (same type as input_data, None if everything was cached)
+        """
+        texts = input_data if isinstance(input_data, list) else [input_data]
+        provider_name = type(self).__name__
+        keys = [self.cache.make_key(provider_name, src, dest, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        if cached:
+            self.metrics.inc("provider_cache_hits_total", len(cached), provider=provider_name)
+
+        missing_texts = [text for text, key in zip(texts, keys) if key not in cached]
+        if not missing_texts:
+            return keys, cached, None
+        return keys, cached, missing_texts if isinstance(input_data, list) else missing_texts[0]
+
+    def _cache_merge(self, input_data: Union[str, List[str]],
+                     keys: List[str], cached: Dict[str, str],
+                     translated_missing_data: Union[str, List[str], None],
+                     fail_translation_code: str="P1OP1_F") -> Union[str, List[str]]:
+        """
+        Store the newly translated texts in self.cache and rebuild the translation of input_data,
+        translations that contain the fail_translation_code are never cached
+        """
+        if translated_missing_data is not None:
+            missing_keys = [key for key in keys if key not in cached]
+            if isinstance(translated_missing_data, list):
+                # Some providers return a fixed size list of fail codes on unavoidable errors
+                if len(translated_missing_data) != len(missing_keys):
+                    translated_missing_data = [fail_translation_code] * len(missing_keys)
+            else:
+                translated_missing_data = [translated_missing_data]
+
+            new_entries = {}
+            for key, text in zip(missing_keys, translated_missing_data):
+                cached[key] = text
+                if isinstance(text, str) and fail_translation_code not in text:
+                    new_entries[key] = text
+            self.cache.set_many(new_entries)
 
+        translated_texts = [cached[key] for key in keys]
+        return translated_texts if isinstance(input_data, list) else translated_texts[0]
@@ -11,6 +11,10 @@ except ImportError:
 # https://github.com/ssut/py-googletrans
 # This is the best reliable provider, as this has access to API call instead of using the crawling method
 class GoogleProvider(Provider):
+    # googletrans translates a list item by item, batches are joined into a single request instead
+    pack_separator = "\n[[{idx}]]\n"
+    health_check_address = ("translate.googleapis.com", 443)
+
     def __init__(self):
         self.translator = Translator()
 
@@ -22,6 +22,8 @@ CACHE_PROMPT = []
 
 
 class GroqProvider(Provider):
+    health_check_address = ("api.groq.com", 443)
+
     def __init__(self):
 
         try:
@@ -41,7 +43,8 @@ class GroqProvider(Provider):
         
         return schema_prompt + json_prompt
 
-    @throttle(calls_per_minute=30, verbose=False)
+    # Starts at the free tier limit and adapts to the 429s of the account, shared by every GroqProvider instance
+    @adaptive_throttle("groq:chat.completions", calls_per_minute=30, max_calls_per_minute=300, verbose=False)
     def _do_translate(self, input_data: Union[str, List[str]],
                       src: str, dest: str,
                       fail_translation_code:str = "P1OP1_F", # Pass in this code to replace the input_data if the exception is *unavoidable*, any example that contain this will be remove post translation
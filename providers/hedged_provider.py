@@ -0,0 +1,252 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Sequence, Union
+
+try:
+    from .base_provider import Provider
+    from .utils import get_metrics_registry
+except ImportError:
+    from base_provider import Provider
+    from utils import get_metrics_registry
+
+
+class _LatencyTracker:
+    """
+    Sliding window of the latencies of a backend, shared by every HedgedProvider instance
+    """
+    def __init__(self, window: int = 500):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+
+    def add(self, latency: float) -> None:
+        with self.lock:
+            self.latencies.append(latency)
+
+    def percentile(self, q: float) -> Union[float, None]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if len(latencies) < 20:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+
+_LATENCY_TRACKERS: Dict[str, _LatencyTracker] = {}
+_LATENCY_TRACKERS_LOCK = threading.Lock()
+
+
+def _get_latency_tracker(name: str) -> _LatencyTracker:
+    with _LATENCY_TRACKERS_LOCK:
+        if name not in _LATENCY_TRACKERS:
+            _LATENCY_TRACKERS[name] = _LatencyTracker()
+        return _LATENCY_TRACKERS[name]
+
+
+_PRIMARY_EXECUTOR: Union[ThreadPoolExecutor, None] = None
+_PRIMARY_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_primary_executor() -> ThreadPoolExecutor:
+    """
+    Executor of the first attempt of every request of every HedgedProvider instance, sized for the chunk threads of
+    a DataParser so that a primary attempt never waits for a free worker (which would look like a slow request)
+    """
+    global _PRIMARY_EXECUTOR
+    with _PRIMARY_EXECUTOR_LOCK:
+        if _PRIMARY_EXECUTOR is None:
+            _PRIMARY_EXECUTOR = ThreadPoolExecutor(max_workers=256, thread_name_prefix="hedged-primary")
+        return _PRIMARY_EXECUTOR
+
+
+# Send a duplicate of a slow request to another backend instance and keep the first answer, which cuts the tail
+# latency of the chunks at the cost of a few extra requests
+class HedgedProvider(Provider):
+    def __init__(self,
+                 backends: Sequence[type] = None,  # Provider classes, the first one gets every request and the next ones
+                                                   # the hedges in turn, default to two GoogleProvider instances
+                 hedge_percentile: float = 0.95,  # A hedge is sent once the request is slower than this percentile of the
+                                                  # recent latencies of the first backend
+                 initial_hedge_delay: float = 2.0,  # Hedge delay in seconds until enough latencies have been observed
+                 min_hedge_delay: float = 0.2,
+                 max_hedges: int = 1):  # Maximum number of duplicates of a single request
+        if backends is None:
+            from .google_provider import GoogleProvider
+            backends = [GoogleProvider, GoogleProvider]
+        assert len(backends) >= 1, "HedgedProvider needs at least one backend"
+        assert 0 < hedge_percentile < 1, "hedge_percentile must be in (0, 1)"
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedges = max_hedges
+        self.latency_tracker = _get_latency_tracker(self.backends[0].__name__)
+        # Packed requests must be joined the way the first backend expects, including the default GoogleProvider
+        self.pack_separator = self.backends[0].pack_separator
+        self.metrics = get_metrics_registry()
+
+        # Idle instances per backend, an instance still running a request that lost the race is not reused until it
+        # returns since providers are not thread-safe
+        self._idle: List[List[Provider]] = [[] for _ in self.backends]
+        self._lock = threading.Lock()
+        self.translator = self.backends
+
+        self.num_hedges = 0
+        self.num_hedge_wins = 0
+
+    @classmethod
+    def configure(cls, **kwargs) -> type:
+        """
+        A subclass with different defaults, to pass as the translator of a DataParser (which creates the instances
+        without arguments)
+
+        Example:
+            translator = HedgedProvider.configure(backends=[GoogleProvider, MultipleProviders], hedge_percentile=0.9)
+        """
+        backends = kwargs.get("backends")
+        return type(cls.__name__, (cls,), {
+            "__init__": lambda self, **overrides: cls.__init__(self, **{**kwargs, **overrides}),
+            # Packed requests must be joined the way the first backend expects
+            "pack_separator": backends[0].pack_separator if backends else cls.pack_separator,
+        })
+
+    def hedge_delay(self) -> float:
+        delay = self.latency_tracker.percentile(self.hedge_percentile)
+        return max(self.min_hedge_delay, delay if delay is not None else self.initial_hedge_delay)
+
+    def _acquire(self, backend_idx: int) -> Provider:
+        with self._lock:
+            if self._idle[backend_idx]:
+                return self._idle[backend_idx].pop()
+        instance = self.backends[backend_idx]()
+        # The cache is looked up once by the HedgedProvider itself
+        instance.cache = None
+        return instance
+
+    def _release(self, backend_idx: int, instance: Provider) -> None:
+        with self._lock:
+            self._idle[backend_idx].append(instance)
+
+    def _attempt(self, attempt: int, input_data: Union[str, List[str]],
+                 src: str, dest: str, fail_translation_code: str) -> Union[str, List[str]]:
+        backend_idx = attempt % len(self.backends)
+        instance = self._acquire(backend_idx)
+        start_time = time.perf_counter()
+        # A failed instance is dropped
+        result = instance._translate_checked(input_data, src=src, dest=dest,
+                                             fail_translation_code=fail_translation_code)
+        if attempt == 0:
+            self.latency_tracker.add(time.perf_counter() - start_time)
+        self._release(backend_idx, instance)
+        return result
+
+    def _start_attempt(self, attempt: int, input_data: Union[str, List[str]],
+                       src: str, dest: str, fail_translation_code: str) -> Future:
+        """
+        Run the first attempt on the shared executor and a hedge on its own daemon thread, a losing attempt can not
+        be interrupted and simply finishes in the background (a googletrans call without timeout must not hold the
+        chunk). Hedges are rare, so the common case starts no thread at all
+        """
+        if attempt == 0:
+            return _get_primary_executor().submit(self._attempt, attempt, input_data, src, dest, fail_translation_code)
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                result = self._attempt(attempt, input_data, src, dest, fail_translation_code)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            future.set_result(result)
+
+        threading.Thread(target=run, daemon=True, name="hedged-request").start()
+        return future
+
+    def _record_hedge(self, provider: str, won: bool = False) -> None:
+        if won:
+            self.num_hedge_wins += 1
+            self.metrics.inc("hedge_wins_total", provider=provider)
+        else:
+            self.num_hedges += 1
+            self.metrics.inc("hedged_requests_total", provider=provider)
+
+    def _do_translate(self, input_data: Union[str, List[str]],
+                      src: str, dest: str,
+                      fail_translation_code: str = "P1OP1_F",
+                      **kwargs) -> Union[str, List[str]]:
+        if self.max_hedges <= 0:
+            # Nothing to race against
+            return self._attempt(0, input_data, src, dest, fail_translation_code)
+
+        provider_name = type(self).__name__
+        futures = {self._start_attempt(0, input_data, src, dest, fail_translation_code): 0}
+        num_attempts = 1
+        error = None
+        while futures:
+            timeout = self.hedge_delay() if num_attempts <= self.max_hedges else None
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = futures.pop(future)
+                if future.exception() is None:
+                    if attempt > 0:
+                        self._record_hedge(provider_name, won=True)
+                    # The losers keep running in the background, their answers are ignored
+                    return future.result()
+                error = future.exception()
+
+            # A slow request gets a duplicate, a failed one a replacement, as long as the hedge budget lasts
+            if (not done or not futures) and num_attempts <= self.max_hedges:
+                futures[self._start_attempt(num_attempts, input_data, src, dest, fail_translation_code)] = num_attempts
+                num_attempts += 1
+                self._record_hedge(provider_name)
+        raise error
+
+    async def _aattempt(self, attempt: int, input_data: Union[str, List[str]],
+                        src: str, dest: str, fail_translation_code: str) -> Union[str, List[str]]:
+        backend_idx = attempt % len(self.backends)
+        instance = self._acquire(backend_idx)
+        start_time = time.perf_counter()
+        # A cancelled or failed instance is dropped, a cancelled executor call may still be using it
+        result = await instance._atranslate_checked(input_data, src=src, dest=dest,
+                                                    fail_translation_code=fail_translation_code)
+        if attempt == 0:
+            self.latency_tracker.add(time.perf_counter() - start_time)
+        self._release(backend_idx, instance)
+        return result
+
+    async def _ado_translate(self, input_data: Union[str, List[str]],
+                             src: str, dest: str,
+                             fail_translation_code: str = "P1OP1_F",
+                             **kwargs) -> Union[str, List[str]]:
+        if self.max_hedges <= 0:
+            return await self._aattempt(0, input_data, src, dest, fail_translation_code)
+
+        provider_name = type(self).__name__
+        tasks = {asyncio.ensure_future(self._aattempt(0, input_data, src, dest, fail_translation_code)): 0}
+        num_attempts = 1
+        error = None
+        try:
+            while tasks:
+                timeout = self.hedge_delay() if num_attempts <= self.max_hedges else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    attempt = tasks.pop(task)
+                    if task.exception() is None:
+                        if attempt > 0:
+                            self._record_hedge(provider_name, won=True)
+                        return task.result()
+                    error = task.exception()
+
+                if (not done or not tasks) and num_attempts <= self.max_hedges:
+                    task = asyncio.ensure_future(self._aattempt(num_attempts, input_data, src, dest, fail_translation_code))
+                    tasks[task] = num_attempts
+                    num_attempts += 1
+                    self._record_hedge(provider_name)
+            raise error
+        finally:
+            # Native async backends stop right away, the others finish their executor call in the background
+            for task in tasks:
+                task.cancel()
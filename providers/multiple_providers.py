@@ -9,6 +9,10 @@ from .base_provider import Provider
 # https://github.com/UlionTse/translators
 # This library is not as reliable of a provider as googletrans, use this if you want to try out other translation services
 class MultipleProviders(Provider):
+    # This provider does not support batch translation, batches are joined into a single request instead
+    pack_separator = "\n[[{idx}]]\n"
+    health_check_address = ("8.8.8.8", 53)
+
     def __init__(self, cache: bool = False):
         self.translator = ts
         self.config = {
@@ -0,0 +1,95 @@
+import importlib
+import threading
+from typing import Dict, List, Union
+
+try:
+    from importlib.metadata import entry_points
+except ImportError:
+    entry_points = None
+
+
+# Entry point group where installed packages can expose their own providers, e.g. in pyproject.toml:
+#   [project.entry-points."translator.providers"]
+#   deepl = "my_package.deepl_provider:DeepLProvider"
+ENTRY_POINT_GROUP = "translator.providers"
+
+# Built-in providers by name, "module:attribute" targets (relative to this package when they start with a dot) are only
+# imported when the provider is first requested
+_REGISTRY: Dict[str, Union[str, type]] = {
+    "GoogleProvider": ".google_provider:GoogleProvider",
+    "MultipleProviders": ".multiple_providers:MultipleProviders",
+    "GroqProvider": ".groq_provider:GroqProvider",
+    "SimulatedProvider": ".simulated_provider:SimulatedProvider",
+    "HedgedProvider": ".hedged_provider:HedgedProvider",
+}
+_ALIASES: Dict[str, str] = {
+    "google": "GoogleProvider",
+    "multiple": "MultipleProviders",
+    "groq": "GroqProvider",
+    "simulated": "SimulatedProvider",
+    "hedged": "HedgedProvider",
+}
+_LOCK = threading.Lock()
+
+
+def register_provider(name: str, provider: Union[str, type]) -> None:
+    """
+    Register a provider under name
+    :param name: The name passed to get_provider (or as the translator of a DataParser)
+    :param provider: The provider class, or its "module:attribute" path to import it on first use
+    """
+    with _LOCK:
+        _REGISTRY[name] = provider
+
+
+def available_providers() -> List[str]:
+    names = set(_REGISTRY) | set(_ALIASES)
+    if entry_points is not None:
+        names |= {entry_point.name for entry_point in _entry_points()}
+    return sorted(names)
+
+
+def _entry_points() -> list:
+    try:
+        return list(entry_points(group=ENTRY_POINT_GROUP))
+    except TypeError:
+        # Python < 3.10 returns a dict of groups
+        return list(entry_points().get(ENTRY_POINT_GROUP, []))
+
+
+def _import_target(target: str) -> type:
+    module_name, _, attribute = target.partition(":")
+    provider = importlib.import_module(module_name, package=__package__)
+    for part in attribute.split(".") if attribute else []:
+        provider = getattr(provider, part)
+    return provider
+
+
+def get_provider(name: Union[str, type]) -> type:
+    """
+    Resolve a provider class, importing its module (and the client library it wraps) on first use
+    :param name: A provider class (returned as is), a registered name or alias ("GoogleProvider", "google"),
+        the name of a "translator.providers" entry point, or a "module:Class" path
+    :return: The provider class
+    """
+    if isinstance(name, type):
+        return name
+    registered_name = _ALIASES.get(name.lower(), name)
+    with _LOCK:
+        target = _REGISTRY.get(registered_name)
+    if target is None and entry_points is not None:
+        for entry_point in _entry_points():
+            if entry_point.name == name:
+                target = entry_point.load()
+                break
+    if target is None and ":" in name:
+        target = name
+    if target is None:
+        raise ValueError(f"Unknown provider {name}, choose from {available_providers()} or pass a 'module:Class' path")
+
+    if isinstance(target, str):
+        target = _import_target(target)
+        if registered_name in _REGISTRY:
+            with _LOCK:
+                _REGISTRY[registered_name] = target
+    return target
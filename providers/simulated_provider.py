@@ -0,0 +1,167 @@
+import math
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    from .base_provider import Provider
+except ImportError:
+    from base_provider import Provider
+
+
+class SimulatedRateLimitError(Exception):
+    """
+    Raised when the simulated endpoint rejects a request with HTTP 429
+    """
+    status_code = 429
+
+
+class SimulatedTimeoutError(TimeoutError):
+    """
+    Raised when a simulated request times out
+    """
+
+
+class _SimulatedEndpoint:
+    """
+    Server side state shared by every SimulatedProvider instance of an endpoint: a sliding one minute window of the
+    accepted requests, like the quota of a real account
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_times = deque()
+
+    def admit(self, requests_per_minute: Optional[float]) -> bool:
+        if requests_per_minute is None:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            while self.request_times and now - self.request_times[0] >= 60.0:
+                self.request_times.popleft()
+            if len(self.request_times) >= requests_per_minute:
+                return False
+            self.request_times.append(now)
+            return True
+
+
+_ENDPOINTS: Dict[str, _SimulatedEndpoint] = {}
+_ENDPOINTS_LOCK = threading.Lock()
+
+
+def _get_endpoint(name: str) -> _SimulatedEndpoint:
+    with _ENDPOINTS_LOCK:
+        if name not in _ENDPOINTS:
+            _ENDPOINTS[name] = _SimulatedEndpoint()
+        return _ENDPOINTS[name]
+
+
+# Offline stand-in for the real providers, use it to load-test the threading, retry and throttling code without network
+class SimulatedProvider(Provider):
+    # Same packing behaviour as GoogleProvider and MultipleProviders
+    pack_separator = "\n[[{idx}]]\n"
+
+    def __init__(self,
+                 latency_median: float = 0.2,  # Median latency of a request in seconds (log-normal distribution)
+                 latency_sigma: float = 0.5,  # Spread of the log-normal latency, 0 for a constant latency
+                 latency_per_char: float = 0.0,  # Extra seconds per character sent
+                 requests_per_minute: float = None,  # Quota of the endpoint shared by every instance, requests beyond it get a 429
+                 rate_limit_rate: float = 0.0,  # Probability of a spurious 429 on any request
+                 error_rate: float = 0.0,  # Probability of a generic server error (RuntimeError)
+                 timeout_rate: float = 0.0,  # Probability that a request hangs for timeout seconds and raises a TimeoutError
+                 timeout: float = 10.0,
+                 type_error_rate: float = 0.0,  # Probability of the googletrans gender-specific translation TypeError,
+                                                # handled like GoogleProvider by returning the fail translation code
+                 endpoint: str = "simulated",  # Instances with the same endpoint share the requests_per_minute quota
+                 translate_fn: Callable[[str, str, str], str] = None,  # Called with (text, src, dest), default to "[dest] text"
+                 seed: int = None):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.latency_per_char = latency_per_char
+        self.requests_per_minute = requests_per_minute
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout = timeout
+        self.type_error_rate = type_error_rate
+        self.endpoint = _get_endpoint(endpoint)
+        self.translator = translate_fn if translate_fn is not None else (lambda text, src, dest: f"[{dest}] {text}")
+        self.random = random.Random(seed)
+
+        self.num_requests = 0
+
+    @classmethod
+    def configure(cls, **kwargs) -> type:
+        """
+        A subclass with different defaults, to pass as the translator of a DataParser (which creates the instances
+        without arguments)
+
+        Example:
+            translator = SimulatedProvider.configure(latency_median=0.5, requests_per_minute=600, timeout_rate=0.01)
+        """
+        return type(cls.__name__, (cls,), {
+            "__init__": lambda self, **overrides: cls.__init__(self, **{**kwargs, **overrides})
+        })
+
+    def _plan_request(self, input_data: Union[str, List[str]]) -> Tuple[float, Optional[Exception]]:
+        """
+        Draw the latency and the outcome of one request
+        """
+        self.num_requests += 1
+        num_chars = len(input_data) if isinstance(input_data, str) else sum(len(text) for text in input_data)
+        latency = self.latency_median * math.exp(self.random.gauss(0, self.latency_sigma)) if self.latency_sigma \
+            else self.latency_median
+        latency += self.latency_per_char * num_chars
+
+        if not self.endpoint.admit(self.requests_per_minute) or self.random.random() < self.rate_limit_rate:
+            # Rejected requests come back quickly
+            return min(latency, 0.05), SimulatedRateLimitError("429 Too Many Requests")
+        if self.random.random() < self.timeout_rate:
+            return self.timeout, SimulatedTimeoutError(f"Request timed out after {self.timeout} seconds")
+        if self.random.random() < self.error_rate:
+            return latency, RuntimeError("500 Internal Server Error")
+        if self.random.random() < self.type_error_rate:
+            return latency, TypeError("'NoneType' object is not iterable")
+        return latency, None
+
+    def _respond(self, input_data: Union[str, List[str]],
+                 src: str, dest: str,
+                 error: Optional[Exception],
+                 fail_translation_code: str) -> Union[str, List[str]]:
+        data_type = "list" if isinstance(input_data, list) else "str"
+
+        try:
+            if error is not None:
+                raise error
+            if data_type == "list":
+                return [self.translator(text, src, dest) for text in input_data]
+            return self.translator(input_data, src, dest)
+        # Same handling as GoogleProvider for the gender-specific translation failure
+        except TypeError:
+            if data_type == "list": return [fail_translation_code, fail_translation_code]
+            return fail_translation_code
+
+    def _do_translate(self, input_data: Union[str, List[str]],
+                      src: str, dest: str,
+                      fail_translation_code: str = "P1OP1_F",
+                      **kwargs) -> Union[str, List[str]]:
+        latency, error = self._plan_request(input_data)
+        time.sleep(latency)
+        return self._respond(input_data, src, dest, error, fail_translation_code)
+
+    async def _ado_translate(self, input_data: Union[str, List[str]],
+                             src: str, dest: str,
+                             fail_translation_code: str = "P1OP1_F",
+                             **kwargs) -> Union[str, List[str]]:
+        # Native async, the simulated latency does not hold a thread
+        latency, error = self._plan_request(input_data)
+        await asyncio.sleep(latency)
+        return self._respond(input_data, src, dest, error, fail_translation_code)
+
+
+if __name__ == '__main__':
+    test = SimulatedProvider(latency_median=0.05, type_error_rate=0.3, seed=0)
+    print(test.translate(["Hello", "How are you today ?"], src="en", dest="vi"))
+    print(test.translate("Hello", src="en", dest="vi"))
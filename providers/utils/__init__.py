@@ -1,2 +1,6 @@
 from .iso_code_map import get_language_name
-from .utils import *
\ No newline at end of file
+from .utils import *
+from .cache import TranslationCache
+from .provider_pool import ProviderPool
+from .rate_limiter import AdaptiveRateLimiter, adaptive_throttle, get_rate_limiter, is_throttle_error
+from .metrics import MetricsRegistry, get_metrics_registry
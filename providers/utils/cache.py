@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import hashlib
+from threading import RLock
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class TranslationCache:
+    """
+    Content-addressed translation cache, a bounded in-memory LRU backed by a SQLite store on disk.
+    Entries are keyed by a hash of (provider, src, dest, text) so re-runs and overlapping datasets can skip
+    the network call entirely. All methods are safe to call from multiple threads.
+
+    Example:
+        cache = TranslationCache("cache/translations.sqlite")
+        key = cache.make_key("GoogleProvider", "en", "vi", "Hello")
+        cache.set(key, "Xin chào")
+        cache.get(key)  # "Xin chào"
+    """
+    def __init__(self, path: str = None, max_memory_items: int = 100000):
+        """
+        :param path: Path to the SQLite database file, None to keep the cache in memory only
+        :param max_memory_items: Maximum number of entries held by the in-memory LRU
+        """
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.hits = 0
+        self.misses = 0
+
+        self._lru = OrderedDict()
+        self._lock = RLock()
+        self._conn = None
+        if self.path:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(provider: str, src: str, dest: str, text: str) -> str:
+        return hashlib.sha256(f"{provider}\x1f{src}\x1f{dest}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, value: str) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_memory_items:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up several keys at once, only the keys that are found are returned
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                # Stay well below SQLITE_MAX_VARIABLE_NUMBER
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, value FROM translations WHERE key IN ({','.join('?' * len(batch))})",
+                        batch).fetchall()
+                    for key, value in rows:
+                        found[key] = value
+                        self._remember(key, value)
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def set(self, key: str, value: str) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        if not items:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._conn is not None:
+                self._conn.executemany("INSERT OR REPLACE INTO translations (key, value) VALUES (?, ?)",
+                                       list(items.items()))
+                self._conn.commit()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._conn is not None:
+                return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return len(self._lru)
@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .rate_limiter import is_throttle_error
+
+
+METRIC_PREFIX = "translator_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class MetricsServer(ThreadingHTTPServer):
+    def stop(self) -> None:
+        """
+        Stop serving and close the listening socket (shutdown alone leaves it open)
+        """
+        self.shutdown()
+        self.server_close()
+
+
+def _key(name: str, labels: Dict[str, str]) -> MetricKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], **extra) -> str:
+    pairs = list(labels) + [(label, value) for label, value in extra.items()]
+    if not pairs:
+        return ""
+    escaped = [(label, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for label, value in pairs]
+    return "{" + ",".join(f'{label}="{value}"' for label, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """
+    Cumulative bucket histogram in the Prometheus layout, quantiles are interpolated inside the buckets
+    """
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets) if buckets[-1] == float("inf") else tuple(buckets) + (float("inf"),)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for idx, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[idx - 1] if idx else 0.0
+                upper = self.buckets[idx]
+                if upper == float("inf"):
+                    # Nothing to interpolate towards, the largest finite bound is the best estimate
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-2]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms of a translation run, labelled by provider or stage. Providers record
+    their requests through track_request, the retry loops and the DataParser stages record into the same registry.
+    The registry renders the Prometheus text format (to_prometheus, write_textfile for the node_exporter textfile
+    collector, serve for a /metrics endpoint) and a JSON run summary (summary, write_summary).
+
+    Example:
+        metrics = get_metrics_registry()
+        with metrics.track_request("GoogleProvider", num_chars=len(text)):
+            result = client.translate(text)
+        print(metrics.summary())
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget every recorded value and restart the run clock
+        """
+        with self._lock:
+            self._counters: Dict[MetricKey, float] = {}
+            self._gauges: Dict[MetricKey, float] = {}
+            self._histograms: Dict[MetricKey, Histogram] = {}
+            self.start_time = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def add_gauge(self, name: str, delta: float, **labels) -> float:
+        """
+        Move a gauge by delta
+
+        :return: The new value of the gauge.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            value = self._gauges[key] = self._gauges.get(key, 0) + delta
+            return value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def track_request(self, provider: str, num_chars: int = 0) -> Iterator[None]:
+        """
+        Record one provider request: in-flight count, latency and outcome (ok, error or throttled), and the
+        characters sent once it succeeded
+
+        :param provider: The provider label.
+        :param num_chars: Number of characters sent in the request.
+        """
+        in_flight = self.add_gauge("provider_in_flight", 1, provider=provider)
+        with self._lock:
+            max_key = _key("provider_in_flight_max", {"provider": provider})
+            self._gauges[max_key] = max(self._gauges.get(max_key, 0), in_flight)
+        start_time = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc("provider_requests_total", provider=provider,
+                     status="throttled" if is_throttle_error(e) else "error")
+            raise
+        else:
+            self.inc("provider_requests_total", provider=provider, status="ok")
+            self.inc("provider_characters_total", num_chars, provider=provider)
+        finally:
+            self.observe("provider_request_seconds", time.perf_counter() - start_time, provider=provider)
+            self.add_gauge("provider_in_flight", -1, provider=provider)
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                          for key, histogram in self._histograms.items()}
+
+        lines: List[str] = []
+        for metric_type, values in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({name for name, _ in values}):
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+                for (key_name, labels), value in sorted(values.items()):
+                    if key_name == name:
+                        lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+            for (key_name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels, le=_format_value(bound))} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {count}")
+
+        lines.append(f"# TYPE {METRIC_PREFIX}run_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}run_seconds {_format_value(round(time.time() - self.start_time, 3))}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        """
+        JSON serialisable summary of the run: per provider request counts, latency quantiles, throughput, peak
+        concurrency and fail codes, and the retries, stage durations and example counts
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = dict(self._histograms)
+            elapsed = time.time() - self.start_time
+
+        def by_label(values: Dict[MetricKey, float], name: str, label: str) -> Dict[str, float]:
+            grouped = {}
+            for (key_name, labels), value in values.items():
+                if key_name == name:
+                    label_value = dict(labels).get(label, "")
+                    grouped[label_value] = grouped.get(label_value, 0) + value
+            return grouped
+
+        providers = {}
+        for (name, labels), histogram in histograms.items():
+            if name != "provider_request_seconds":
+                continue
+            provider = dict(labels)["provider"]
+            statuses = {dict(key_labels).get("status"): value for (key_name, key_labels), value in counters.items()
+                        if key_name == "provider_requests_total" and dict(key_labels).get("provider") == provider}
+            characters = by_label(counters, "provider_characters_total", "provider").get(provider, 0)
+            providers[provider] = {
+                "requests": histogram.count,
+                "errors": statuses.get("error", 0),
+                "throttled": statuses.get("throttled", 0),
+                "characters": characters,
+                "characters_per_second": round(characters / elapsed, 2) if elapsed > 0 else 0.0,
+                "latency_seconds": {
+                    "mean": round(histogram.sum / histogram.count, 4) if histogram.count else 0.0,
+                    "p50": round(histogram.quantile(0.5), 4),
+                    "p90": round(histogram.quantile(0.9), 4),
+                    "p99": round(histogram.quantile(0.99), 4),
+                },
+                "max_in_flight": by_label(gauges, "provider_in_flight_max", "provider").get(provider, 0),
+                "fail_codes": by_label(counters, "provider_fail_codes_total", "provider").get(provider, 0),
+                "cache_hits": by_label(counters, "provider_cache_hits_total", "provider").get(provider, 0),
+            }
+
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "providers": providers,
+            "retries": by_label(counters, "retries_total", "stage"),
+            "gave_up": by_label(counters, "gave_up_total", "stage"),
+            "stage_seconds": {stage: round(seconds, 4)
+                              for stage, seconds in by_label(gauges, "stage_seconds", "stage").items()},
+            "examples": by_label(counters, "examples_total", "status"),
+        }
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Atomically write the Prometheus text format to path (e.g. for the node_exporter textfile collector, which
+        expects a .prom suffix)
+        """
+        with open(path + ".tmp", 'w', encoding='utf-8') as textfile:
+            textfile.write(self.to_prometheus())
+        os.replace(path + ".tmp", path)
+
+    def write_summary(self, path: str) -> None:
+        with open(path + ".tmp", 'w', encoding='utf-8') as summary_file:
+            json.dump(self.summary(), summary_file, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def start_textfile_writer(self, path: str, interval: float = 15.0) -> threading.Event:
+        """
+        Rewrite the textfile every interval seconds on a daemon thread
+
+        :return: An event, set it to write the textfile one last time and stop the thread.
+        """
+        stop_event = threading.Event()
+
+        def refresh():
+            while not stop_event.wait(interval):
+                self.write_textfile(path)
+            self.write_textfile(path)
+
+        threading.Thread(target=refresh, daemon=True, name="metrics-textfile").start()
+        return stop_event
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> MetricsServer:
+        """
+        Serve the Prometheus text format on http://host:port/metrics and the JSON summary on /summary, from a
+        daemon thread. Only local clients can connect by default, pass host="0.0.0.0" to expose the metrics of the
+        run to the network (e.g. for a Prometheus server on another host)
+
+        :return: The server, call stop() on it to stop serving and release the port.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/summary"):
+                    body, content_type = json.dumps(registry.summary()).encode("utf-8"), "application/json"
+                elif self.path.startswith("/metrics") or self.path == "/":
+                    body, content_type = registry.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes would flood the tqdm output
+                pass
+
+        server = MetricsServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+        return server
+
+
+_METRICS_REGISTRY: Optional[MetricsRegistry] = None
+_METRICS_REGISTRY_LOCK = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Get the registry shared by every provider and parser of the process, it is created on first use
+
+    :return: The shared MetricsRegistry.
+    """
+    global _METRICS_REGISTRY
+    with _METRICS_REGISTRY_LOCK:
+        if _METRICS_REGISTRY is None:
+            _METRICS_REGISTRY = MetricsRegistry()
+        return _METRICS_REGISTRY
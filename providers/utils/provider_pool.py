@@ -0,0 +1,94 @@
+import weakref
+import threading
+from typing import Any, Callable, Dict, List
+
+
+def _release_to_pool(pool_ref: "weakref.ref", instance: Any) -> None:
+    pool = pool_ref()
+    if pool is not None:
+        pool._release(instance)
+
+
+def _detach_finalizers(finalizers: List[weakref.finalize]) -> None:
+    for finalizer in finalizers:
+        finalizer.detach()
+
+
+class ProviderPool:
+    """
+    Hand out reusable provider instances instead of building a new client (and new TCP/TLS connections) per request.
+    Every thread gets its own instance, which it keeps for its whole lifetime, so an instance is never used by two
+    threads at once. When a thread exits its instance goes back to the idle list and is handed to the next new
+    thread, so the number of instances created is bounded by the peak number of concurrent threads and the
+    keep-alive sessions of the clients are reused across executors. Once the pool itself is garbage-collected the
+    threads still alive (e.g. the main thread) let go of their instances too.
+
+    Example:
+        pool = ProviderPool(GoogleProvider)
+        translator = pool.get()  # Same instance for every call from this thread
+    """
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        :param factory: Called without arguments to create a new provider instance.
+        """
+        self.factory = factory
+        self._local = threading.local()
+        self._idle: List[Any] = []
+        self._discarded = set()  # ids of the instances that must not go back to the idle list
+        self._lock = threading.Lock()
+        # Thread finalizers only hold a weak reference to the pool, and are detached with it
+        self._finalizers: List[weakref.finalize] = []
+        weakref.finalize(self, _detach_finalizers, self._finalizers)
+
+        self.num_created = 0
+        self.num_reused = 0
+
+    def get(self) -> Any:
+        """
+        Get the provider instance of the calling thread
+
+        :return: The provider instance.
+        """
+        instance = getattr(self._local, "instance", None)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if self._idle:
+                instance = self._idle.pop()
+                self.num_reused += 1
+        if instance is None:
+            instance = self.factory()
+            with self._lock:
+                self.num_created += 1
+
+        self._local.instance = instance
+        # Give the instance back once the thread object is gone (the thread finished and its executor was shut down)
+        finalizer = weakref.finalize(threading.current_thread(), _release_to_pool, weakref.ref(self), instance)
+        with self._lock:
+            self._finalizers[:] = [other for other in self._finalizers if other.alive]
+            self._finalizers.append(finalizer)
+        return instance
+
+    def discard(self, instance: Any) -> None:
+        """
+        Drop the instance of the calling thread, e.g. after it raised, the next get creates or reuses another one
+
+        :param instance: The instance to drop, nothing happens if it is not the instance of the calling thread.
+        """
+        if getattr(self._local, "instance", None) is instance:
+            self._local.instance = None
+            with self._lock:
+                self._discarded.add(id(instance))
+
+    def _release(self, instance: Any) -> None:
+        with self._lock:
+            if id(instance) in self._discarded:
+                self._discarded.discard(id(instance))
+                return
+            self._idle.append(instance)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"created": self.num_created, "reused": self.num_reused, "idle": len(self._idle)}
@@ -0,0 +1,178 @@
+import time
+import socket
+from threading import Lock
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """
+    Check if an exception means the provider is asking us to slow down (HTTP 429 or a timeout)
+
+    :param error: The exception raised by the provider call.
+    :return: True if the request rate should be decreased.
+    """
+    if isinstance(error, (TimeoutError, socket.timeout)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code == 429:
+        return True
+    # Clients that wrap the HTTP error in their own exception types (groq, httpx, translators)
+    error_name = type(error).__name__.lower()
+    return "ratelimit" in error_name or "timeout" in error_name or "429" in str(error)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate is tuned with AIMD (additive increase, multiplicative decrease): every successful
+    call raises the rate by increase_step calls per minute, a 429 or a timeout multiplies it by decrease_factor.
+    The limiter only gates admission, a thread sleeps outside of the lock until its token is due and the call itself
+    is never serialised, so throughput tracks whatever the provider actually allows.
+
+    Example:
+        limiter = AdaptiveRateLimiter(calls_per_minute=30)
+        limiter.acquire()
+        try:
+            result = client.call()
+        except Exception as e:
+            if is_throttle_error(e):
+                limiter.on_throttle()
+            raise
+        limiter.on_success()
+    """
+    def __init__(self, calls_per_minute: float,
+                 min_calls_per_minute: float = 1.0,
+                 max_calls_per_minute: Optional[float] = None,
+                 increase_step: float = 1.0,
+                 decrease_factor: float = 0.5,
+                 burst: int = 1,
+                 cooldown: float = 1.0):
+        """
+        :param calls_per_minute: The initial rate.
+        :param min_calls_per_minute: The rate never goes below this.
+        :param max_calls_per_minute: The rate never goes above this, default to 10 times the initial rate.
+        :param increase_step: Calls per minute added after every successful call.
+        :param decrease_factor: The rate is multiplied by this on a 429 or a timeout.
+        :param burst: Maximum number of tokens stored while the provider is idle.
+        :param cooldown: Seconds during which further throttle signals are ignored after a decrease, the in-flight
+            requests sent at the old rate all fail together and should only count once.
+        """
+        assert 0 < min_calls_per_minute <= calls_per_minute, "calls_per_minute must be at least min_calls_per_minute"
+        assert 0 < decrease_factor < 1, "decrease_factor must be in (0, 1)"
+        self.min_rate = min_calls_per_minute
+        self.max_rate = max_calls_per_minute if max_calls_per_minute else calls_per_minute * 10
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.burst = burst
+        self.cooldown = cooldown
+
+        self._rate = float(calls_per_minute)
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._lock = Lock()
+
+        self.num_calls = 0
+        self.num_throttled = 0
+
+    @property
+    def rate(self) -> float:
+        """
+        The current rate in calls per minute
+        """
+        return self._rate
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self._rate / 60.0)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        """
+        Block until the caller may send a request
+
+        :return: The number of seconds waited.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            # Reserve the token now and let the balance go negative, later callers queue up behind it
+            self._tokens -= 1
+            self.num_calls += 1
+            wait_time = -self._tokens * 60.0 / self._rate if self._tokens < 0 else 0.0
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = min(self.max_rate, self._rate + self.increase_step)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.num_throttled += 1
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._refill(now)
+            self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+            # Drop the stored tokens so the next call waits a full interval at the new rate
+            self._tokens = min(self._tokens, 0.0)
+            self._last_decrease = now
+
+
+_RATE_LIMITERS: Dict[str, AdaptiveRateLimiter] = {}
+_RATE_LIMITERS_LOCK = Lock()
+
+
+def get_rate_limiter(name: str, calls_per_minute: float, **kwargs) -> AdaptiveRateLimiter:
+    """
+    Get the limiter shared by every instance of a provider endpoint, it is created on first use
+
+    :param name: The provider and endpoint, e.g. "groq:chat.completions".
+    :param calls_per_minute: The initial rate, only used when the limiter is created.
+    :param kwargs: Other AdaptiveRateLimiter arguments, only used when the limiter is created.
+    :return: The shared AdaptiveRateLimiter.
+    """
+    with _RATE_LIMITERS_LOCK:
+        if name not in _RATE_LIMITERS:
+            _RATE_LIMITERS[name] = AdaptiveRateLimiter(calls_per_minute, **kwargs)
+        return _RATE_LIMITERS[name]
+
+
+def adaptive_throttle(name: str, calls_per_minute: float, verbose: bool = False, **kwargs) -> Callable:
+    """
+    Decorator that admits calls through the shared AdaptiveRateLimiter of a provider endpoint and feeds the outcome
+    of every call back to it.
+
+    :param name: The provider and endpoint, calls to functions decorated with the same name share one limiter.
+    :param calls_per_minute: The initial rate.
+    :param verbose: If True, prints the waits and the rate changes.
+    :param kwargs: Other AdaptiveRateLimiter arguments.
+
+    Example:
+        @adaptive_throttle("groq:chat.completions", calls_per_minute=30)
+        def _do_translate(self, input_data, src, dest, **kwargs):
+            ...
+    """
+    def decorator(func):
+        limiter = get_rate_limiter(name, calls_per_minute, **kwargs)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            wait_time = limiter.acquire()
+            if verbose and wait_time > 0:
+                print(f"Throttling: waited {wait_time:.4f} seconds before calling {func.__name__} ({limiter.rate:.1f} calls/min)")
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if is_throttle_error(e):
+                    limiter.on_throttle()
+                    if verbose:
+                        print(f"Throttled by {name}, rate decreased to {limiter.rate:.1f} calls/min")
+                raise
+            limiter.on_success()
+            return result
+        return wrapper
+    return decorator
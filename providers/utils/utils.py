@@ -4,8 +4,7 @@ import time
 from typing import Any, Dict
 from collections import deque
 
-from fuzzywuzzy import fuzz
-from pydantic import BaseModel, Field, create_model
+# pydantic and fuzzywuzzy are only needed by GroqProvider, they are imported by the functions using them
 
 
 from typing import Callable
@@ -38,17 +37,19 @@ def throttle(calls_per_minute: int, verbose: bool=False) -> Callable:
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            # Only reserve the next slot under the lock, the wait and the call itself run outside of it
             with lock:
-                elapsed = time.time() - last_call[0]
-                wait_time = interval - elapsed
-                if wait_time > 0:
-                    if verbose:
-                        print(f"Throttling: waiting for {wait_time:.4f} seconds before calling {func.__name__}")
-                    time.sleep(wait_time)
-                last_call[0] = time.time()
+                now = time.time()
+                call_time = max(now, last_call[0] + interval)
+                last_call[0] = call_time
+            wait_time = call_time - now
+            if wait_time > 0:
                 if verbose:
-                    print(f"Calling function {func.__name__} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_call[0]))}")
-                return func(*args, **kwargs)
+                    print(f"Throttling: waiting for {wait_time:.4f} seconds before calling {func.__name__}")
+                time.sleep(wait_time)
+            if verbose:
+                print(f"Calling function {func.__name__} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(call_time))}")
+            return func(*args, **kwargs)
         return wrapper
     return decorator
 
@@ -93,7 +94,7 @@ def brust_throttle(calls_per_minute: int, verbose: bool=False, extra_delay: floa
     return decorator
 
 
-def create_dynamic_model(model_name: str, fields: Dict[str, Any]) -> BaseModel:
+def create_dynamic_model(model_name: str, fields: Dict[str, Any]) -> "BaseModel":
     """
     Create a dynamic Pydantic model.
 
@@ -101,6 +102,7 @@ def create_dynamic_model(model_name: str, fields: Dict[str, Any]) -> BaseModel:
     :param fields: Dictionary where keys are field names and values are field types.
     :return: A Pydantic BaseModel class.
     """
+    from pydantic import create_model
     return create_model(model_name, **fields)
 
 
@@ -113,7 +115,8 @@ def fuzzy_match(input_string, comparison_strings: list, threshold=80):
     :param threshold: The minimum similarity ratio required to consider the strings similar.
     :return: True if the strings are similar, False otherwise.
     """
-    
+    from fuzzywuzzy import fuzz
+
     for comparison_string in comparison_strings:
         if fuzz.ratio(input_string, comparison_string) >= threshold:
             return True
@@ -121,6 +124,8 @@ def fuzzy_match(input_string, comparison_strings: list, threshold=80):
 
 
 if __name__ == '__main__':
+    from pydantic import Field
+
     fields = {
         'name': (str, Field(..., description="The name of the person")),  # Required field with description
         'age': (int, Field(None, description="The age of the person")),  # Optional field with description
@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.async_engine import AsyncTranslationEngine
+
+
+class FlakyTranslator:
+    """
+    Fails its first request when created with fail_first=True, then translates to "[dest] text"
+    """
+    def __init__(self, fail_first: bool = False):
+        self.fail_next = fail_first
+        self.num_requests = 0
+
+    async def translate_async(self, input_data, src, dest, fail_translation_code="P1OP1_F"):
+        self.num_requests += 1
+        await asyncio.sleep(0.001)
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("500 Internal Server Error")
+        return f"[{dest}] {input_data}"
+
+
+async def translate_example(example, engine):
+    return {"text": await engine.translate(example["text"], src="en", dest="vi")}
+
+
+class TestAsyncTranslationEngine(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+    def make_factory(self, num_failing: int = 0):
+        def factory():
+            translator = FlakyTranslator(fail_first=len(self.created) < num_failing)
+            self.created.append(translator)
+            return translator
+        return factory
+
+    def test_translators_created_lazily(self):
+        engine = AsyncTranslationEngine(self.make_factory(), max_concurrent_requests=64, num_example_workers=2)
+        results = engine.run([{"text": str(idx)} for idx in range(20)], translate_example)
+
+        self.assertEqual(results, [{"text": f"[vi] {idx}"} for idx in range(20)])
+        self.assertLessEqual(len(self.created), 2)
+        self.assertEqual(engine.num_translators_created, len(self.created))
+
+    def test_created_translators_bounded_by_limit(self):
+        engine = AsyncTranslationEngine(self.make_factory(), max_concurrent_requests=3, num_example_workers=10)
+        engine.run([{"text": str(idx)} for idx in range(30)], translate_example)
+
+        self.assertLessEqual(len(self.created), 3)
+
+    def test_failed_translator_is_replaced(self):
+        engine = AsyncTranslationEngine(self.make_factory(num_failing=1), max_concurrent_requests=1,
+                                        retry_delay=0.001)
+        results = engine.run([{"text": str(idx)} for idx in range(5)], translate_example)
+
+        self.assertEqual(results, [{"text": f"[vi] {idx}"} for idx in range(5)])
+        failed = self.created[0]
+        self.assertEqual(failed.num_requests, 1)
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(self.created[1].num_requests, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
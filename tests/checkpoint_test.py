@@ -0,0 +1,60 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.checkpoint import TranslationCheckpoint
+
+
+def is_failed(example):
+    return "P1OP1_F" in example["text"]
+
+
+class TestTranslationCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.checkpoint_dir = os.path.join(tempfile.mkdtemp(), "checkpoint")
+        self.examples = [{"qas_id": str(idx), "text": "P1OP1_F" if idx == 1 else f"[vi] {idx}"} for idx in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.checkpoint_dir), ignore_errors=True)
+
+    def test_resume_skips_journaled_examples(self):
+        checkpoint = TranslationCheckpoint(self.checkpoint_dir)
+        checkpoint.write(self.examples[:2])
+        checkpoint.close()
+
+        resumed = TranslationCheckpoint(self.checkpoint_dir)
+        self.assertEqual(resumed.filter_pending(self.examples), self.examples[2:])
+        resumed.write(self.examples[2:])
+        self.assertEqual(resumed.load(), self.examples)
+
+    def test_failed_examples_are_translated_again(self):
+        checkpoint = TranslationCheckpoint(self.checkpoint_dir, is_failed=is_failed)
+        checkpoint.write(self.examples)
+        self.assertFalse(checkpoint.is_completed("1"))
+        checkpoint.close()
+
+        resumed = TranslationCheckpoint(self.checkpoint_dir, is_failed=is_failed)
+        self.assertEqual(resumed.filter_pending(self.examples), [self.examples[1]])
+        retranslated = dict(self.examples[1], text="[vi] 1")
+        resumed.write([retranslated])
+        self.assertEqual(sorted(resumed.load(), key=lambda example: example["qas_id"]),
+                         [self.examples[0], retranslated, self.examples[2]])
+
+    def test_failed_examples_of_old_journals_are_pending(self):
+        os.makedirs(self.checkpoint_dir)
+        with open(os.path.join(self.checkpoint_dir, "shard_00000.jsonl"), 'w', encoding='utf-8') as jfile:
+            for example in self.examples:
+                jfile.write(json.dumps(example) + "\n")
+
+        resumed = TranslationCheckpoint(self.checkpoint_dir, is_failed=is_failed)
+        self.assertEqual(resumed.filter_pending(self.examples), [self.examples[1]])
+        self.assertEqual(resumed.load(), [self.examples[0], self.examples[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
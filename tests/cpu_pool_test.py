@@ -0,0 +1,24 @@
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.utils import CPUPool
+from translator.filters import have_code, have_code_batch
+
+
+class TestCPUPool(unittest.TestCase):
+
+    def test_map_keeps_input_order(self):
+        with CPUPool(num_proc=2, min_chunk_size=1) as pool:
+            self.assertEqual(pool.map(abs, range(-50, 50), chunksize=7), [abs(x) for x in range(-50, 50)])
+        self.assertIsNone(pool._executor)
+
+    def test_code_filter_in_shared_pool(self):
+        texts = ["def f(x): return x; import re; class A {}", "A plain sentence.", ["for i in x:", "while True"]] * 10
+        with CPUPool(num_proc=2) as pool:
+            results = have_code_batch(texts, chunksize=4, executor=pool.executor)
+        self.assertEqual(results, [have_code(text) for text in texts])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from configs import DialogsConfig
+from providers import SimulatedProvider
+from translator import DataParser, VerboseCallback
+
+
+def make_examples(num_examples: int):
+    return [{"qas_id": str(idx), "system_prompt": "sys",
+             "user_prompts": [f"q{idx}", f"q{idx}b"], "agent_responses": [f"a{idx}"],
+             "prompt_lengths": None, "answer_lengths": None} for idx in range(num_examples)]
+
+
+class SimulatedParser(DataParser):
+    def __init__(self, output_dir: str, examples, **kwargs):
+        kwargs.setdefault("translator", SimulatedProvider.configure(latency_median=0.001, latency_sigma=0.0))
+        kwargs.setdefault("retry_base_delay", 0.01)
+        super().__init__(__file__, output_dir,
+                         parser_name="simulated",
+                         target_config=DialogsConfig,
+                         target_fields=["user_prompts", "agent_responses"],
+                         do_translate=True,
+                         max_example_per_thread=10,
+                         large_chunks_threshold=50,
+                         **kwargs)
+        self.examples = examples
+
+    def read(self) -> None:
+        super(SimulatedParser, self).read()
+        self.data_read = self.examples
+
+    def convert(self) -> None:
+        super(SimulatedParser, self).convert()
+        self.converted_data = (dict(example, user_prompts=list(example["user_prompts"]),
+                                    agent_responses=list(example["agent_responses"])) for example in self.data_read)
+        if not self.streaming:
+            self.converted_data = list(self.converted_data)
+
+
+class CrashOnError(VerboseCallback):
+    """
+    Stop the run at the first chunk that gives up, like a process killed halfway through
+    """
+    def on_error_translate(self, instance, error):
+        raise KeyboardInterrupt
+
+
+def load_jsonl(path: str):
+    with open(path, encoding='utf-8') as jfile:
+        return [json.loads(line) for line in jfile]
+
+
+class TestDataParser(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def run_parser(self, examples, **kwargs) -> SimulatedParser:
+        parser = SimulatedParser(self.output_dir, examples, **kwargs)
+        parser.read()
+        parser.convert()
+        parser.save
+        return parser
+
+    def test_streaming_keeps_parsed_output_untranslated(self):
+        examples = make_examples(60)
+        self.run_parser(examples, streaming=True, stream_num_workers=4)
+
+        parsed = load_jsonl(os.path.join(self.output_dir, "simulated.json"))
+        self.assertEqual(parsed, examples)
+        translated = load_jsonl(os.path.join(self.output_dir, "simulated_translated_vi.json"))
+        self.assertEqual([example["qas_id"] for example in translated], [example["qas_id"] for example in examples])
+        self.assertEqual(translated[3]["user_prompts"], ["[vi] q3", "[vi] q3b"])
+
+    def test_retried_chunks_are_translated_once(self):
+        examples = make_examples(80)
+        translator = SimulatedProvider.configure(latency_median=0.001, latency_sigma=0.0, error_rate=0.03)
+        parser = self.run_parser(examples, translator=translator, max_retries=10)
+
+        translated = load_jsonl(os.path.join(self.output_dir, "simulated_translated_vi.json"))
+        self.assertEqual([example["qas_id"] for example in translated], [example["qas_id"] for example in examples])
+        for example in translated:
+            idx = example["qas_id"]
+            self.assertEqual(example["user_prompts"], [f"[vi] q{idx}", f"[vi] q{idx}b"])
+            self.assertEqual(example["agent_responses"], [f"[vi] a{idx}"])
+        # The converted examples are left untouched
+        self.assertEqual(parser.converted_data, examples)
+
+    def test_packed_requests(self):
+        examples = make_examples(30)
+        for streaming in [False, True]:
+            self.run_parser(examples, pack_requests=True, streaming=streaming, stream_num_workers=2)
+            translated = load_jsonl(os.path.join(self.output_dir, "simulated_translated_vi.json"))
+            self.assertEqual(translated[7]["user_prompts"], ["[vi] q7", "[vi] q7b"])
+            self.assertEqual(len(translated), 30)
+        with self.assertRaises(AssertionError):
+            SimulatedParser(self.output_dir, examples, pack_requests=True, translation_backend="async")
+
+    def test_async_backend(self):
+        examples = make_examples(60)
+        self.run_parser(examples, translation_backend="async", max_concurrent_requests=8)
+        translated = load_jsonl(os.path.join(self.output_dir, "simulated_translated_vi.json"))
+        self.assertEqual([example["qas_id"] for example in translated], [example["qas_id"] for example in examples])
+        self.assertEqual(translated[42]["agent_responses"], ["[vi] a42"])
+
+        # From a running event loop, as in a Jupyter or Colab cell
+        async def notebook_cell():
+            return self.run_parser(examples, translation_backend="async", max_concurrent_requests=8)
+
+        asyncio.run(notebook_cell())
+        self.assertEqual(load_jsonl(os.path.join(self.output_dir, "simulated_translated_vi.json")), translated)
+
+    def test_resume_after_interruption(self):
+        examples = make_examples(120)
+        flaky_translator = SimulatedProvider.configure(latency_median=0.001, latency_sigma=0.0, error_rate=0.05)
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_parser(examples, translator=flaky_translator, max_retries=0, enable_checkpoint=True,
+                            parser_callbacks=[CrashOnError])
+        translated_path = os.path.join(self.output_dir, "simulated_translated_vi.json")
+        self.assertFalse(os.path.exists(translated_path))
+        checkpoint_dir = os.path.join(self.output_dir, "simulated_checkpoint_vi")
+        journaled = [example for shard in os.listdir(checkpoint_dir) for example in load_jsonl(os.path.join(checkpoint_dir, shard))]
+        self.assertLess(len({example["qas_id"] for example in journaled}), len(examples))
+
+        # The resumed run only sends the examples missing from the journal
+        translated_texts = []
+        translator = SimulatedProvider.configure(latency_median=0.001, latency_sigma=0.0,
+                                                 translate_fn=lambda text, src, dest: translated_texts.append(text) or f"[{dest}] {text}")
+        self.run_parser(examples, translator=translator, enable_checkpoint=True)
+        self.assertTrue(set(translated_texts).isdisjoint(f"q{example['qas_id']}" for example in journaled))
+        self.assertEqual(len(translated_texts), 3 * (len(examples) - len({example["qas_id"] for example in journaled})))
+
+        translated = load_jsonl(translated_path)
+        self.assertEqual([example["qas_id"] for example in translated], [example["qas_id"] for example in examples])
+        for example in translated:
+            idx = example["qas_id"]
+            self.assertEqual(example["user_prompts"], [f"[vi] q{idx}", f"[vi] q{idx}b"])
+        self.assertFalse(os.path.exists(checkpoint_dir))
+
+    def test_multiple_target_languages(self):
+        examples = make_examples(60)
+        for translation_backend in ["thread", "async"]:
+            parser = self.run_parser(examples, target_lang=["vi", "fr"], translation_backend=translation_backend)
+            for target_lang in ["vi", "fr"]:
+                translated = load_jsonl(os.path.join(self.output_dir, f"simulated_translated_{target_lang}.json"))
+                self.assertEqual([example["qas_id"] for example in translated], [example["qas_id"] for example in examples])
+                self.assertEqual(translated[9]["user_prompts"], [f"[{target_lang}] q9", f"[{target_lang}] q9b"])
+                self.assertEqual(translated[9]["agent_responses"], [f"[{target_lang}] a9"])
+            # The data shared by the languages is left untranslated
+            self.assertEqual(parser.converted_data, examples)
+            self.assertEqual(load_jsonl(os.path.join(self.output_dir, "simulated.json")), examples)
+
+
+if __name__ == '__main__':
+    unittest.main()
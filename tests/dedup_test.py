@@ -0,0 +1,51 @@
+import re
+import hashlib
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.dedup import Deduplicator, DedupPlan
+
+
+class TestDeduplicator(unittest.TestCase):
+
+    def setUp(self):
+        text = " ".join(f"word{idx}" for idx in range(80))
+        self.examples = [
+            {"qas_id": "0", "question_text": text},
+            {"qas_id": "1", "question_text": "  " + text.replace(" ", "\n", 3)},  # Exact duplicate up to whitespace
+            {"qas_id": "2", "question_text": text.replace("word20", "other")},  # Near duplicate
+            {"qas_id": "3", "question_text": "Something completely different"},
+        ]
+
+    def test_exact_and_near_clusters(self):
+        self.assertEqual(Deduplicator(["question_text"]).cluster(self.examples), {0: [1]})
+        self.assertEqual(Deduplicator(["question_text"], near_duplicates=True).cluster(self.examples), {0: [1, 2]})
+
+    def test_fan_out_keeps_input_order(self):
+        clusters = Deduplicator(["question_text"], near_duplicates=True).cluster(self.examples)
+        plan = DedupPlan(self.examples, clusters, ["question_text"], mode="fanout")
+        self.assertEqual([example["qas_id"] for example in plan.representatives], ["0", "3"])
+
+        translated = [dict(example, question_text="translated " + example["qas_id"]) for example in plan.representatives]
+        fanned_out = plan.fan_out(translated)
+        self.assertEqual([example["qas_id"] for example in fanned_out], ["0", "1", "2", "3"])
+        self.assertEqual([example["question_text"] for example in fanned_out],
+                         ["translated 0", "translated 0", "translated 0", "translated 3"])
+        self.assertEqual(plan.report()["duplicates"], 2)
+
+    def test_minhash_matches_exact_arithmetic(self):
+        deduplicator = Deduplicator(["question_text"], near_duplicates=True, num_perm=16, num_bands=4)
+        text = self.examples[2]["question_text"]
+        prime = (1 << 61) - 1
+        words = re.findall(r"\w+", text.lower())
+        hashes = [int.from_bytes(hashlib.blake2b(" ".join(words[idx:idx + 3]).encode("utf-8"), digest_size=8).digest(),
+                                 "little") & prime for idx in range(len(words) - 2)]
+        # Python ints do not overflow
+        expected = [min((int(a) * x + int(b)) % prime for x in hashes)
+                    for a, b in zip(deduplicator._perm_a, deduplicator._perm_b)]
+        self.assertEqual([int(value) for value in deduplicator.minhash(text)], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
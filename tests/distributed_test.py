@@ -0,0 +1,98 @@
+import os
+import time
+import unittest
+import tempfile
+import sys
+sys.path.insert(0,r'./')
+
+from translator.checkpoint import TranslationCheckpoint
+from translator.distributed import ShardCoordinator, partition
+
+
+class TestDistributed(unittest.TestCase):
+
+    def setUp(self):
+        self.examples = [{"qas_id": str(idx)} for idx in range(100)]
+
+    def test_partition_covers_every_example_once(self):
+        for strategy in ["hash", "range"]:
+            shards = [partition(self.examples, 7, shard_idx, strategy=strategy) for shard_idx in range(7)]
+            qas_ids = sorted(int(example["qas_id"]) for shard in shards for example in shard)
+            self.assertEqual(qas_ids, list(range(100)))
+        self.assertEqual(partition(self.examples, 7, 3), partition(list(self.examples), 7, 3))
+
+    def test_claim_complete_and_stale_takeover(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            coordinator = ShardCoordinator(work_dir, num_shards=2, lock_timeout=0.5)
+            first = coordinator.claim()
+            second = coordinator.claim()
+            self.assertEqual({first, second}, {0, 1})
+            self.assertIsNone(coordinator.claim())
+
+            coordinator.complete(first)
+            os.remove(coordinator.shard_path(first, ".lock"))
+            # The worker holding the second shard stopped heart-beating
+            stale_time = time.time() - 10
+            os.utime(coordinator.shard_path(second, ".lock"), (stale_time, stale_time))
+            self.assertEqual(coordinator.claim(), second)
+
+            with coordinator.hold(second):
+                coordinator.complete(second)
+            self.assertTrue(coordinator.all_done())
+            self.assertFalse(os.path.exists(coordinator.shard_path(second, ".lock")))
+
+    def test_stalled_worker_leaves_the_new_owner_alone(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            stalled = ShardCoordinator(work_dir, num_shards=1, lock_timeout=0.5)
+            other = ShardCoordinator(work_dir, num_shards=1, lock_timeout=0.5)
+            self.assertEqual(stalled.claim(), 0)
+            with stalled.hold(0):
+                lock_path = stalled.shard_path(0, ".lock")
+                stale_time = time.time() - 10
+                os.utime(lock_path, (stale_time, stale_time))
+                self.assertEqual(other.claim(), 0)
+                self.assertFalse(stalled.owns(0))
+            # The stalled worker released nothing, the shard is still held by its new owner
+            self.assertTrue(other.owns(0))
+            self.assertIsNone(ShardCoordinator(work_dir, num_shards=1, lock_timeout=0.5).claim())
+
+    def test_single_merge_then_done(self):
+        with tempfile.TemporaryDirectory() as shard_dir:
+            work_dir = os.path.join(shard_dir, "job")
+            merger = ShardCoordinator(work_dir, num_shards=2, poll_interval=0.01)
+            waiting = ShardCoordinator(work_dir, num_shards=2, poll_interval=0.01)
+            for shard_idx in merger.wait_for_shards():
+                with merger.hold(shard_idx):
+                    merger.complete(shard_idx)
+            self.assertEqual(list(waiting.wait_for_shards()), [])
+            self.assertTrue(merger.wait_for_merge())
+            merger.finish()
+            self.assertFalse(waiting.wait_for_merge())
+            self.assertEqual(os.listdir(work_dir), ["DONE"])
+
+            # A worker (re)started after the merge has nothing to do
+            restarted = ShardCoordinator(work_dir, num_shards=2, poll_interval=0.01)
+            self.assertTrue(restarted.is_finished())
+            self.assertEqual(list(restarted.wait_for_shards()), [])
+            self.assertIsNone(restarted.claim())
+            self.assertFalse(restarted.wait_for_merge())
+
+            # Until the job is explicitly reset
+            restarted.reset()
+            self.assertFalse(restarted.is_finished())
+            self.assertIn(next(restarted.wait_for_shards()), [0, 1])
+
+    def test_workers_sharing_a_checkpoint_write_separate_journals(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            stalled = TranslationCheckpoint(checkpoint_dir)
+            new_owner = TranslationCheckpoint(checkpoint_dir)
+            stalled.write([{"qas_id": "0"}])
+            new_owner.write([{"qas_id": "1"}])
+            stalled.write([{"qas_id": "2"}])
+            self.assertEqual(len(new_owner.shard_paths), 2)
+            self.assertEqual(sorted(example["qas_id"] for example in new_owner.load()), ["0", "1", "2"])
+            stalled.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import asyncio
+import threading
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from providers import SimulatedProvider, HedgedProvider, GoogleProvider
+
+
+class TestHedgedProvider(unittest.TestCase):
+
+    def setUp(self):
+        slow = SimulatedProvider.configure(latency_median=2.0, latency_sigma=0, endpoint="test:hedge_slow",
+                                           translate_fn=lambda text, src, dest: "slow")
+        fast = SimulatedProvider.configure(latency_median=0.0, latency_sigma=0, endpoint="test:hedge_fast",
+                                           translate_fn=lambda text, src, dest: "fast")
+        self.translator = HedgedProvider(backends=[slow, fast], initial_hedge_delay=0.1)
+
+    def test_slow_request_is_hedged(self):
+        start_time = time.perf_counter()
+        self.assertEqual(self.translator.translate("Hello", src="en", dest="vi"), "fast")
+        self.assertLess(time.perf_counter() - start_time, 1.0)
+        self.assertEqual((self.translator.num_hedges, self.translator.num_hedge_wins), (1, 1))
+
+    def test_slow_request_is_hedged_async(self):
+        start_time = time.perf_counter()
+        result = asyncio.run(self.translator.translate_async(["Hello", "World"], src="en", dest="vi"))
+        self.assertEqual(result, ["fast", "fast"])
+        self.assertLess(time.perf_counter() - start_time, 1.0)
+
+    def test_primary_attempt_starts_no_thread(self):
+        thread_names = []
+        record = SimulatedProvider.configure(latency_median=0.0, latency_sigma=0, endpoint="test:hedge_record",
+                                             translate_fn=lambda text, src, dest:
+                                             thread_names.append(threading.current_thread().name) or text)
+        translator = HedgedProvider(backends=[record, record], initial_hedge_delay=5.0)
+        translator.translate("Hello", src="en", dest="vi")
+        self.assertTrue(thread_names[0].startswith("hedged-primary"))
+
+        HedgedProvider(backends=[record], max_hedges=0).translate("Hello", src="en", dest="vi")
+        self.assertEqual(thread_names[1], threading.current_thread().name)
+        self.assertEqual(translator.num_hedges, 0)
+
+    def test_pack_separator_of_first_backend(self):
+        self.assertEqual(self.translator.pack_separator, SimulatedProvider.pack_separator)
+        self.assertEqual(HedgedProvider().pack_separator, GoogleProvider.pack_separator)
+        self.assertEqual(HedgedProvider.configure(initial_hedge_delay=1.0)().pack_separator,
+                         GoogleProvider.pack_separator)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import socket
+import unittest
+import urllib.request
+import sys
+sys.path.insert(0,r'./')
+
+from providers import Provider
+from providers.utils import MetricsRegistry
+
+
+class EchoProvider(Provider):
+    def __init__(self):
+        self.translator = lambda text: text
+
+    def _do_translate(self, input_data, src, dest, fail_translation_code="P1OP1_F", **kwargs):
+        if input_data == "boom":
+            raise RuntimeError("provider down")
+        if isinstance(input_data, list):
+            return [fail_translation_code if text == "bad" else text for text in input_data]
+        return input_data
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_provider_requests_are_recorded(self):
+        provider = EchoProvider()
+        provider.metrics = MetricsRegistry()
+        provider.translate("hello", src="en", dest="vi")
+        provider.translate(["hi", "bad"], src="en", dest="vi")
+        with self.assertRaises(RuntimeError):
+            provider.translate("boom", src="en", dest="vi")
+
+        stats = provider.metrics.summary()["providers"]["EchoProvider"]
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["characters"], len("hello") + len("hi") + len("bad"))
+        self.assertEqual(stats["fail_codes"], 1)
+        self.assertEqual(stats["max_in_flight"], 1)
+
+        text = provider.metrics.to_prometheus()
+        self.assertIn('translator_provider_requests_total{provider="EchoProvider",status="ok"} 2', text)
+        self.assertIn('translator_provider_request_seconds_count{provider="EchoProvider"} 3', text)
+
+    def test_serve_locally_and_stop(self):
+        registry = MetricsRegistry()
+        registry.inc("retries_total", stage="chunk")
+        server = registry.serve(0)
+        host, port = server.server_address
+        self.assertEqual(host, "127.0.0.1")
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            self.assertIn('translator_retries_total{stage="chunk"} 1', response.read().decode("utf-8"))
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/summary", timeout=5) as response:
+            self.assertEqual(json.loads(response.read())["retries"], {"chunk": 1})
+
+        server.stop()
+        # The listening socket is closed, the port can be bound again
+        with socket.socket() as probe:
+            # Still refused while a socket listens on the port, only the TIME_WAIT of the requests is allowed
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            probe.bind(("127.0.0.1", port))
+
+
+if __name__ == '__main__':
+    unittest.main()
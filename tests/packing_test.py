@@ -0,0 +1,79 @@
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from providers import SimulatedProvider
+from translator.packing import RequestPacker
+
+
+def upper_provider() -> SimulatedProvider:
+    # Keeps the markers, so that a joined batch is a single request
+    return SimulatedProvider(latency_median=0.0, latency_sigma=0.0, endpoint="test:packing",
+                             translate_fn=lambda text, src, dest: text.upper())
+
+
+class TestRequestPacker(unittest.TestCase):
+
+    def setUp(self):
+        self.examples = [{"title": "first", "lines": ["a", "", "bb"]},
+                         {"title": "", "lines": ["ccc"]},
+                         {"title": "x" * 30, "lines": None}]
+
+    def test_pack_keeps_order_and_limits(self):
+        packer = RequestPacker(max_batch_chars=8, max_batch_items=3)
+        batches = packer.pack(self.examples, ["title", "lines"])
+        self.assertEqual(batches, [[(0, "title", None), (0, "lines", 0), (0, "lines", 1)],
+                                   [(0, "lines", 2), (1, "lines", 0)],
+                                   [(2, "title", None)]])
+        texts = [packer.get_text(self.examples, slot) for batch in batches for slot in batch]
+        self.assertEqual(texts, ["first", "a", "", "bb", "ccc", "x" * 30])
+
+    def test_join_split_round_trip(self):
+        separator = SimulatedProvider.pack_separator
+        texts = ["Hello", "multi\nline text", "", "x [1] y"]
+        joined = RequestPacker.join_texts(texts, separator)
+        self.assertEqual(RequestPacker.split_texts(joined, separator, len(texts)), texts)
+        # The markers survive a translation that reformats them, only the separator newlines are trimmed
+        self.assertEqual(RequestPacker.split_texts("\n[[ 0 ]]\nHello\n[[1]] World", separator, 2), ["Hello", " World"])
+        # Lost, reordered or extra markers are detected
+        self.assertIsNone(RequestPacker.split_texts(joined.replace("[[2]]", ""), separator, len(texts)))
+        self.assertIsNone(RequestPacker.split_texts("[[1]]a[[0]]b", separator, 2))
+        self.assertIsNone(RequestPacker.split_texts("intro [[0]]a[[1]]b", separator, 2))
+
+    def test_translate_batch_joins_into_one_request(self):
+        translator = upper_provider()
+        packer = RequestPacker()
+        texts = ["first", "second line\nthird", "last"]
+        self.assertEqual(packer.translate_batch(texts, translator, src="en", dest="vi"),
+                         ["FIRST", "SECOND LINE\nTHIRD", "LAST"])
+        self.assertEqual(translator.num_requests, 1)
+
+    def test_surrounding_newlines_are_kept(self):
+        separator = SimulatedProvider.pack_separator
+        texts = ["\nHello\n", "  indented", "\n\n", "trailing\n\n", "\nlast\n"]
+        joined = RequestPacker.join_texts(texts, separator)
+        self.assertEqual(RequestPacker.split_texts(joined, separator, len(texts)), texts)
+
+        translator = upper_provider()
+        self.assertEqual(RequestPacker().translate_batch(texts, translator, src="en", dest="vi"),
+                         [text.upper() for text in texts])
+        self.assertEqual(translator.num_requests, 1)
+
+    def test_texts_containing_markers(self):
+        translator = upper_provider()
+        packer = RequestPacker()
+        texts = ["see [[1]] below", "[[0]]", "plain"]
+        self.assertEqual(packer.translate_batch(texts, translator, src="en", dest="vi"),
+                         ["SEE [[1]] BELOW", "[[0]]", "PLAIN"])
+        # Sent as a list instead of joined
+        self.assertEqual(translator.num_requests, 1)
+
+        # The examples are written back slot by slot
+        examples = [{"lines": list(texts)}]
+        for slot, translated_text in zip(packer.pack(examples, ["lines"])[0], ["a", "b", "c"]):
+            packer.set_text(examples, slot, translated_text)
+        self.assertEqual(examples, [{"lines": ["a", "b", "c"]}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import time
+import random
+import threading
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.pipeline import StreamingPipeline
+
+
+def make_examples(num_examples: int):
+    return [{"qas_id": str(idx)} for idx in range(num_examples)]
+
+
+class TestStreamingPipeline(unittest.TestCase):
+
+    def test_ordered_and_unordered_results(self):
+        generator = random.Random(0)
+        delays = [generator.random() * 0.005 for _ in range(200)]
+
+        def process(example, worker_idx):
+            idx = int(example["qas_id"])
+            time.sleep(delays[idx])
+            # Dropped examples leave no gap in the output
+            return None if idx % 7 == 0 else dict(example, worker=worker_idx)
+
+        expected = [str(idx) for idx in range(200) if idx % 7 != 0]
+        results = []
+        stats = StreamingPipeline(iter(make_examples(200)), process, num_workers=8, queue_size=10).run(results.append)
+        self.assertEqual([result["qas_id"] for result in results], expected)
+        self.assertGreater(len({result["worker"] for result in results}), 1)
+        self.assertEqual(stats, {"read": 200, "written": len(expected), "filtered": 200 - len(expected), "failed": 0})
+
+        results = []
+        StreamingPipeline(iter(make_examples(200)), process, num_workers=8, queue_size=10, ordered=False).run(results.append)
+        self.assertEqual(sorted(result["qas_id"] for result in results), sorted(expected))
+
+    def test_slow_example_bounds_the_read_ahead(self):
+        num_read = []
+        first_done = threading.Event()
+
+        def source():
+            for example in make_examples(100):
+                num_read.append(example["qas_id"])
+                yield example
+
+        def process(example, worker_idx):
+            if example["qas_id"] == "0":
+                first_done.wait(5.0)
+            return example
+
+        pipeline = StreamingPipeline(source(), process, num_workers=4, queue_size=5)
+        read_while_blocked = []
+
+        def release_first():
+            time.sleep(0.2)
+            read_while_blocked.append(len(num_read))
+            first_done.set()
+
+        threading.Thread(target=release_first, daemon=True).start()
+        results = []
+        pipeline.run(results.append)
+        # The feeder waits for the oldest example instead of reading the whole source
+        self.assertLessEqual(read_while_blocked[0], 5 + 1)
+        self.assertEqual([result["qas_id"] for result in results], [str(idx) for idx in range(100)])
+
+    def test_slow_sink_bounds_the_queues(self):
+        num_read = []
+        read_while_blocked = []
+
+        def source():
+            for example in make_examples(200):
+                num_read.append(example["qas_id"])
+                yield example
+
+        def sink(result):
+            if result["qas_id"] == "0":
+                time.sleep(0.2)
+                read_while_blocked.append(len(num_read))
+
+        StreamingPipeline(source(), lambda example, worker_idx: example, num_workers=4, queue_size=5, ordered=False).run(sink)
+        # Both queues, one example per worker, the one the feeder holds and the one in the sink
+        self.assertLessEqual(read_while_blocked[0], 2 * 5 + 4 + 2)
+        self.assertEqual(len(num_read), 200)
+
+    def test_worker_errors(self):
+        attempts = {}
+        errors = []
+
+        def process(example, worker_idx):
+            qas_id = example["qas_id"]
+            attempts[qas_id] = attempts.get(qas_id, 0) + 1
+            if qas_id == "3" or (qas_id == "5" and attempts[qas_id] < 3):
+                raise RuntimeError(f"failed {qas_id}")
+            return example
+
+        results = []
+        pipeline = StreamingPipeline(iter(make_examples(10)), process, num_workers=2, max_retries=2, retry_base_delay=0.001,
+                                     on_error=lambda example, error: errors.append((example["qas_id"], str(error))))
+        stats = pipeline.run(results.append)
+        self.assertEqual([result["qas_id"] for result in results], [str(idx) for idx in range(10) if idx != 3])
+        self.assertEqual(errors, [("3", "failed 3")])
+        self.assertEqual((attempts["3"], attempts["5"]), (3, 3))
+        self.assertEqual(stats, {"read": 10, "written": 9, "filtered": 0, "failed": 1})
+
+    def test_source_error_is_raised(self):
+        def source():
+            yield from make_examples(3)
+            raise ValueError("broken source")
+
+        results = []
+        with self.assertRaises(ValueError):
+            StreamingPipeline(source(), lambda example, worker_idx: example, num_workers=2).run(results.append)
+        # The examples read before the error still reach the sink
+        self.assertEqual(len(results), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
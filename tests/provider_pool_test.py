@@ -0,0 +1,97 @@
+import gc
+import weakref
+import threading
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from providers.utils import ProviderPool
+
+
+class CountingProvider:
+    num_created = 0
+
+    def __init__(self):
+        CountingProvider.num_created += 1
+        self.idx = CountingProvider.num_created
+
+
+def get_in_thread(pool: ProviderPool) -> CountingProvider:
+    instances = []
+    thread = threading.Thread(target=lambda: instances.append(pool.get()))
+    thread.start()
+    thread.join()
+    del thread
+    gc.collect()
+    return instances[0]
+
+
+class TestProviderPool(unittest.TestCase):
+
+    def setUp(self):
+        CountingProvider.num_created = 0
+
+    def test_one_instance_per_thread(self):
+        pool = ProviderPool(CountingProvider)
+        instance = pool.get()
+        self.assertIs(pool.get(), instance)
+
+        barrier = threading.Barrier(4)
+        instances = [None] * 4
+
+        def worker(idx):
+            instances[idx] = pool.get()
+            barrier.wait()  # Every thread holds its instance at the same time
+            assert pool.get() is instances[idx]
+
+        threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(other) for other in instances + [instance]}), 5)
+        self.assertEqual(pool.num_created, 5)
+
+    def test_finished_thread_releases_its_instance(self):
+        pool = ProviderPool(CountingProvider)
+        first = get_in_thread(pool)
+        self.assertEqual(pool.stats, {"created": 1, "reused": 0, "idle": 1})
+        self.assertIs(get_in_thread(pool), first)
+        self.assertEqual(pool.stats, {"created": 1, "reused": 1, "idle": 1})
+
+    def test_discarded_instance_is_rebuilt(self):
+        pool = ProviderPool(CountingProvider)
+        released = []
+
+        def worker():
+            instance = pool.get()
+            pool.discard(instance)
+            released.append(instance)
+            released.append(pool.get())
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        del thread
+        gc.collect()
+        broken, rebuilt = released
+        self.assertIsNot(rebuilt, broken)
+        self.assertEqual(pool.num_created, 2)
+        # Only the rebuilt instance goes back to the pool
+        self.assertEqual(pool._idle, [rebuilt])
+        # Discarding an instance of another thread does nothing
+        pool.discard(rebuilt)
+        self.assertIs(get_in_thread(pool), rebuilt)
+
+    def test_pool_is_garbage_collected(self):
+        pool = ProviderPool(CountingProvider)
+        instance_ref = weakref.ref(pool.get())  # Held by the main thread, which outlives the pool
+        pool_ref = weakref.ref(pool)
+        del pool
+        gc.collect()
+        self.assertIsNone(pool_ref())
+        self.assertIsNone(instance_ref())
+
+
+if __name__ == '__main__':
+    unittest.main()
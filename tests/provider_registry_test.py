@@ -0,0 +1,38 @@
+import subprocess
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from providers import Provider, SimulatedProvider, get_provider, register_provider
+
+
+class TestProviderRegistry(unittest.TestCase):
+
+    def test_resolve_by_name_alias_and_path(self):
+        self.assertIs(get_provider("SimulatedProvider"), SimulatedProvider)
+        self.assertIs(get_provider("simulated"), SimulatedProvider)
+        self.assertIs(get_provider("providers.simulated_provider:SimulatedProvider"), SimulatedProvider)
+        self.assertIs(get_provider(SimulatedProvider), SimulatedProvider)
+        register_provider("fast_simulated", SimulatedProvider.configure(latency_median=0.0))
+        self.assertTrue(issubclass(get_provider("fast_simulated"), SimulatedProvider))
+        with self.assertRaises(ValueError):
+            get_provider("unknown_provider")
+
+    def test_import_does_not_load_clients(self):
+        code = "import sys; import translator, providers; from providers import *; " \
+               "print(any(module in sys.modules for module in ['googletrans', 'translators', 'groq', 'pydantic']))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+    def test_health_check_is_deferred(self):
+        class UnreachableProvider(SimulatedProvider):
+            health_check_address = ("127.0.0.1", 1)
+
+        provider = UnreachableProvider()
+        with self.assertRaises(ConnectionError):
+            provider.translate("Hello", src="en", dest="vi")
+        self.assertIsNone(Provider.health_check_address)
+
+
+if __name__ == '__main__':
+    unittest.main()
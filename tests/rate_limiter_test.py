@@ -0,0 +1,49 @@
+import time
+import unittest
+import sys
+sys.path.insert(0,r'./')
+from concurrent.futures import ThreadPoolExecutor
+
+from providers.utils import AdaptiveRateLimiter, adaptive_throttle, get_rate_limiter
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def test_aimd(self):
+        limiter = AdaptiveRateLimiter(calls_per_minute=60, min_calls_per_minute=10, max_calls_per_minute=62, cooldown=0)
+        for _ in range(5):
+            limiter.on_success()
+        self.assertEqual(limiter.rate, 62)
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 31)
+        for _ in range(5):
+            limiter.on_throttle()
+        self.assertEqual(limiter.rate, 10)
+
+    def test_decorator_does_not_serialise_calls(self):
+        @adaptive_throttle("test:slow", calls_per_minute=60000, burst=4)
+        def slow_call(fail=False):
+            time.sleep(0.2)
+            if fail:
+                raise RateLimitError("Too many requests")
+            return True
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: slow_call(), range(4)))
+        self.assertTrue(all(results))
+        self.assertLess(time.monotonic() - start, 0.6)
+
+        limiter = get_rate_limiter("test:slow", calls_per_minute=1)
+        rate = limiter.rate
+        with self.assertRaises(RateLimitError):
+            slow_call(fail=True)
+        self.assertEqual(limiter.rate, rate / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import sys
+sys.path.insert(0,r'./')
+from unittest import mock
+
+from translator import JsonlReader, iter_json_array
+
+
+def add_one(record):
+    return record["idx"] + 1
+
+
+class TestJsonlReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "data.jsonl")
+        self.records = [{"idx": idx, "text": f"line {idx} é"} for idx in range(50)]
+        with open(self.path, 'w', encoding='utf-8') as jfile:
+            for idx, record in enumerate(self.records):
+                jfile.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if idx % 10 == 0:
+                    jfile.write("\n")  # Empty lines are skipped
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_random_access(self):
+        with JsonlReader(self.path) as reader:
+            self.assertEqual(len(reader), 50)
+            self.assertEqual(reader[0], self.records[0])
+            self.assertEqual(reader[37], self.records[37])
+            self.assertEqual(reader[-1], self.records[-1])
+            with self.assertRaises(IndexError):
+                reader[50]
+            self.assertEqual(list(reader.iter_range(10, 13)), self.records[10:13])
+            self.assertEqual(list(reader), self.records)
+            self.assertEqual(list(reader.iter_parallel(num_proc=2, chunk_size=7, start=5, map_fn=add_one)),
+                             list(range(6, 51)))
+
+    def test_index_is_built_once_and_reused(self):
+        with JsonlReader(self.path) as reader:
+            expected = [reader[idx] for idx in range(len(reader))]
+        self.assertTrue(os.path.exists(self.path + ".idx"))
+
+        with mock.patch.object(JsonlReader, "_build_index", side_effect=AssertionError("index rebuilt")):
+            with JsonlReader(self.path) as reader:
+                self.assertEqual([reader[idx] for idx in [49, 0, 25]], [expected[49], expected[0], expected[25]])
+
+        # A changed file invalidates the index
+        with open(self.path, 'a', encoding='utf-8') as jfile:
+            jfile.write(json.dumps({"idx": 50}) + "\n")
+        with JsonlReader(self.path) as reader:
+            self.assertEqual(len(reader), 51)
+            self.assertEqual(reader[50], {"idx": 50})
+
+    def test_without_index_file(self):
+        with JsonlReader(self.path, use_index_file=False) as reader:
+            self.assertEqual(reader[3], self.records[3])
+        self.assertFalse(os.path.exists(self.path + ".idx"))
+
+
+class TestIterJsonArray(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "data.json")
+        self.records = [
+            {"qas_id": "0", "conversations": [{"from": "human", "value": "a [bracketed], \"quoted\" text"}]},
+            [[1, [2, []]], {"nested": {"deeper": [{}, []]}}],
+            "string with ] and , and \\ and \" inside",
+            -2.5e10, 12345678901234567890, 0, True, False, None,
+            {"unicode": "é漢字🙂", "escaped": "\u00e9\n\t", "empty": ""},
+            {"long": "x" * 5000, "numbers": [1.5, -3, 1e-7]},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write(self, document, indent=None) -> None:
+        with open(self.path, 'w', encoding='utf-8') as jfile:
+            json.dump(document, jfile, ensure_ascii=False, indent=indent)
+
+    def test_values_spanning_chunk_boundaries(self):
+        for indent in [None, 2]:
+            self.write(self.records, indent=indent)
+            # Small chunks cut strings, escapes, literals and numbers at every possible position
+            for chunk_size in [1, 2, 3, 7, 64, 1 << 20]:
+                self.assertEqual(list(iter_json_array(self.path, chunk_size=chunk_size)), self.records,
+                                 f"indent={indent}, chunk_size={chunk_size}")
+
+    def test_array_path(self):
+        self.write({"version": [1, 2, {"data": "skipped"}], "data": {"meta": {"conversations": "]"},
+                                                                     "conversations": self.records}})
+        for chunk_size in [1, 5, 1 << 20]:
+            self.assertEqual(list(iter_json_array(self.path, array_path="data.conversations", chunk_size=chunk_size)),
+                             self.records)
+        with self.assertRaises(KeyError):
+            list(iter_json_array(self.path, array_path="data.missing"))
+
+    def test_empty_and_malformed_arrays(self):
+        self.write([])
+        self.assertEqual(list(iter_json_array(self.path, chunk_size=1)), [])
+        with open(self.path, 'w', encoding='utf-8') as jfile:
+            jfile.write('[{"a": 1} {"b": 2}]')
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(self.path, chunk_size=4))
+        with open(self.path, 'w', encoding='utf-8') as jfile:
+            jfile.write('[{"a": 1}, {"b": ')
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(self.path, chunk_size=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
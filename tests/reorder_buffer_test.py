@@ -0,0 +1,43 @@
+import threading
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.utils import ReorderBuffer
+
+
+class TestReorderBuffer(unittest.TestCase):
+
+    def test_releases_in_input_order(self):
+        released = []
+        buffer = ReorderBuffer(on_release=released.append)
+        buffer.push(2, "c")
+        buffer.push(1, "b")
+        self.assertEqual(released, [])
+        buffer.push(0, "a")
+        self.assertEqual(released, ["a", "b", "c"])
+        # None items complete the prefix without being released
+        buffer.push(4, "e")
+        buffer.push(3, None)
+        self.assertEqual(released, ["a", "b", "c", "e"])
+        self.assertEqual(buffer.next_idx, 5)
+
+    def test_wait_for_slot_bounds_the_distance(self):
+        buffer = ReorderBuffer(on_release=lambda item: None, max_pending=2)
+        buffer.wait_for_slot(1)  # Within the window, returns right away
+        admitted = threading.Event()
+
+        def producer():
+            buffer.wait_for_slot(2)
+            admitted.set()
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        self.assertFalse(admitted.wait(0.1))
+        buffer.push(0, "a")
+        self.assertTrue(admitted.wait(1.0))
+        thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+sys.path.insert(0,r'./')
+from concurrent.futures import ThreadPoolExecutor
+
+from translator.utils import RetryScheduler, backoff_delay
+
+
+class TestRetryScheduler(unittest.TestCase):
+
+    def test_backoff_delay_bounds(self):
+        for attempt in range(1, 10):
+            delay = min(60.0, 2 ** (attempt - 1))
+            self.assertTrue(delay / 2 <= backoff_delay(attempt, base_delay=1.0) <= delay)
+        self.assertLessEqual(backoff_delay(20, base_delay=1.0, max_delay=5.0), 5.0)
+
+    def test_retries_until_success_or_give_up(self):
+        calls = {"flaky": 0, "broken": 0}
+
+        def flaky():
+            calls["flaky"] += 1
+            if calls["flaky"] < 3:
+                raise RuntimeError("flaky")
+            return "flaky done"
+
+        def broken():
+            calls["broken"] += 1
+            raise RuntimeError("broken")
+
+        results, retries, give_ups = {}, [], []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            scheduler = RetryScheduler(executor, max_retries=2, base_delay=0.001,
+                                       on_retry=lambda idx, error, delay: retries.append(idx),
+                                       on_give_up=lambda idx, error: give_ups.append(idx))
+            failures = scheduler.run([lambda: "ok", flaky, broken], on_success=results.__setitem__)
+
+        self.assertEqual(results, {0: "ok", 1: "flaky done"})
+        self.assertEqual(list(failures), [2])
+        self.assertEqual(str(failures[2]), "broken")
+        self.assertEqual(calls, {"flaky": 3, "broken": 3})
+        self.assertEqual(sorted(retries), [1, 1, 2, 2])
+        self.assertEqual(give_ups, [2])
+        self.assertEqual(scheduler.num_retries, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import random
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from translator.segmenter import segment_text, split_surrounding_whitespace
+
+
+class TestSegmenter(unittest.TestCase):
+
+    def assert_round_trip(self, text: str, max_chars: int):
+        segments = segment_text(text, max_chars=max_chars)
+        self.assertEqual("".join(segments), text)
+        self.assertTrue(all(0 < len(segment) <= max_chars for segment in segments))
+        return segments
+
+    def test_short_text_is_one_segment(self):
+        self.assertEqual(segment_text("Hello world.", max_chars=100), ["Hello world."])
+        self.assertEqual(segment_text("", max_chars=100), [""])
+
+    def test_paragraphs(self):
+        paragraphs = [f"Paragraph {idx} has a few words in it." for idx in range(6)]
+        text = "\n\n".join(paragraphs) + "\n"
+        segments = self.assert_round_trip(text, max_chars=90)
+        # Segments end on paragraph boundaries
+        self.assertTrue(all(segment.endswith("\n\n") for segment in segments[:-1]))
+        self.assertEqual(segments[0], paragraphs[0] + "\n\n" + paragraphs[1] + "\n\n")
+
+    def test_sentences(self):
+        text = " ".join(f"Sentence number {idx} is here!" for idx in range(20))
+        segments = self.assert_round_trip(text, max_chars=70)
+        self.assertTrue(all(segment.rstrip().endswith("here!") for segment in segments))
+
+    def test_code_fences_are_kept_whole(self):
+        code = "```python\ndef add(a, b):\n\n    return a + b\n```\n"
+        text = "Some intro text.\n\n" + code + "\nAnd a conclusion sentence. " * 3
+        segments = self.assert_round_trip(text, max_chars=len(code) + 5)
+        self.assertIn(code, segments)
+
+        # A code block larger than a segment is split on line boundaries
+        long_code = "~~~\n" + "".join(f"line_{idx} = {idx}\n" for idx in range(30)) + "~~~\n"
+        segments = self.assert_round_trip("Intro.\n\n" + long_code, max_chars=40)
+        self.assertTrue(all(segment.endswith("\n") for segment in segments))
+
+    def test_over_long_tokens(self):
+        token = "x" * 250
+        segments = self.assert_round_trip(f"Before {token} after.", max_chars=60)
+        self.assertEqual(segments[1:5], ["x" * 60] * 4)
+        self.assert_round_trip(token, max_chars=7)
+
+    def test_random_texts(self):
+        generator = random.Random(0)
+        pieces = ["word", "Sentence.", "Question?", "\n", "\n\n", "  ", "```\ncode\n```\n", "~~~\n", "y" * 40, "。", "\t"]
+        for _ in range(200):
+            text = "".join(generator.choice(pieces) + generator.choice(["", " "]) for _ in range(generator.randint(1, 80)))
+            self.assert_round_trip(text, max_chars=generator.randint(1, 120))
+
+    def test_split_surrounding_whitespace(self):
+        self.assertEqual(split_surrounding_whitespace("\n\n  Hello world \n"), ("\n\n  ", "Hello world", " \n"))
+        self.assertEqual(split_surrounding_whitespace(" \n "), (" \n ", "", ""))
+        for segment in ["a", " a", "a\n", "\n"]:
+            self.assertEqual("".join(split_surrounding_whitespace(segment)), segment)
+
+
+if __name__ == '__main__':
+    unittest.main()
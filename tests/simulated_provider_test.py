@@ -0,0 +1,28 @@
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from providers import SimulatedProvider
+from providers.simulated_provider import SimulatedRateLimitError
+from providers.utils import is_throttle_error
+
+
+class TestSimulatedProvider(unittest.TestCase):
+
+    def test_quota_is_shared_by_the_endpoint(self):
+        translator = SimulatedProvider.configure(latency_median=0.0, requests_per_minute=3, endpoint="test:quota")
+        first, second = translator(), translator()
+        self.assertEqual(first.translate("Hello", src="en", dest="vi"), "[vi] Hello")
+        self.assertEqual(second.translate(["a", "b"], src="en", dest="vi"), ["[vi] a", "[vi] b"])
+        first.translate("Hello", src="en", dest="vi")
+        with self.assertRaises(SimulatedRateLimitError) as context:
+            second.translate("Hello", src="en", dest="vi")
+        self.assertTrue(is_throttle_error(context.exception))
+
+    def test_type_error_returns_the_fail_code(self):
+        translator = SimulatedProvider(latency_median=0.0, type_error_rate=1.0, endpoint="test:type_error")
+        self.assertEqual(translator.translate("Hello", src="en", dest="vi", fail_translation_code="FAIL"), "FAIL")
+
+
+if __name__ == '__main__':
+    unittest.main()
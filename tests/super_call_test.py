@@ -0,0 +1,61 @@
+import threading
+import unittest
+import sys
+sys.path.insert(0,r'./')
+from abc import abstractmethod
+
+from translator.utils import force_super_call, ForceBaseCallMeta
+
+
+class Base(metaclass=ForceBaseCallMeta):
+    @abstractmethod
+    @force_super_call
+    def convert(self, event: threading.Event = None, call_base: bool = True) -> str:
+        return "base"
+
+
+class Good(Base):
+    def convert(self, event: threading.Event = None, call_base: bool = True) -> str:
+        if event is not None:
+            event.wait()
+        return super().convert() if call_base else "skipped"
+
+
+class Leaf(Good):
+    def convert(self, event: threading.Event = None, call_base: bool = True) -> str:
+        return super().convert(event, call_base) + "+leaf"
+
+
+class TestForceSuperCall(unittest.TestCase):
+
+    def test_contract(self):
+        self.assertEqual(Good().convert(), "base")
+        self.assertEqual(Leaf().convert(), "base+leaf")
+        with self.assertRaises(RuntimeError):
+            Good().convert(call_base=False)
+        with self.assertRaises(TypeError):
+            Base()
+        # Attribute access goes through the default object.__getattribute__
+        self.assertIs(type(Good()).__getattribute__, object.__getattribute__)
+
+    def test_state_is_per_thread(self):
+        event = threading.Event()
+        errors = []
+
+        def run(call_base: bool) -> None:
+            try:
+                Leaf().convert(event, call_base)
+            except RuntimeError:
+                errors.append(call_base)
+
+        threads = [threading.Thread(target=run, args=(call_base,)) for call_base in [True, False, True, True]]
+        for thread in threads:
+            thread.start()
+        event.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+sys.path.insert(0,r'./')
+
+from providers.base_provider import Provider
+from providers.utils import TranslationCache
+
+
+class CountingProvider(Provider):
+    def __init__(self):
+        self.translator = self._do_translate
+        self.calls = 0
+
+    def _do_translate(self, input_data, src, dest, fail_translation_code="P1OP1_F", **kwargs):
+        self.calls += 1
+        if isinstance(input_data, list):
+            return [fail_translation_code if text == "fail" else f"{dest}:{text}" for text in input_data]
+        return f"{dest}:{input_data}"
+
+
+class TestTranslationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.cache_dir, "cache.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_only_missing_texts_are_translated(self):
+        provider = CountingProvider()
+        provider.cache = TranslationCache(self.cache_path)
+
+        self.assertEqual(provider.translate(["a", "b"], src="en", dest="vi"), ["vi:a", "vi:b"])
+        self.assertEqual(provider.translate(["b", "c", "a"], src="en", dest="vi"), ["vi:b", "vi:c", "vi:a"])
+        self.assertEqual(provider.translate("c", src="en", dest="vi"), "vi:c")
+        self.assertEqual(provider.calls, 2)
+        self.assertEqual(provider.cache.stats["hits"], 3)
+        self.assertEqual(provider.cache.stats["misses"], 3)
+
+    def test_cache_persists_and_skips_fail_code(self):
+        provider = CountingProvider()
+        provider.cache = TranslationCache(self.cache_path)
+        provider.translate(["a", "fail"], src="en", dest="vi")
+        provider.cache.close()
+
+        provider = CountingProvider()
+        provider.cache = TranslationCache(self.cache_path)
+        self.assertEqual(provider.translate("a", src="en", dest="vi"), "vi:a")
+        self.assertEqual(provider.calls, 0)
+        provider.translate("fail", src="en", dest="vi")
+        self.assertEqual(provider.calls, 1)
+        # Entries are keyed by the language pair
+        provider.translate("a", src="en", dest="ko")
+        self.assertEqual(provider.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+import sys
+sys.path.insert(0,r'./')
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from configs import DialogsConfig, KTOConfig
+from translator.writers import JsonlWriter, ShardedTableWriter, annotation_to_arrow_type, config_to_arrow_schema, \
+    encode_json, orjson, pa, zstandard
+
+if pa is not None:
+    import pyarrow.parquet as pq
+
+try:
+    import datasets
+except ImportError:
+    datasets = None
+
+
+def make_dialogs(num_examples: int):
+    return [{"qas_id": str(idx), "system_prompt": "sys", "user_prompts": [f"q{idx}"], "agent_responses": [f"a{idx}"],
+             "answer_lengths": [len(f"a{idx}")], "prompt_lengths": [len(f"q{idx}")]} for idx in range(num_examples)]
+
+
+def read_jsonl(path: str) -> List[Dict]:
+    if path.endswith(".gz"):
+        with gzip.open(path, 'rt', encoding='utf-8') as jfile:
+            return [json.loads(line) for line in jfile]
+    if path.endswith(".zst"):
+        with open(path, 'rb') as raw_file:
+            data = zstandard.ZstdDecompressor().stream_reader(raw_file).read()
+        return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    with open(path, encoding='utf-8') as jfile:
+        return [json.loads(line) for line in jfile]
+
+
+def encode_with_json(example: Dict) -> bytes:
+    return json.dumps(example, ensure_ascii=False).encode("utf-8")
+
+
+class TestJsonlWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.examples = [dict(example, system_prompt="système 漢字") for example in make_dialogs(250)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write(self, name: str, **kwargs) -> str:
+        with JsonlWriter(os.path.join(self.tmp_dir, name), batch_size=16, **kwargs) as writer:
+            writer.write_many(self.examples)
+        self.assertEqual(writer.num_written, len(self.examples))
+        return writer.path
+
+    def test_round_trip(self):
+        compressions = [None, "gzip"] + (["zstd"] if zstandard is not None else [])
+        for compression in compressions:
+            for options in [{}, {"encoder": encode_with_json}, {"num_encode_workers": 2}]:
+                path = self.write(f"out_{compression}_{len(options)}.json", compression=compression, **options)
+                self.assertEqual(read_jsonl(path), self.examples, f"{compression}, {options}")
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            path = self.write("shared_executor.json", compression="gzip", encode_executor=executor)
+        self.assertTrue(path.endswith(".json.gz"))
+        self.assertEqual(read_jsonl(path), self.examples)
+
+    def test_encoders_agree(self):
+        for example in self.examples[:3]:
+            self.assertEqual(json.loads(encode_json(example)), json.loads(encode_with_json(example)))
+        if orjson is not None:
+            # Same text as json.dumps, without the separator spaces
+            self.assertEqual(encode_json({"a": [1, "é"]}), b'{"a":[1,"\xc3\xa9"]}')
+
+    def test_copy_examples(self):
+        for copy_examples in [False, True]:
+            path = os.path.join(self.tmp_dir, f"copy_{copy_examples}.json")
+            example = make_dialogs(1)[0]
+            with JsonlWriter(path, copy_examples=copy_examples) as writer:
+                writer.write(example)
+                example["user_prompts"][0] = "changed"
+            self.assertEqual(read_jsonl(path)[0]["user_prompts"], ["q0"] if copy_examples else ["changed"])
+
+    @unittest.skipIf(datasets is None, "datasets is not installed")
+    def test_load_dataset(self):
+        for compression in [None, "gzip"]:
+            path = self.write(f"dataset_{compression}.json", compression=compression)
+            dataset = datasets.load_dataset("json", data_files=path, split="train",
+                                            cache_dir=os.path.join(self.tmp_dir, "cache"))
+            self.assertEqual(dataset.to_list(), self.examples)
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestShardedTableWriter(unittest.TestCase):
+
+    def test_config_to_arrow_schema(self):
+        self.assertEqual(config_to_arrow_schema(DialogsConfig),
+                         {"qas_id": pa.string(), "system_prompt": pa.string(),
+                          "user_prompts": pa.list_(pa.string()), "agent_responses": pa.list_(pa.string()),
+                          "answer_lengths": pa.list_(pa.int64()), "prompt_lengths": pa.list_(pa.int64())})
+        self.assertEqual(config_to_arrow_schema(KTOConfig)["label"], pa.bool_())
+        self.assertEqual(annotation_to_arrow_type(Optional[float]), pa.float64())
+        self.assertEqual(annotation_to_arrow_type(List[List[int]]), pa.list_(pa.list_(pa.int64())))
+        # Left to inference
+        self.assertIsNone(annotation_to_arrow_type(Dict[str, int]))
+        self.assertIsNone(annotation_to_arrow_type(List[Dict]))
+
+    def test_shard_rollover_and_manifest(self):
+        examples = make_dialogs(25)
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, "dialogs")
+            writer = ShardedTableWriter(path, DialogsConfig, rows_per_shard=10)
+            writer.write_many(examples[:15])
+            # The full shard is listed while the run goes on
+            with open(os.path.join(path, "manifest.json"), encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+            self.assertFalse(manifest["complete"])
+            self.assertEqual(manifest["shards"], [{"file": "shard-00000.parquet", "num_rows": 10}])
+
+            writer.write_many(examples[15:])
+            writer.close()
+            with open(os.path.join(path, "manifest.json"), encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+            self.assertTrue(manifest["complete"])
+            self.assertEqual(manifest["num_rows"], 25)
+            self.assertEqual([shard["num_rows"] for shard in manifest["shards"]], [10, 10, 5])
+            self.assertEqual(manifest["schema"]["answer_lengths"], "list<item: int64>")
+            self.assertEqual(sorted(os.listdir(path)),
+                             ["manifest.json", "shard-00000.parquet", "shard-00001.parquet", "shard-00002.parquet"])
+
+            rows = [row for shard in manifest["shards"] for row in pq.read_table(os.path.join(path, shard["file"])).to_pylist()]
+            self.assertEqual(rows, examples)
+
+            # A new writer with the same path drops the shards of the previous run
+            with ShardedTableWriter(path, DialogsConfig, output_format="arrow", rows_per_shard=100) as writer:
+                writer.write_many(examples[:3])
+            self.assertEqual(sorted(os.listdir(path)), ["manifest.json", "shard-00000.arrow"])
+            with pa.memory_map(os.path.join(path, "shard-00000.arrow")) as source:
+                self.assertEqual(pa.ipc.open_stream(source).read_all().num_rows, 3)
+
+    def test_rows_are_snapshot_at_write_time(self):
+        example = make_dialogs(1)[0]
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, "dialogs")
+            with ShardedTableWriter(path, DialogsConfig, copy_examples=True) as writer:
+                writer.write(example)
+                # Translated in place after being written, as the streaming parser does
+                example["user_prompts"][0] = "translated"
+                example["system_prompt"] = "translated"
+            rows = pq.read_table(os.path.join(path, "shard-00000.parquet")).to_pylist()
+        self.assertEqual(rows[0]["user_prompts"], ["q0"])
+        self.assertEqual(rows[0]["system_prompt"], "sys")
+
+
+if __name__ == '__main__':
+    unittest.main()
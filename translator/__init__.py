@@ -1,3 +1,4 @@
 from .data_parser import DataParser
+from .readers import JsonlReader, iter_json_array
 from .callbacks import *
 from .utils import *
\ No newline at end of file
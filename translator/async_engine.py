@@ -0,0 +1,130 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Union
+
+from tqdm.auto import tqdm
+
+from providers import Provider
+from providers.utils import get_metrics_registry
+from .utils import backoff_delay
+
+
+class AsyncTranslationEngine:
+    """
+    Translate a whole dataset on a single event loop. Every field and sub-list of every example is a coroutine and
+    one global semaphore caps the number of in-flight provider requests across all of them, so thousands of requests
+    can be scheduled with a handful of threads and a predictable memory footprint.
+    Providers without a native async client run in a thread pool sized to max_concurrent_requests. Provider instances
+    are created on demand, at most one per in-flight request, and an instance whose request raised is replaced.
+    """
+    def __init__(self,
+                 translator_factory: Callable[[], Provider],
+                 max_concurrent_requests: int = 64,
+                 max_retries: int = 3,  # Retries of a single request before it is replaced by the fail translation code
+                 retry_delay: float = 1.0,  # Base delay in seconds of the exponential backoff (with jitter) between retries
+                 num_example_workers: int = None  # Number of examples processed at once, default to max_concurrent_requests
+                 ):
+        assert max_concurrent_requests > 0, "max_concurrent_requests must be a positive integer"
+        self.translator_factory = translator_factory
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.num_example_workers = num_example_workers or max_concurrent_requests
+        self.metrics = get_metrics_registry()
+
+        # Created inside the event loop by self.run
+        self._semaphore = None
+        self._idle_translators = None
+        self.num_translators_created = 0
+
+    async def translate(self, input_data: Union[str, List[str]],
+                        src: str, dest: str,
+                        fail_translation_code: str = "P1OP1_F") -> Union[str, List[str]]:
+        """
+        Translate input_data once a request slot is free, retrying with exponential backoff on errors
+        """
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                # The semaphore bounds the number of instances in use, so at most max_concurrent_requests are created
+                if self._idle_translators:
+                    translator = self._idle_translators.pop()
+                else:
+                    translator = self.translator_factory()
+                    self.num_translators_created += 1
+                try:
+                    return await translator.translate_async(input_data, src=src, dest=dest,
+                                                            fail_translation_code=fail_translation_code)
+                except Exception as e:
+                    error = e
+                    # Like the thread backend, the next attempt gets a fresh instance (the client may be broken)
+                    translator = None
+                finally:
+                    if translator is not None:
+                        self._idle_translators.append(translator)
+
+            if attempt < self.max_retries:
+                self.metrics.inc("retries_total", stage="request")
+                # Sleep outside of the semaphore so the slot can be used by other requests
+                await asyncio.sleep(backoff_delay(attempt + 1, self.retry_delay))
+
+        tqdm.write(f"Request failed after {self.max_retries + 1} attempts with the following error: {error}")
+        self.metrics.inc("gave_up_total", stage="request")
+        if isinstance(input_data, list):
+            return [fail_translation_code] * len(input_data)
+        return fail_translation_code
+
+    def run(self, examples: List[Dict],
+            translate_example: Callable[[Dict, "AsyncTranslationEngine"], Awaitable[Dict]],
+            on_result: Callable[[int, Dict], None] = None,  # Called with (input index, translated example) as soon as an example finishes
+            on_error: Callable[[Dict, Exception], None] = None,  # Called when translate_example raised, the example is dropped
+            desc: str = "Translating converted data") -> List[Dict]:
+        """
+        Translate every example with translate_example(example, engine) and return the results in input order.
+        Called from a running event loop (Jupyter, Colab), the engine runs on a dedicated thread with its own loop
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._run(examples, translate_example, on_result, on_error, desc))
+
+        # asyncio.run can not be nested, and the caller blocks until the results are ready either way
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-engine") as runner:
+            return runner.submit(asyncio.run, self._run(examples, translate_example, on_result, on_error, desc)).result()
+
+    async def _run(self, examples: List[Dict],
+                   translate_example: Callable[[Dict, "AsyncTranslationEngine"], Awaitable[Dict]],
+                   on_result: Callable[[int, Dict], None],
+                   on_error: Callable[[Dict, Exception], None],
+                   desc: str) -> List[Dict]:
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_requests)
+        asyncio.get_running_loop().set_default_executor(executor)
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        # Only touched from the event loop thread
+        self._idle_translators = []
+
+        results = [None] * len(examples)
+        pending_examples = iter(enumerate(examples))
+        progress_bar = tqdm(total=len(examples), desc=desc, colour="#add8e6")
+
+        async def example_worker() -> None:
+            # The iterator is shared by all workers, which is safe since they all run on the same event loop
+            for idx, example in pending_examples:
+                try:
+                    results[idx] = await translate_example(example, self)
+                except Exception as e:
+                    tqdm.write(f"Example {example.get('qas_id')} failed with the following error: {e}")
+                    if on_error is not None:
+                        on_error(example, e)
+                else:
+                    if on_result is not None:
+                        on_result(idx, results[idx])
+                progress_bar.update(1)
+
+        try:
+            await asyncio.gather(*(example_worker() for _ in range(self.num_example_workers)))
+        finally:
+            progress_bar.close()
+            executor.shutdown(wait=True)
+
+        return [result for result in results if result is not None]
@@ -0,0 +1,109 @@
+import os
+import json
+import glob
+import shutil
+import threading
+from typing import Callable, List, Dict, Iterator, Set
+
+
+class TranslationCheckpoint:
+    """
+    Append-only journal of translated examples keyed by qas_id, split across shard files in checkpoint_dir.
+    Every process run opens a new shard, so a shard truncated by a crash is never appended to, a truncated
+    trailing line is simply ignored on load. qas_id must be unique across the dataset.
+    Examples for which is_failed returns True are not journaled, a resumed run translates them again.
+    """
+    def __init__(self, checkpoint_dir: str, max_examples_per_shard: int = 10000,
+                 is_failed: Callable[[Dict], bool] = None):
+        self.checkpoint_dir = checkpoint_dir
+        self.max_examples_per_shard = max_examples_per_shard
+        self.is_failed = is_failed
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._shard_file = None
+        self._shard_count = 0
+        self.completed_ids = self._load_completed_ids()
+
+    @property
+    def shard_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.checkpoint_dir, "shard_*.jsonl")))
+
+    def _iter_journal(self) -> Iterator[Dict]:
+        for shard_path in self.shard_paths:
+            with open(shard_path, encoding='utf-8') as jfile:
+                for line in jfile:
+                    try:
+                        example = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Partially written line from an interrupted run
+                        continue
+                    # Journals written before failed examples were skipped may still hold some
+                    if self.is_failed is None or not self.is_failed(example):
+                        yield example
+
+    def _load_completed_ids(self) -> Set[str]:
+        return {str(example["qas_id"]) for example in self._iter_journal()}
+
+    def _open_new_shard(self) -> None:
+        if self._shard_file is not None:
+            self._shard_file.close()
+        # Created exclusively: two processes sharing checkpoint_dir (a stalled worker and the one that took its shard
+        # over) must never append to the same file
+        shard_idx = len(self.shard_paths)
+        while True:
+            try:
+                fd = os.open(os.path.join(self.checkpoint_dir, f"shard_{shard_idx:05d}.jsonl"),
+                             os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                shard_idx += 1
+        self._shard_file = os.fdopen(fd, 'w', encoding='utf-8')
+        self._shard_count = 0
+
+    def is_completed(self, qas_id) -> bool:
+        return str(qas_id) in self.completed_ids
+
+    def filter_pending(self, examples: List[Dict]) -> List[Dict]:
+        return [example for example in examples if not self.is_completed(example["qas_id"])]
+
+    def write(self, examples: List[Dict]) -> None:
+        """
+        Append finished examples to the journal and flush them to the OS
+        """
+        with self._lock:
+            for example in examples:
+                if self.is_failed is not None and self.is_failed(example):
+                    continue
+                if self._shard_file is None or self._shard_count >= self.max_examples_per_shard:
+                    self._open_new_shard()
+                self._shard_file.write(json.dumps(example, ensure_ascii=False) + "\n")
+                self._shard_count += 1
+                self.completed_ids.add(str(example["qas_id"]))
+            if self._shard_file is not None:
+                self._shard_file.flush()
+
+    def iter_examples(self) -> Iterator[Dict]:
+        """
+        Lazily yield every journaled example, examples retried after a failed chunk are deduplicated by qas_id
+        """
+        self.close()
+        seen_ids = set()
+        for example in self._iter_journal():
+            qas_id = str(example["qas_id"])
+            if qas_id not in seen_ids:
+                seen_ids.add(qas_id)
+                yield example
+
+    def load(self) -> List[Dict]:
+        return list(self.iter_examples())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._shard_file is not None:
+                self._shard_file.close()
+                self._shard_file = None
+
+    def clear(self) -> None:
+        self.close()
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
@@ -6,8 +6,8 @@ import random
 import string
 import sys
 sys.path.insert(0, r'./')
-from copy import deepcopy
 
+import asyncio
 import threading
 import warnings
 import traceback
@@ -16,22 +16,26 @@ try:
     IN_COLAB = True
 except ImportError:
     IN_COLAB = False
-from httpcore._exceptions import ConnectTimeout
-from typing import List, Dict, Union
+from typing import Any, Callable, Dict, Iterable, List, Union
 from abc import abstractmethod
 from tqdm.auto import tqdm
 
 from concurrent.futures import ThreadPoolExecutor
 
-from providers import *
+from providers import Provider, get_provider
+from providers.utils import TranslationCache, ProviderPool, get_metrics_registry
 from configs import *
 from .callbacks import *
-from .utils import force_super_call, ForceBaseCallMeta, timeit, have_internet
-from .filters import have_code, have_re_code
-
-
-if not have_internet(timeout=5):
-    raise ConnectTimeout("Please provide internet connection as this script require external api calls")
+from .checkpoint import TranslationCheckpoint
+from .pipeline import StreamingPipeline
+from .async_engine import AsyncTranslationEngine
+from .packing import RequestPacker
+from .segmenter import segment_text, split_surrounding_whitespace
+from .dedup import Deduplicator, DedupPlan
+from .distributed import ShardCoordinator, claim_marker, partition
+from .writers import JsonlWriter, ShardedTableWriter
+from .utils import force_super_call, ForceBaseCallMeta, timeit, RetryScheduler, ReorderBuffer, CPUPool
+from .filters import have_code, have_code_batch, have_re_code
 
 
 class DataParser(metaclass=ForceBaseCallMeta):
@@ -44,15 +48,59 @@ class DataParser(metaclass=ForceBaseCallMeta):
                  enable_sub_task_thread: bool = True,  # Enable splitting a large list into sublist if a list of one example is too large to process
                                                        # This argument go with max_list_length_per_thread
                  no_translated_code: bool = False,
+                 code_filter_num_proc: int = 1,  # Number of processes scoring the examples for code when no_translated_code is set
+                 dedup: str = None,  # None, "fanout" to translate each duplicate cluster once and copy the translation to its
+                                     # members, or "drop" to only keep the first example of every cluster
+                 dedup_near_duplicates: bool = False,  # Also cluster near duplicates (MinHash/LSH over the target fields)
+                 dedup_threshold: float = 0.85,  # Minimum estimated Jaccard similarity of two near duplicates
                  max_example_per_thread: int = 400,  # How many examples, each thread can contain
                  large_chunks_threshold: int = 20000,  # Maximum number of examples that will be distributed evenly across threads, any examples exceed this threshold will be process in queue
                  max_list_length_per_thread: int = 3,  # Maximum number of strings contain in a list in a single thread.
                                                        # if larger, split the list into sub-list and process in parallel
-                 translator: Provider = GoogleProvider,
+                 translator: Union[Provider, str] = "GoogleProvider",  # Provider class, or a name resolved (and imported) on first use
+                                                                      # by providers.get_provider, e.g. "google" or "module:Class"
+                 translation_cache: Union[str, TranslationCache] = None,  # Path to a SQLite translation cache (or a TranslationCache instance)
+                                                                          # shared by every translator instance, None to disable caching
                  source_lang: str = "en",
-                 target_lang: str = "vi",
+                 target_lang: Union[str, List[str]] = "vi",  # A language or a list of languages, parsing and filtering are shared
+                                                             # and every language gets its own output file
                  fail_translation_code: str="P1OP1_F",  # Fail code for *expected* fail translation and can be removed
                                                         # post-translation,
+                 enable_checkpoint: bool = False,  # Journal translated examples to output_dir so an interrupted run can resume
+                                                   # where it stopped, examples are keyed by qas_id which must be unique
+                 streaming: bool = False,  # Stream examples from read/convert (which may then assign generators to self.data_read
+                                           # and self.converted_data) through bounded queues to the output files
+                 stream_queue_size: int = 1000,  # Maximum number of examples buffered between each streaming stage
+                 stream_num_workers: int = 16,  # Number of translation threads in streaming mode
+                 translation_backend: str = "thread",  # "thread" for the nested thread pools or "async" for a single event loop
+                                                       # where max_concurrent_requests caps the in-flight requests
+                 max_concurrent_requests: int = 64,  # Maximum number of in-flight provider requests with the "async" backend
+                 max_text_chars: int = 15000,  # Texts longer than this are split on paragraph/sentence boundaries into segments
+                                               # that are translated in parallel and stitched back in order
+                 pack_requests: bool = False,  # Pack the strings of many examples into provider sized batches (thread backend,
+                                               # with streaming the fields of each example), instead of one request per field
+                 max_batch_chars: int = 4500,  # Maximum number of characters in one packed request
+                 max_batch_items: int = 64,  # Maximum number of strings in one packed request
+                 max_retries: int = 5,  # Retry budget of a failed chunk, sub-list or request, its examples are dropped once spent
+                 retry_base_delay: float = 1.0,  # Base delay in seconds of the exponential backoff (with jitter) between retries
+                 output_compression: str = None,  # None, "gzip" or "zstd" (requires zstandard) compression of the output files
+                 num_encode_workers: int = 0,  # Processes encoding the output JSON lines, 0 to encode on the writer thread
+                 num_proc: int = 1,  # Processes shared by the CPU bound stages (self.map_examples in convert, code filter and
+                                     # JSON encoding when code_filter_num_proc/num_encode_workers are not set), None for one per
+                                     # core. The network threads stay in this process
+                 output_format: str = "jsonl",  # "jsonl" for a line-delimited JSON file, "parquet" or "arrow" for a directory of
+                                                # shards with a manifest.json, written as soon as each shard is full
+                 rows_per_shard: int = 100000,  # Number of examples per shard with the "parquet" and "arrow" output formats
+                 metrics_dir: str = None,  # Directory receiving the Prometheus textfile metrics.prom of the translation, refreshed
+                                           # every metrics_interval seconds, and its JSON run summary metrics_summary.json
+                 metrics_port: int = None,  # Serve the Prometheus metrics on http://127.0.0.1:<metrics_port>/metrics during the translation
+                 metrics_interval: float = 15.0,  # Seconds between two refreshes of metrics.prom
+                 num_shards: int = None,  # Distributed translation: split the examples into num_shards deterministic shards that the
+                                          # workers (processes or hosts running the same parser) claim through lock files in shard_dir
+                 shard_dir: str = None,  # Directory shared by the workers (e.g. NFS), the merging worker leaves a DONE marker
+                                         # there so that late workers skip the finished job, use a new (or empty) shard_dir to run it again
+                 shard_strategy: str = "hash",  # "hash" of qas_id or contiguous index "range"
+                 shard_lock_timeout: float = 600.0,  # Seconds without heartbeat after which the shard of a dead worker is taken over
                  parser_callbacks: List[ParserCallback] = None  # Callback function to be called after translation
                  ) -> None:
 
@@ -68,12 +116,27 @@ class DataParser(metaclass=ForceBaseCallMeta):
 
         self.do_translate = do_translate
         self.parser_callbacks = parser_callbacks
+        self.streaming = streaming
+        self.stream_queue_size = stream_queue_size
+        self.stream_num_workers = stream_num_workers
+        self.output_compression = output_compression
+        self.num_encode_workers = num_encode_workers
+        self.cpu_pool = CPUPool(num_proc=num_proc)
+        assert output_format in ["jsonl", "parquet", "arrow"], \
+            f"Invalid output format {output_format}, choose from ['jsonl', 'parquet', 'arrow']"
+        self.output_format = output_format
+        self.rows_per_shard = rows_per_shard
 
         if self.do_translate:
             self.fail_translation_code = fail_translation_code
             self.enable_sub_task_thread = enable_sub_task_thread
             self.source_lang = source_lang
-            self.target_lang = target_lang
+            self.target_langs = [target_lang] if isinstance(target_lang, str) else list(target_lang)
+            assert self.target_langs, "Please specify at least one target language"
+            assert not (len(self.target_langs) > 1 and streaming), \
+                "Multiple target languages are not supported with streaming, run one streaming parser per language"
+            # The language being translated, the first one until save goes through the list
+            self.target_lang = self.target_langs[0]
             assert target_fields, f"Please specified target fields to be translate from the {self.target_config} config"
             self.target_fields = target_fields
             assert set(self.target_fields).issubset(set(self.target_config.get_keys())), \
@@ -86,6 +149,13 @@ class DataParser(metaclass=ForceBaseCallMeta):
                     f"Invalid target field type to be translated, the field {key} must be either string or list of string, but got {target_type_hints[key].__name__}"
 
             self.no_translated_code = no_translated_code
+            self.code_filter_num_proc = code_filter_num_proc
+            assert dedup in [None, "fanout", "drop"], f"Invalid dedup mode {dedup}, choose from [None, 'fanout', 'drop']"
+            assert not (dedup and streaming), "Deduplication needs the whole dataset and is not supported with streaming"
+            self.dedup = dedup
+            self.dedup_near_duplicates = dedup_near_duplicates
+            self.dedup_threshold = dedup_threshold
+            self.dedup_plan = None
             assert max_example_per_thread < large_chunks_threshold, \
                 " Large chunks threshold can't be smaller than max_example per thread!"
             self.max_example_per_thread = max_example_per_thread
@@ -94,8 +164,43 @@ class DataParser(metaclass=ForceBaseCallMeta):
                 self.max_list_length_per_thread = max_list_length_per_thread
 
             self.converted_data_translated = None
-
-            self.translator = translator
+            self.enable_checkpoint = enable_checkpoint
+            self.checkpoint = None
+
+            assert translation_backend in ["thread", "async"], \
+                f"Invalid translation backend {translation_backend}, choose from ['thread', 'async']"
+            self.translation_backend = translation_backend
+            self.max_concurrent_requests = max_concurrent_requests
+            self.max_retries = max_retries
+            self.retry_base_delay = retry_base_delay
+            self.max_text_chars = max_text_chars
+            assert not (pack_requests and translation_backend == "async"), \
+                "Request packing is not supported with the async backend, which already sends the requests concurrently"
+            self.request_packer = RequestPacker(max_batch_chars=max_batch_chars,
+                                                max_batch_items=max_batch_items) if pack_requests else None
+
+            self.translator = get_provider(translator)
+            self.translation_cache = TranslationCache(translation_cache) \
+                if isinstance(translation_cache, str) else translation_cache
+            # Provider clients (and their keep-alive sessions) are reused per thread instead of rebuilt per chunk
+            self.provider_pool = ProviderPool(self.__create_translator)
+
+            # Shared with the providers, the retry loops and the @timeit stages
+            self.metrics = get_metrics_registry()
+            self.metrics_dir = metrics_dir
+            self.metrics_port = metrics_port
+            self.metrics_interval = metrics_interval
+
+            assert not num_shards or shard_dir, "Please provide the shard_dir shared by the workers"
+            assert not (num_shards and streaming), "Distributed translation is not supported with streaming"
+            assert shard_strategy in ["hash", "range"], f"Invalid shard strategy {shard_strategy}, choose from ['hash', 'range']"
+            self.num_shards = num_shards
+            self.shard_dir = shard_dir
+            self.shard_strategy = shard_strategy
+            self.shard_lock_timeout = shard_lock_timeout
+            if self.num_shards:
+                os.makedirs(self.shard_dir, exist_ok=True)
+            self.__stop_metrics_exporters = []
 
         if self.parser_callbacks:
             if not isinstance(self.parser_callbacks, list):
@@ -108,7 +213,46 @@ class DataParser(metaclass=ForceBaseCallMeta):
 
     @property
     def get_translator(self) -> Provider:
-        return deepcopy(self.translator)()
+        return self.provider_pool.get()
+
+    def __start_metrics(self) -> None:
+        '''
+        Reset the metrics registry for the translation run and start its exporters
+        '''
+        self.metrics.reset()
+        self.__stop_metrics_exporters = []
+        if self.metrics_dir is not None:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            stop_event = self.metrics.start_textfile_writer(os.path.join(self.metrics_dir, "metrics.prom"),
+                                                            interval=self.metrics_interval)
+            self.__stop_metrics_exporters.append(stop_event.set)
+        if self.metrics_port is not None:
+            server = self.metrics.serve(self.metrics_port)
+            print(f"\nServing translation metrics on http://127.0.0.1:{self.metrics_port}/metrics\n")
+            self.__stop_metrics_exporters.append(server.stop)
+
+    def __finish_metrics(self) -> None:
+        '''
+        Print the per provider summary of the translation run, save it to metrics_dir and stop the exporters
+        '''
+        summary = self.metrics.summary()
+        for provider, stats in summary["providers"].items():
+            print(f"\nProvider {provider}: {stats['requests']} requests ({stats['errors']} errors, {stats['throttled']} throttled), "
+                  f"{stats['characters_per_second']} chars/s, latency p50 {stats['latency_seconds']['p50']}s "
+                  f"p99 {stats['latency_seconds']['p99']}s, max in flight {stats['max_in_flight']}")
+        if summary["retries"] or summary["gave_up"]:
+            print(f"\nRetries: {summary['retries']}, gave up: {summary['gave_up']}")
+        if self.metrics_dir is not None:
+            self.metrics.write_summary(os.path.join(self.metrics_dir, "metrics_summary.json"))
+        for stop_exporter in self.__stop_metrics_exporters:
+            stop_exporter()
+        self.__stop_metrics_exporters = []
+
+    def __create_translator(self) -> Provider:
+        translator = self.translator()
+        if self.translation_cache is not None:
+            translator.cache = self.translation_cache
+        return translator
 
     @staticmethod
     def id_generator(size=6, chars=string.ascii_uppercase + string.digits) -> str:
@@ -126,43 +270,79 @@ class DataParser(metaclass=ForceBaseCallMeta):
                                 f"  or fill in the missing field"
         return True
 
+    def should_translate(self, example: Dict) -> bool:
+        '''
+        Pre-translation filter for a single example, False if the example must not be translated
+        '''
+        if self.no_translated_code:
+            for key in self.target_fields:
+                contain_code, score, found_elements = have_code(example[key])
+                if contain_code:
+                    return False
+        return True
+
+    def is_translation_failed(self, example: Dict) -> bool:
+        '''
+        Post-translation filter for a single example, True if any target field contains the fail translation code
+        '''
+        for key in self.target_fields:
+            if have_re_code(example[key], code=self.fail_translation_code):
+                return True
+        return False
+
     @timeit
     def pre_translate_validate(self) -> None:
         validated_translate_data = []
         # Note: This validates will override the original self.converted_data
-        for idx, example in enumerate(tqdm(self.converted_data, desc="Validating data for translation:")):
-            for key in self.target_fields:
-                if self.no_translated_code:
-                    example_filters = 0
-                    contain_code, score, found_elements = have_code(example[key])
-                    if contain_code:
-                        example_filters += 1
-                        if len(self.converted_data) - 2 == idx:
-                            tqdm.write(f"Number of example with code: {example_filters}")
-                        break
-                    elif key == self.target_fields[-1]:
-                        validated_translate_data.append(example)
-                else:
-                    if key == self.target_fields[-1]: validated_translate_data.append(example)
+        if self.no_translated_code:
+            # Score every target field of every example in one batch, the scan is CPU bound
+            fields = [example[key] for example in self.converted_data for key in self.target_fields]
+            executor = self.cpu_pool.executor if self.cpu_pool.enabled and self.code_filter_num_proc <= 1 else None
+            contain_code = [result[0] for result in have_code_batch(fields, num_proc=self.code_filter_num_proc,
+                                                                    executor=executor)]
+            num_fields = len(self.target_fields)
+            for idx, example in enumerate(tqdm(self.converted_data, desc="Validating data for translation:")):
+                if not any(contain_code[idx * num_fields:(idx + 1) * num_fields]):
+                    validated_translate_data.append(example)
+        else:
+            validated_translate_data = list(self.converted_data)
 
+        if self.no_translated_code:
+            tqdm.write(f"Number of example with code: {len(self.converted_data) - len(validated_translate_data)}")
         print(f"\nTotal data left after filtering for translation: {len(validated_translate_data)}\n")
         self.converted_data = validated_translate_data
 
+    @timeit
+    def dedup_translate_data(self) -> None:
+        '''
+        Cluster the exact (and optionally near) duplicates of self.converted_data on the target fields so that only
+        the first example of every cluster is translated, the plan is kept in self.dedup_plan to fan the translations
+        out after translate_converted
+        '''
+        deduplicator = Deduplicator(self.target_fields,
+                                    near_duplicates=self.dedup_near_duplicates,
+                                    threshold=self.dedup_threshold)
+        clusters = deduplicator.cluster(self.converted_data)
+        self.dedup_plan = DedupPlan(self.converted_data, clusters, self.target_fields, mode=self.dedup)
+        self.converted_data = self.dedup_plan.representatives
+
+        report = self.dedup_plan.report()
+        tqdm.write(f"Number of duplicate examples: {report['duplicates']} in {report['clusters']} clusters, "
+                   f"{report['characters_saved']} characters ({report['saved_ratio']:.2%}) not sent for translation")
+        print(f"\nTotal data left after deduplication: {len(self.converted_data)}\n")
+
     @timeit
     def post_translate_validate(self) -> None:
         post_validated_translate_data = []
         # Note: This validates will override the original self.converted_data_translated
-        for idx, example in enumerate(tqdm(self.converted_data_translated, desc="Validating data after translation:")):
-            for key in self.target_fields:
-                example_filters = 0
-                if have_re_code(example[key], code=self.fail_translation_code):
-                    example_filters += 1
-                    if len(self.converted_data_translated) - 2 == idx:
-                        tqdm.write(f"Number of example with fail code: {example_filters}")
-                    break
-                elif key == self.target_fields[-1]:
-                    post_validated_translate_data.append(example)
-
+        for example in tqdm(self.converted_data_translated, desc="Validating data after translation:"):
+            if not self.is_translation_failed(example):
+                post_validated_translate_data.append(example)
+
+        num_failed = len(self.converted_data_translated) - len(post_validated_translate_data)
+        tqdm.write(f"Number of example with fail code: {num_failed}")
+        self.metrics.inc("examples_total", num_failed, status="failed")
+        self.metrics.inc("examples_total", len(post_validated_translate_data), status="translated")
         print(f"\nTotal data left after filtering fail translation: {len(post_validated_translate_data)}\n")
         self.converted_data_translated = post_validated_translate_data
 
@@ -176,37 +356,204 @@ class DataParser(metaclass=ForceBaseCallMeta):
         keys = self.target_config.get_keys()
         for key in keys:
             if key in self.target_fields:
-                type = "str" if isinstance(example[key], str) else "list"
                 if example[key] == "" or example[key] is None:
                     continue
-                if type == "list":
-                    for data in example[key]:
-                        if len(data) > 15000:
-                            warnings.warn("Example" + example["qas_id"] + " have field len larger than 15000")
-                            example[key].append(data[:15000])
-                else:
-                    if len(example[key]) > 15000:
-                        warnings.warn("Example" + example["qas_id"] + " have field len larger than 15000")
-                        example[key] = example[key][:15000]
-
-                if self.enable_sub_task_thread:
-                    average_length_sub_task_criteria = False
-                    if type == "list" and len(example[key]) > 2:
-                        average_length = sum(len(lst) for lst in example[key]) / len(example[key])
-                        if average_length > 1600: average_length_sub_task_criteria = True
-                    if type == "list" and average_length_sub_task_criteria and len(example[key]) >= self.max_list_length_per_thread:
-                        # tqdm.write(f"\nSplitting {key} field which contain {len(example[key])} items on chunk {progress_idx}\n")
-                        del translator
-                        example[key] = self.__sublist_multithread_translate(example[key],
-                                                                            progress_idx,
-                                                                            key)
-                    else:
-                        example[key] = self.__translate_texts(src_texts=example[key], translator=translator)
+
+                if self.__needs_sub_task(example[key]):
+                    # tqdm.write(f"\nSplitting {key} field which contain {len(example[key])} items on chunk {progress_idx}\n")
+                    example[key] = self.__sublist_multithread_translate(example[key],
+                                                                        progress_idx,
+                                                                        key)
                 else:
                     example[key] = self.__translate_texts(src_texts=example[key], translator=translator)
 
         return example
 
+    def __translate_packed(self, examples: List[Dict], translator: Provider = None, desc: str = None) -> List[Dict]:
+        '''
+        Translate the target fields of many examples at once, short strings of different examples are packed
+        into the same request by self.request_packer and scattered back to their example once every batch is
+        translated, so a failed batch leaves the examples untouched for the retry
+        '''
+        translator = translator if translator else self.get_translator
+        batches = self.request_packer.pack(examples, self.target_fields)
+        batches_translated = []
+        for batch in tqdm(batches, desc=desc, colour="#add8e6", disable=desc is None):
+            texts = [self.request_packer.get_text(examples, slot) for slot in batch]
+            if len(texts) == 1 and len(texts[0]) > self.max_text_chars:
+                # A text larger than max_batch_chars is always packed alone
+                translated_texts = [self.__translate_long_text(texts[0])]
+            else:
+                try:
+                    translated_texts = self.request_packer.translate_batch(texts, translator,
+                                                                           src=self.source_lang,
+                                                                           dest=self.target_lang,
+                                                                           fail_translation_code=self.fail_translation_code)
+                except Exception:
+                    # The retry gets a fresh Translator instance
+                    self.provider_pool.discard(translator)
+                    raise
+            batches_translated.append(translated_texts)
+
+        for batch, translated_texts in zip(batches, batches_translated):
+            for slot, translated_text in zip(batch, translated_texts):
+                self.request_packer.set_text(examples, slot, translated_text)
+
+        return examples
+
+    def __needs_sub_task(self, texts: Union[List[str], str]) -> bool:
+        '''
+        Whether a list field is large enough to be split into sub-lists that are translated in parallel
+        '''
+        if not self.enable_sub_task_thread or not isinstance(texts, list) or len(texts) <= 2:
+            return False
+        average_length = sum(len(text) for text in texts) / len(texts)
+        return average_length > 1600 and len(texts) >= self.max_list_length_per_thread
+
+    def __translate_long_text(self, text: str) -> str:
+        '''
+        Translate a text longer than max_text_chars, the text is split on paragraph/sentence boundaries (code fences
+        are kept whole) into segments that are translated in parallel and stitched back in order
+        '''
+        segments = segment_text(text, max_chars=self.max_text_chars)
+        translated_segments = [None] * len(segments)
+
+        def translate_segment(segment: str) -> str:
+            leading, content, trailing = split_surrounding_whitespace(segment)
+            if not content:
+                return segment
+            # Each segment uses the pooled Translator instance of its thread
+            translator = self.get_translator
+            try:
+                return leading + translator.translate(content,
+                                                      src=self.source_lang,
+                                                      dest=self.target_lang,
+                                                      fail_translation_code=self.fail_translation_code) + trailing
+            except Exception:
+                self.provider_pool.discard(translator)
+                raise
+
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+
+            def callback_segment_done(idx, result):
+                translated_segments[idx] = result
+
+            def give_up_segment(idx, error):
+                tqdm.write(f"Segment {idx} of a {len(text)} characters text failed after {self.max_retries} retries,"
+                           f" the example will be removed post translation")
+                translated_segments[idx] = self.fail_translation_code
+
+            scheduler = RetryScheduler(executor,
+                                       max_retries=self.max_retries,
+                                       base_delay=self.retry_base_delay,
+                                       on_give_up=give_up_segment,
+                                       stage="segment")
+            scheduler.run([lambda segment=segment: translate_segment(segment) for segment in segments],
+                          on_success=callback_segment_done)
+
+        return "".join(translated_segments)
+
+    async def __atranslate_long_text(self, text: str, engine: AsyncTranslationEngine) -> str:
+        '''
+        Async counterpart of __translate_long_text
+        '''
+
+        async def translate_segment(segment: str) -> str:
+            leading, content, trailing = split_surrounding_whitespace(segment)
+            if not content:
+                return segment
+            return leading + await engine.translate(content,
+                                                    src=self.source_lang,
+                                                    dest=self.target_lang,
+                                                    fail_translation_code=self.fail_translation_code) + trailing
+
+        translated_segments = await asyncio.gather(*(translate_segment(segment)
+                                                     for segment in segment_text(text, max_chars=self.max_text_chars)))
+        return "".join(translated_segments)
+
+    async def __atranslate_texts(self, src_texts: Union[List[str], str], engine: AsyncTranslationEngine) -> Union[List[str], str]:
+        '''
+        Async counterpart of __translate_texts
+        '''
+        if isinstance(src_texts, str):
+            if len(src_texts) > self.max_text_chars:
+                return await self.__atranslate_long_text(src_texts, engine)
+            return await engine.translate(src_texts,
+                                          src=self.source_lang,
+                                          dest=self.target_lang,
+                                          fail_translation_code=self.fail_translation_code)
+
+        short_texts = [text for text in src_texts if len(text) <= self.max_text_chars]
+        translated_short_texts = await engine.translate(short_texts,
+                                                        src=self.source_lang,
+                                                        dest=self.target_lang,
+                                                        fail_translation_code=self.fail_translation_code)
+        if len(short_texts) == len(src_texts):
+            return translated_short_texts
+
+        translated_long_texts = await asyncio.gather(*(self.__atranslate_long_text(text, engine)
+                                                       for text in src_texts if len(text) > self.max_text_chars))
+        return self.__merge_long_texts(src_texts, translated_short_texts, translated_long_texts)
+
+    def __merge_long_texts(self, src_texts: List[str],
+                           translated_short_texts: List[str],
+                           translated_long_texts: List[str]) -> List[str]:
+        '''
+        Put the translations of the short and the long (segmented) texts of a list back in the order of src_texts
+        '''
+        num_short_texts = sum(1 for text in src_texts if len(text) <= self.max_text_chars)
+        # Some providers return a fixed size list of fail codes on unavoidable errors
+        if len(translated_short_texts) != num_short_texts:
+            translated_short_texts = [self.fail_translation_code] * num_short_texts
+
+        translated_short_texts, translated_long_texts = iter(translated_short_texts), iter(translated_long_texts)
+        return [next(translated_long_texts) if len(text) > self.max_text_chars else next(translated_short_texts)
+                for text in src_texts]
+
+    async def __atranslate_per_key(self, example: Dict, engine: AsyncTranslationEngine) -> Dict:
+        '''
+        Async counterpart of __translate_per_key, every target field is translated concurrently and large lists are
+        split into sub-lists of max_list_length_per_thread, the engine semaphore bounds the actual number of requests
+        '''
+
+        async def translate_field(key: str) -> None:
+            if example[key] == "" or example[key] is None:
+                return None
+
+            if self.__needs_sub_task(example[key]):
+                sub_str_lists = self.split_list(example[key], max_sub_length=self.max_list_length_per_thread)
+                translated_sub_lists = await asyncio.gather(*(self.__atranslate_texts(sub_str_list, engine)
+                                                              for sub_str_list in sub_str_lists))
+                # gather keeps the order of the sub-lists
+                example[key] = [text for sub_list in translated_sub_lists for text in sub_list]
+            else:
+                example[key] = await self.__atranslate_texts(example[key], engine)
+
+        await asyncio.gather(*(translate_field(key) for key in self.target_fields))
+        return example
+
+    def __translate_converted_async(self, converted_data: List[Dict]) -> List[Dict]:
+        '''
+        Translate converted_data on a single event loop with at most self.max_concurrent_requests in-flight requests
+        '''
+        # The engine keeps its own pool of instances, shared by the threads of its executor
+        engine = AsyncTranslationEngine(self.__create_translator,
+                                        max_concurrent_requests=self.max_concurrent_requests,
+                                        max_retries=self.max_retries,
+                                        retry_delay=self.retry_base_delay)
+
+        def on_result(idx: int, example: Dict) -> None:
+            if self.checkpoint is not None:
+                self.checkpoint.write([example])
+
+        def on_error(example: Dict, error: Exception) -> None:
+            if self.parser_callbacks:
+                for callback in self.parser_callbacks:
+                    callback.on_error_translate(self, error)
+
+        return engine.run(converted_data, self.__atranslate_per_key,
+                          on_result=on_result, on_error=on_error)
+
     def __sublist_multithread_translate(self,
                                        list_str: List[str],
                                        progress_idx: int = 0,
@@ -217,63 +564,35 @@ class DataParser(metaclass=ForceBaseCallMeta):
         sub-lists, this is useful when order are necessary (e.g Dialogs example)
         '''
 
-        translated_list_data = []
-        num_threads = len(list_str) / self.max_list_length_per_thread
         sub_str_lists = self.split_list(list_str, max_sub_length=self.max_list_length_per_thread)
-        with ThreadPoolExecutor(max_workers=num_threads) as executor:
-            futures = []
-            finished_task = 0
-            lock = threading.RLock()
-
-            def callback_sub_list_done(future):
-                nonlocal translated_list_data
-                nonlocal finished_task
-                nonlocal lock
-                if not future.exception():
-                    with lock:
-                        # This need to be .append to keep the list structure
-                        # Since this deal with sub-list and needed to be merged later
-                        translated_list_data.append(future.result())
-                        finished_task += 1
-                else:
-                    tqdm.write(f"Sub task of chunk {progress_idx} with field {field_name} failed with the following error: {future.exception()}."
-                               f"Restarting thread when others finished...")
-                pass
-
-            for idx, list_chunk in enumerate(sub_str_lists):
-                # Assign each thread with a new Translator instance
-                future_chunk = executor.submit(self.__translate_texts,
-                                               src_texts=list_chunk,
-                                               translator=self.get_translator,
-                                               sub_list_idx=idx)
-                future_chunk.add_done_callback(callback_sub_list_done)
-                future_dict = {
-                    "future": future_chunk,
-                    "idx": idx
-                }
-                futures.append(future_dict)
-
-            # Wait for all threads to complete
-            while finished_task < len(futures):
-                for future_dict in futures:
-                    # If exception occurs in one of the thread, restart the thread with its specific chunk
-                    if future_dict['future'].exception():
-                        tqdm.write(
-                            f"Thread {future_dict['idx']} failed, restarting thread with chunk {future_dict['idx']}")
-                        backup_future_chunk = executor.submit(self.__translate_texts,
-                                                              src_texts=sub_str_lists[future_dict['idx']],
-                                                              translator=self.get_translator,
-                                                              sub_list_idx=future_dict['idx'])
-                        backup_future_chunk.add_done_callback(callback_sub_list_done)
-                        backup_future_dict = {"future": backup_future_chunk,
-                                              "idx": future_dict['idx']}
-                        futures[future_dict['idx']] = backup_future_dict
-                        continue
-
-            # Sorting the list of dictionaries based on the 'key' value
-            translated_list_data = sorted(translated_list_data, key=lambda x: x['key'])
-            # Extracting values after sorting
-            translated_list_data = [item['text_list'] for item in translated_list_data]
+        # Results are stored by sub-list index so that the order is maintained when merging
+        translated_list_data = [None] * len(sub_str_lists)
+        with ThreadPoolExecutor(max_workers=len(sub_str_lists)) as executor:
+
+            def callback_sub_list_done(idx, result):
+                translated_list_data[idx] = result['text_list']
+
+            def retry_sub_list(idx, error, delay):
+                tqdm.write(f"Sub task {idx} of chunk {progress_idx} with field {field_name} failed with the following error: {error}."
+                           f" Retrying in {delay:.1f}s...")
+
+            def give_up_sub_list(idx, error):
+                tqdm.write(f"Sub task {idx} of chunk {progress_idx} with field {field_name} failed after {self.max_retries} retries,"
+                           f" the example will be removed post translation")
+                translated_list_data[idx] = [self.fail_translation_code] * len(sub_str_lists[idx])
+
+            scheduler = RetryScheduler(executor,
+                                       max_retries=self.max_retries,
+                                       base_delay=self.retry_base_delay,
+                                       on_retry=retry_sub_list,
+                                       on_give_up=give_up_sub_list,
+                                       stage="sub_list")
+            # Each attempt uses the pooled Translator instance of its worker thread
+            scheduler.run([lambda list_chunk=list_chunk, idx=idx: self.__translate_texts(src_texts=list_chunk,
+                                                                                         translator=self.get_translator,
+                                                                                         sub_list_idx=idx)
+                           for idx, list_chunk in enumerate(sub_str_lists)],
+                          on_success=callback_sub_list_done)
 
             def flatten_list(nested_list):
                 '''
@@ -303,12 +622,31 @@ class DataParser(metaclass=ForceBaseCallMeta):
 
         assert self.do_translate, "Please enable translate via self.do_translate"
         # This if is for multithread Translator instance
-        translator_instance = deepcopy(self.translator)() if not translator else translator
-
-        target_texts = translator_instance.translate(src_texts,
-                                                     src=self.source_lang,
-                                                     dest=self.target_lang,
-                                                     fail_translation_code=self.fail_translation_code)
+        translator_instance = self.get_translator if not translator else translator
+
+        try:
+            if isinstance(src_texts, str) and len(src_texts) > self.max_text_chars:
+                target_texts = self.__translate_long_text(src_texts)
+            elif isinstance(src_texts, list) and any(len(text) > self.max_text_chars for text in src_texts):
+                # Long texts are segmented on their own, the others are still translated in a single request
+                short_texts = [text for text in src_texts if len(text) <= self.max_text_chars]
+                translated_short_texts = translator_instance.translate(short_texts,
+                                                                       src=self.source_lang,
+                                                                       dest=self.target_lang,
+                                                                       fail_translation_code=self.fail_translation_code) \
+                    if short_texts else []
+                translated_long_texts = [self.__translate_long_text(text)
+                                         for text in src_texts if len(text) > self.max_text_chars]
+                target_texts = self.__merge_long_texts(src_texts, translated_short_texts, translated_long_texts)
+            else:
+                target_texts = translator_instance.translate(src_texts,
+                                                             src=self.source_lang,
+                                                             dest=self.target_lang,
+                                                             fail_translation_code=self.fail_translation_code)
+        except Exception:
+            # The retry gets a fresh Translator instance
+            self.provider_pool.discard(translator_instance)
+            raise
 
         return {'text_list': target_texts, 'key': sub_list_idx} if sub_list_idx is not None else target_texts
 
@@ -318,8 +656,8 @@ class DataParser(metaclass=ForceBaseCallMeta):
                             translator: Provider = None,
                             large_chunk: List[str] = None) -> Union[None, List[str]]:
         '''
-        This function support translation in multithread for large dataset
-        (Does not maintain order for the final dataset)
+        This function support translation in multithread for large dataset, the final dataset keeps the order of
+        the converted data
         '''
 
         assert self.converted_data is not None or en_data is not None or large_chunk is not None, \
@@ -328,11 +666,20 @@ class DataParser(metaclass=ForceBaseCallMeta):
 
         if not en_data and not large_chunk:
             converted_data = self.converted_data
+            if self.checkpoint is not None:
+                pending_data = self.checkpoint.filter_pending(converted_data)
+                tqdm.write(f"Resuming from checkpoint {self.checkpoint.checkpoint_dir}: "
+                           f"{len(converted_data) - len(pending_data)} examples already translated, {len(pending_data)} left")
+                converted_data = pending_data
         elif not en_data:
             converted_data = large_chunk
         else:
             converted_data = en_data
 
+        if self.translation_backend == "async" and not en_data and not large_chunk:
+            self.converted_data_translated = self.__translate_converted_async(converted_data)
+            return None
+
         translated_data = []
 
         # Split large data into large chunks, recursive feed to the same function
@@ -358,55 +705,34 @@ class DataParser(metaclass=ForceBaseCallMeta):
             desc = "Translating total converted large chunk data" if large_chunk else "Translating total converted data"
             progress_bar = tqdm(total=math.ceil(num_threads), desc=desc, position=math.ceil(num_threads)+1)
 
-            with ThreadPoolExecutor(max_workers=num_threads) as executor:
-                futures = []
-                finished_task = 0
-                # https://stackoverflow.com/questions/22885775/what-is-the-difference-between-lock-and-rlock#22885810
-                lock = threading.RLock()
-
-                def callback_done(future):
-                    nonlocal translated_data
-                    nonlocal finished_task
-                    nonlocal progress_bar
-                    nonlocal lock
-                    if not future.exception():
-                        with lock:
-                            # This need to be += or .extend to shallow flatten the list structure
-                            translated_data += future.result()
-                            finished_task += 1
-                            progress_bar.update(1)
-                    else:
-                        tqdm.write(f"Task failed with the following error: {future.exception()}."
-                                   f" Restarting thread when others finished")
-                        pass
-
-                for idx, chunk in enumerate(chunks):
-                    # Assign each thread with a new Translator instance
-                    future_chunk = executor.submit(self.translate_converted,
-                                                   en_data=chunk,
-                                                   desc=f"chunk {idx}",
-                                                   translator=self.get_translator)
-                    future_chunk.add_done_callback(callback_done)
-                    future_dict = {"future": future_chunk,
-                                   "idx": idx}
-                    futures.append(future_dict)
-
-                # Wait for all threads to complete
-                while finished_task < len(futures):
-                    for future_dict in futures:
-                        # If exception occurs in one of the thread, restart the thread with its specific chunk
-                        if future_dict['future'].exception():
-                            tqdm.write(
-                                f"Thread {future_dict['idx']} failed, restarting thread with chunk {future_dict['idx']}")
-                            backup_future_chunk = executor.submit(self.translate_converted,
-                                                                  en_data=chunks[future_dict['idx']],
-                                                                  desc=f"Backup chunk {future_dict['idx']}",
-                                                                  translator=self.get_translator)
-                            backup_future_chunk.add_done_callback(callback_done)
-                            backup_future_dict = {"future": backup_future_chunk,
-                                                  "idx": future_dict['idx']}
-                            futures[future_dict['idx']] = backup_future_dict
-                            continue
+            # Chunks finish in any order, their results are appended once all the previous chunks are done
+            reorder_buffer = ReorderBuffer(on_release=translated_data.extend)
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+
+                def callback_done(idx, result):
+                    reorder_buffer.push(idx, result)
+                    progress_bar.update(1)
+
+                def retry_chunk(idx, error, delay):
+                    tqdm.write(f"Chunk {idx} failed with the following error: {error}. Retrying in {delay:.1f}s...")
+
+                def give_up_chunk(idx, error):
+                    tqdm.write(f"Chunk {idx} failed after {self.max_retries} retries, its {len(chunks[idx])} examples are dropped")
+                    self.metrics.inc("examples_total", len(chunks[idx]), status="dropped")
+                    reorder_buffer.push(idx, None)
+                    if self.parser_callbacks:
+                        for callback in self.parser_callbacks:
+                            callback.on_error_translate(self, error)
+
+                scheduler = RetryScheduler(executor,
+                                           max_retries=self.max_retries,
+                                           base_delay=self.retry_base_delay,
+                                           on_retry=retry_chunk,
+                                           on_give_up=give_up_chunk,
+                                           stage="chunk")
+                scheduler.run([lambda chunk=chunk, idx=idx: self.__translate_chunk(chunk, idx)
+                               for idx, chunk in enumerate(chunks)],
+                              on_success=callback_done)
 
             if large_chunk:
                 if not self.converted_data_translated:
@@ -419,11 +745,18 @@ class DataParser(metaclass=ForceBaseCallMeta):
             return None
 
         progress_bar_desc = "Translating converted data" if not desc else f"Translating converted data {desc}"
-        for example in tqdm(converted_data, desc=progress_bar_desc, colour="#add8e6"):
-            translated_data_example = self.__translate_per_key(example,
-                                                               translator,
-                                                               progress_idx=int(re.findall(r'\d+', desc)[0]) if desc and re.findall(r'\d+', desc) else 0)
-            translated_data.append(translated_data_example)
+        if self.request_packer is not None:
+            translated_data = self.__translate_packed(converted_data, translator, desc=f"{progress_bar_desc} (packed)")
+            if self.checkpoint is not None:
+                self.checkpoint.write(translated_data)
+        else:
+            for example in tqdm(converted_data, desc=progress_bar_desc, colour="#add8e6"):
+                translated_data_example = self.__translate_per_key(example,
+                                                                   translator,
+                                                                   progress_idx=int(re.findall(r'\d+', desc)[0]) if desc and re.findall(r'\d+', desc) else 0)
+                translated_data.append(translated_data_example)
+                if self.checkpoint is not None:
+                    self.checkpoint.write([translated_data_example])
         if en_data: return translated_data
         if large_chunk:
             # Assuming that the previous large chunk process already create self.converted_data_translated
@@ -432,6 +765,29 @@ class DataParser(metaclass=ForceBaseCallMeta):
         else:
             self.converted_data_translated = translated_data
 
+    def __translate_chunk(self, chunk: List[Dict], idx: int) -> List[Dict]:
+        '''
+        One attempt at translating a chunk, on copies of its examples: a failed attempt may already have translated
+        part of the chunk in place, the retry must not translate that text again. With a checkpoint, the examples
+        journaled by a previous attempt are not sent again (the results are then read back from the journal)
+        '''
+        if self.checkpoint is not None:
+            chunk = self.checkpoint.filter_pending(chunk)
+        if not chunk:
+            return []
+        # Each attempt uses the pooled Translator instance of its worker thread
+        return self.translate_converted(en_data=[self.__copy_target_fields(example) for example in chunk],
+                                        desc=f"chunk {idx}",
+                                        translator=self.get_translator)
+
+    def map_examples(self, convert_fn: Callable[[Any], Dict], records: Iterable[Any], chunksize: int = None) -> List[Dict]:
+        '''
+        Apply convert_fn to every record in the process pool of num_proc processes, in input order, for convert
+        functions that are a per record mapping. convert_fn must be a module level function (it is pickled to the
+        workers), e.g. self.converted_data = self.map_examples(convert_record, self.data_read)
+        '''
+        return self.cpu_pool.map(convert_fn, records, chunksize=chunksize)
+
     @abstractmethod
     @force_super_call
     def convert(self) -> Union[List[Dict], None]:
@@ -463,19 +819,32 @@ class DataParser(metaclass=ForceBaseCallMeta):
             for callback in self.parser_callbacks:
                 callback.on_start_save(self)
 
-        output_path = os.path.join(self.output_dir, f"{self.parser_name}.json")
-        with open(output_path, 'w', encoding='utf-8') as jfile:
-            print(f"\n Saving {self.parser_name} to {output_path}... ")
-            for idx, data in enumerate(tqdm(self.converted_data, desc="Writing data to file")):
-                if self.validate(self.converted_data[idx].keys()):
-                    jfile.write(json.dumps(data, ensure_ascii=False) + "\n")
-            print(f"\n Total line printed: {idx + 1}")
-        
+        if self.streaming:
+            self.__save_streaming()
+            self.cpu_pool.shutdown()
+            return None
+
+        # The workers of a distributed translation share the parsed output, the first one writes it
+        output_path = None
+        if not (self.do_translate and self.num_shards) or claim_marker(self.__parsed_marker_path()):
+            writer = self.__open_writer(self.parser_name)
+            output_path = writer.path
+            with writer:
+                print(f"\n Saving {self.parser_name} to {output_path}... ")
+                validated_keys = None
+                for data in tqdm(self.converted_data, desc="Writing data to file"):
+                    # Examples almost always share the same keys, only validate a key set once
+                    if data.keys() != validated_keys:
+                        self.validate(data.keys())
+                        validated_keys = set(data.keys())
+                    writer.write(data)
+                print(f"\n Total line printed: {writer.num_written}")
+
         if self.parser_callbacks:
             for callback in self.parser_callbacks:
                 callback.on_finish_save(self)
 
-        if IN_COLAB:
+        if IN_COLAB and self.output_format == "jsonl" and output_path is not None:
             print(f"\n Downloading converted data to local machine...")
             files.download(output_path)
 
@@ -484,24 +853,262 @@ class DataParser(metaclass=ForceBaseCallMeta):
                 for callback in self.parser_callbacks:
                     callback.on_start_translate(self)
 
+            # Fail before any work rather than spending the retries of every chunk when the provider is unreachable
+            self.translator.check_health()
+            self.__start_metrics()
             self.pre_translate_validate()
+            if self.dedup:
+                self.dedup_translate_data()
+            # Parsing, filtering and deduplication are done once, every target language only adds its requests
+            validated_data = self.converted_data
+            for target_lang in self.target_langs:
+                self.target_lang = target_lang
+                if len(self.target_langs) > 1:
+                    print(f"\n Translating {self.parser_name} to {target_lang}... ")
+                    self.converted_data = [self.__copy_target_fields(example) for example in validated_data]
+                self.converted_data_translated = None
+                self.__translate_and_save()
+            self.converted_data = validated_data
+
+            if self.translation_cache is not None:
+                print(f"\nTranslation cache stats: {self.translation_cache.stats}\n")
+            if self.provider_pool.num_created:
+                print(f"\nProvider pool stats: {self.provider_pool.stats}\n")
+            self.__finish_metrics()
+        self.cpu_pool.shutdown()
+
+    def __copy_target_fields(self, example: Dict) -> Dict:
+        '''
+        Copy of an example that can be translated in place without changing the original, only the target fields are
+        copied (list fields are translated item by item)
+        '''
+        example_copy = dict(example)
+        for key in self.target_fields:
+            if isinstance(example[key], list):
+                example_copy[key] = list(example[key])
+        return example_copy
+
+    def __translate_and_save(self) -> None:
+        '''
+        Translate self.converted_data to self.target_lang and write output_dir/<parser_name>_translated_<target_lang>
+        '''
+        coordinator = None
+        if self.num_shards:
+            coordinator = self.__translate_shards()
+            if coordinator is None:
+                return None
+        else:
+            if self.enable_checkpoint:
+                self.checkpoint = TranslationCheckpoint(
+                    os.path.join(self.output_dir, f"{self.parser_name}_checkpoint_{self.target_lang}"),
+                    is_failed=self.is_translation_failed)
             self.translate_converted()
-            self.post_translate_validate()       
-            assert self.converted_data_translated is not None, "Converted data haven't been translated yet!"
-            
+            if self.checkpoint is not None:
+                # The journal also holds the examples translated by previous interrupted runs, in completion order
+                input_order = {example["qas_id"]: idx for idx, example in enumerate(self.converted_data)}
+                self.converted_data_translated = sorted(self.checkpoint.load(),
+                                                        key=lambda example: input_order.get(example["qas_id"], len(input_order)))
+        if self.dedup_plan is not None:
+            self.converted_data_translated = self.dedup_plan.fan_out(self.converted_data_translated)
+        self.post_translate_validate()
+        assert self.converted_data_translated is not None, "Converted data haven't been translated yet!"
+
+        if self.parser_callbacks:
+            for callback in self.parser_callbacks:
+                callback.on_finish_translate(self)
+
+        translated_writer = self.__open_writer(f"{self.parser_name}_translated_{self.target_lang}")
+        output_translated_path = translated_writer.path
+        with translated_writer:
+            print(f"\n Saving {self.parser_name} translated to {output_translated_path}... ")
+            translated_writer.write_many(tqdm(self.converted_data_translated, desc="Writing translated data to file"))
+            print(f"\n Total line printed: {translated_writer.num_written}")
+
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+            self.checkpoint = None
+        if coordinator is not None:
+            # Workers started after this point find the job done instead of translating it again
+            coordinator.finish()
+
+        if IN_COLAB and self.output_format == "jsonl":
+            print(f"\n Downloading converted translated data to local machine...")
+            files.download(output_translated_path)
+
+    def __parsed_marker_path(self) -> str:
+        return os.path.join(self.shard_dir, f"{self.parser_name}.parsed")
+
+    def __translate_shards(self) -> Union[ShardCoordinator, None]:
+        '''
+        Translate the shards of self.converted_data claimed by this worker until every shard is done, then on the
+        single worker that merges, gather the shard outputs into self.converted_data_translated in input order
+        :return: The coordinator if this worker merges the shards (call its finish once the output is saved), None
+                 if another worker merged them
+        '''
+        coordinator = ShardCoordinator(os.path.join(self.shard_dir, f"{self.parser_name}_translated_{self.target_lang}"),
+                                       self.num_shards, lock_timeout=self.shard_lock_timeout)
+        if coordinator.is_finished():
+            print(f"\n {self.parser_name} ({self.target_lang}) was already translated by a previous run of this job, "
+                  f"use a new shard_dir (or empty {self.shard_dir}) to translate it again\n")
+            return None
+        all_data = self.converted_data
+        input_order = {example["qas_id"]: idx for idx, example in enumerate(all_data)}
+        for shard_idx in coordinator.wait_for_shards():
+            with coordinator.hold(shard_idx):
+                tqdm.write(f"Worker {coordinator.worker_name} translating shard {shard_idx + 1}/{self.num_shards}")
+                self.converted_data = partition(all_data, self.num_shards, shard_idx, strategy=self.shard_strategy)
+                self.converted_data_translated = None
+                # Journaled in the shared directory so that a shard taken over from a dead worker resumes where it stopped
+                self.checkpoint = TranslationCheckpoint(coordinator.shard_path(shard_idx, ".checkpoint"),
+                                                        is_failed=self.is_translation_failed)
+                self.translate_converted()
+                checkpoint, self.checkpoint = self.checkpoint, None
+                if not coordinator.owns(shard_idx):
+                    # Stalled long enough for another worker to take the shard over, its output and journal are theirs
+                    tqdm.write(f"Worker {coordinator.worker_name} lost shard {shard_idx + 1}/{self.num_shards} to another worker")
+                    continue
+                shard_output_path = coordinator.shard_path(shard_idx, ".jsonl")
+                tmp_path = f"{shard_output_path}.{coordinator.worker_name}.tmp"
+                with JsonlWriter(tmp_path) as shard_writer:
+                    shard_writer.write_many(sorted(checkpoint.load(),
+                                                   key=lambda example: input_order.get(example["qas_id"], len(input_order))))
+                os.replace(tmp_path, shard_output_path)
+                coordinator.complete(shard_idx)
+                checkpoint.clear()
+        self.converted_data = all_data
+
+        if not coordinator.wait_for_merge():
+            print(f"\n Every shard of {self.parser_name} ({self.target_lang}) is done, another worker merged them\n")
+            return None
+        self.converted_data_translated = sorted(coordinator.iter_outputs(),
+                                                key=lambda example: input_order.get(example["qas_id"], len(input_order)))
+        return coordinator
+
+    def __open_writer(self, name: str, copy_examples: bool = False) -> Union[JsonlWriter, ShardedTableWriter]:
+        '''
+        Open the output file output_dir/name.json (with the compression suffix if any), or the shard directory
+        output_dir/name for the "parquet" and "arrow" output formats
+        '''
+        if self.output_format == "jsonl":
+            return JsonlWriter(os.path.join(self.output_dir, f"{name}.json"),
+                               compression=self.output_compression,
+                               num_encode_workers=self.num_encode_workers,
+                               encode_executor=self.cpu_pool.executor
+                               if self.cpu_pool.enabled and self.num_encode_workers <= 1 else None,
+                               copy_examples=copy_examples)
+        return ShardedTableWriter(os.path.join(self.output_dir, name),
+                                  self.target_config,
+                                  output_format=self.output_format,
+                                  rows_per_shard=self.rows_per_shard,
+                                  copy_examples=copy_examples)
+
+    def __save_streaming(self) -> None:
+        '''
+        Streaming counterpart of save, self.converted_data can be any iterable (e.g a generator) of examples.
+        Examples are written to the parsed file as they are read and the translated examples are appended to the
+        translated file in input order as soon as every previous example is done, so only a few queues of examples
+        are held in memory at once. With a checkpoint, the examples of previous interrupted runs come first
+        '''
+        # The translation workers receive the same example objects right after they are written
+        writer = self.__open_writer(self.parser_name, copy_examples=self.do_translate)
+        output_path = writer.path
+        print(f"\n Streaming {self.parser_name} to {output_path}... ")
+        validated_keys = None
+
+        def write_parsed(example: Dict) -> None:
+            nonlocal validated_keys
+            # Examples almost always share the same keys, only validate a key set once
+            if example.keys() != validated_keys:
+                self.validate(example.keys())
+                validated_keys = set(example.keys())
+            writer.write(example)
+
+        if not self.do_translate:
+            with writer:
+                for example in tqdm(self.converted_data, desc="Writing data to file"):
+                    write_parsed(example)
+
             if self.parser_callbacks:
                 for callback in self.parser_callbacks:
-                    callback.on_finish_translate(self)
-                    
-            output_translated_path = os.path.join(self.output_dir,
-                                                  f"{self.parser_name}_translated_{self.target_lang}.json")
-            with open(output_translated_path, 'w', encoding='utf-8') as jfile:
-                print(f"\n Saving {self.parser_name} translated to {output_translated_path}... ")
-                for idx, data in enumerate(
-                        tqdm(self.converted_data_translated, desc="Writing translated data to file")):
-                    jfile.write(json.dumps(data, ensure_ascii=False) + "\n")
-                print(f"\n Total line printed: {idx + 1}")
-
-            if IN_COLAB:
-                print(f"\n Downloading converted translated data to local machine...")
-                files.download(output_translated_path)
+                    callback.on_finish_save(self)
+
+            if IN_COLAB and self.output_format == "jsonl":
+                print(f"\n Downloading converted data to local machine...")
+                files.download(output_path)
+            return None
+
+        if self.parser_callbacks:
+            for callback in self.parser_callbacks:
+                callback.on_start_translate(self)
+
+        self.translator.check_health()
+        self.__start_metrics()
+        if self.enable_checkpoint:
+            self.checkpoint = TranslationCheckpoint(
+                os.path.join(self.output_dir, f"{self.parser_name}_checkpoint_{self.target_lang}"),
+                is_failed=self.is_translation_failed)
+
+        translated_writer = self.__open_writer(f"{self.parser_name}_translated_{self.target_lang}")
+        output_translated_path = translated_writer.path
+        def translate_example(example: Dict, worker_idx: int) -> Union[Dict, None]:
+            if not self.should_translate(example):
+                return None
+            if self.checkpoint is not None and self.checkpoint.is_completed(example["qas_id"]):
+                return None
+            # Every attempt starts from the original text, a failed attempt may have translated some fields in place
+            example = self.__copy_target_fields(example)
+            # One pooled translator instance per worker thread
+            if self.request_packer is not None:
+                translated_example = self.__translate_packed([example], self.get_translator)[0]
+            else:
+                translated_example = self.__translate_per_key(example, self.get_translator)
+            # Not journaled either, a resumed run translates it again
+            if self.is_translation_failed(translated_example):
+                self.metrics.inc("examples_total", status="failed")
+                return None
+            return translated_example
+
+        def write_translated(example: Dict) -> None:
+            self.metrics.inc("examples_total", status="translated")
+            if self.checkpoint is not None:
+                self.checkpoint.write([example])
+            else:
+                translated_writer.write(example)
+
+        def on_error(example: Dict, error: Exception) -> None:
+            if self.parser_callbacks:
+                for callback in self.parser_callbacks:
+                    callback.on_error_translate(self, error)
+
+        pipeline = StreamingPipeline(self.converted_data,
+                                     process_fn=translate_example,
+                                     num_workers=self.stream_num_workers,
+                                     queue_size=self.stream_queue_size,
+                                     max_retries=self.max_retries,
+                                     retry_base_delay=self.retry_base_delay,
+                                     on_source_item=write_parsed,
+                                     on_error=on_error,
+                                     desc=f"Streaming {self.parser_name} translation")
+        with writer, translated_writer:
+            print(f"\n Streaming {self.parser_name} translated to {output_translated_path}... ")
+            stream_stats = pipeline.run(sink=write_translated)
+
+            if self.checkpoint is not None:
+                # The journal also holds the examples translated by previous interrupted runs
+                translated_writer.write_many(tqdm(self.checkpoint.iter_examples(), desc="Writing translated data to file"))
+        print(f"\n Streaming stats: {stream_stats}")
+        self.__finish_metrics()
+
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+
+        if self.parser_callbacks:
+            for callback in self.parser_callbacks:
+                callback.on_finish_save(self)
+                callback.on_finish_translate(self)
+
+        if IN_COLAB and self.output_format == "jsonl":
+            print(f"\n Downloading converted data to local machine...")
+            files.download(output_path)
+            print(f"\n Downloading converted translated data to local machine...")
+            files.download(output_translated_path)
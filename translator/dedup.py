@@ -0,0 +1,219 @@
+import re
+import hashlib
+from collections import defaultdict
+from copy import deepcopy
+from typing import Dict, List, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parents = list(range(size))
+
+    def find(self, idx: int) -> int:
+        while self.parents[idx] != idx:
+            self.parents[idx] = self.parents[self.parents[idx]]
+            idx = self.parents[idx]
+        return idx
+
+    def union(self, idx_a: int, idx_b: int) -> None:
+        root_a, root_b = self.find(idx_a), self.find(idx_b)
+        if root_a != root_b:
+            # The smallest index stays the root so that the first occurrence represents the cluster
+            self.parents[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _mulmod_mersenne61(a: "np.ndarray", x: "np.ndarray") -> "np.ndarray":
+    """
+    (a * x) mod (2^61 - 1) element-wise for uint64 arrays of values below 2^61, without overflowing 64 bits
+    """
+    prime = np.uint64((1 << 61) - 1)
+    low_mask = np.uint64((1 << 30) - 1)
+    # Split both operands into a 31 bit high and a 30 bit low half, every partial product then stays below 2^62:
+    # a * x = a_high * x_high * 2^60 + (a_high * x_low + a_low * x_high) * 2^30 + a_low * x_low
+    a_high, a_low = a >> np.uint64(30), a & low_mask
+    x_high, x_low = x >> np.uint64(30), x & low_mask
+    high = a_high * x_high % prime
+    middle = (a_high * x_low + a_low * x_high) % prime
+    low = a_low * x_low % prime
+
+    def shift_mod(value: "np.ndarray", shift: int) -> "np.ndarray":
+        # value * 2^shift mod p for value < p: with 2^61 = 1 (mod p) the bits above 61 wrap around to the bottom
+        # (the low 61 bits of the shift are exact even though the shift itself drops the bits above 64)
+        return (((value << np.uint64(shift)) & prime) + (value >> np.uint64(61 - shift))) % prime
+
+    return (shift_mod(high, 60) + shift_mod(middle, 30) + low) % prime
+
+
+class Deduplicator:
+    """
+    Cluster examples whose target fields are exact duplicates (content hash) or, optionally, near duplicates
+    (MinHash signatures over word shingles, candidate pairs from LSH banding, kept when the estimated Jaccard
+    similarity reaches threshold). The first example of every cluster represents it.
+
+    Example:
+        deduplicator = Deduplicator(["question_text"], near_duplicates=True)
+        clusters = deduplicator.cluster(examples)  # {representative idx: [member idx, ...]}
+    """
+    def __init__(self, target_fields: List[str],
+                 near_duplicates: bool = False,
+                 threshold: float = 0.85,  # Minimum estimated Jaccard similarity of two near duplicates
+                 num_perm: int = 128,  # Number of MinHash permutations
+                 num_bands: int = 32,  # LSH bands, num_perm must be a multiple of it
+                 shingle_size: int = 3,  # Words per shingle
+                 seed: int = 42):
+        assert not near_duplicates or np is not None, "Near duplicate detection requires numpy, pip install numpy"
+        assert num_perm % num_bands == 0, "num_perm must be a multiple of num_bands"
+        self.target_fields = target_fields
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.shingle_size = shingle_size
+
+        if near_duplicates:
+            # Universal hashing h(x) = (a * x + b) mod p with the Mersenne prime p = 2^61 - 1
+            generator = np.random.RandomState(seed)
+            self._prime = np.uint64((1 << 61) - 1)
+            self._perm_a = generator.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+            self._perm_b = generator.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+
+    def get_text(self, example: Dict) -> str:
+        """
+        The target fields of an example, list fields joined item by item
+        """
+        texts = []
+        for key in self.target_fields:
+            value = example.get(key)
+            if isinstance(value, list):
+                texts.append("\n".join(str(item) for item in value))
+            elif value is not None:
+                texts.append(str(value))
+        return "\n\n".join(texts)
+
+    @staticmethod
+    def content_hash(text: str) -> bytes:
+        # Whitespace differences do not change the translation
+        return hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=16).digest()
+
+    def minhash(self, text: str) -> "np.ndarray":
+        words = re.findall(r"\w+", text.lower())
+        shingles = {" ".join(words[idx:idx + self.shingle_size])
+                    for idx in range(max(1, len(words) - self.shingle_size + 1))}
+        # 61 bit shingle hashes, the operands of the modular arithmetic below
+        hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+                           & ((1 << 61) - 1) for shingle in shingles], dtype=np.uint64)
+        products = _mulmod_mersenne61(self._perm_a[:, None], hashes[None, :])
+        return ((products + self._perm_b[:, None]) % self._prime).min(axis=1)
+
+    def cluster(self, examples: List[Dict]) -> Dict[int, List[int]]:
+        """
+        Group the examples into duplicate clusters
+        :return: The members of every cluster with more than one example, keyed by the index of its first example
+        """
+        union_find = _UnionFind(len(examples))
+        texts = [self.get_text(example) for example in examples]
+
+        first_by_hash = {}
+        for idx, text in enumerate(texts):
+            first_idx = first_by_hash.setdefault(self.content_hash(text), idx)
+            if first_idx != idx:
+                union_find.union(first_idx, idx)
+
+        if self.near_duplicates:
+            # Only the first example of every exact duplicate group needs a signature
+            unique_indexes = sorted(set(first_by_hash.values()))
+            signatures = {idx: self.minhash(texts[idx]) for idx in unique_indexes}
+            rows_per_band = self.num_perm // self.num_bands
+            for band in range(self.num_bands):
+                buckets = defaultdict(list)
+                for idx in unique_indexes:
+                    band_signature = signatures[idx][band * rows_per_band:(band + 1) * rows_per_band].tobytes()
+                    buckets[band_signature].append(idx)
+                for bucket in buckets.values():
+                    for other_idx in bucket[1:]:
+                        if union_find.find(bucket[0]) == union_find.find(other_idx):
+                            continue
+                        similarity = float(np.mean(signatures[bucket[0]] == signatures[other_idx]))
+                        if similarity >= self.threshold:
+                            union_find.union(bucket[0], other_idx)
+
+        clusters = defaultdict(list)
+        for idx in range(len(examples)):
+            root = union_find.find(idx)
+            if root != idx:
+                clusters[root].append(idx)
+        return dict(clusters)
+
+
+class DedupPlan:
+    """
+    The outcome of a deduplication: which examples are translated and how the translations are fanned out to the
+    duplicates afterwards ("fanout") or whether the duplicates are simply dropped ("drop")
+    """
+    def __init__(self, examples: List[Dict], clusters: Dict[int, List[int]],
+                 target_fields: List[str], mode: str = "fanout"):
+        assert mode in ["fanout", "drop"], f"Invalid dedup mode {mode}, choose from ['fanout', 'drop']"
+        self.examples = examples
+        self.clusters = clusters
+        self.target_fields = target_fields
+        self.mode = mode
+        self.representative_of = {member_idx: representative_idx
+                                  for representative_idx, members in clusters.items() for member_idx in members}
+
+    @property
+    def representatives(self) -> List[Dict]:
+        """
+        The examples that still have to be translated, in input order
+        """
+        return [example for idx, example in enumerate(self.examples) if idx not in self.representative_of]
+
+    def fan_out(self, translated_examples: List[Dict]) -> List[Dict]:
+        """
+        Copy the translated target fields of every representative to the members of its cluster, the result follows
+        the input order. Members of a representative that failed translation are dropped with it
+        """
+        if self.mode == "drop":
+            return translated_examples
+
+        translated_by_id = {example["qas_id"]: example for example in translated_examples}
+        fanned_out_examples = []
+        for idx, example in enumerate(self.examples):
+            representative_idx = self.representative_of.get(idx)
+            if representative_idx is None:
+                if example["qas_id"] in translated_by_id:
+                    fanned_out_examples.append(translated_by_id[example["qas_id"]])
+                continue
+            translated_representative = translated_by_id.get(self.examples[representative_idx]["qas_id"])
+            if translated_representative is None:
+                continue
+            member = dict(example)
+            for key in self.target_fields:
+                member[key] = deepcopy(translated_representative[key])
+            fanned_out_examples.append(member)
+        return fanned_out_examples
+
+    def report(self) -> Dict[str, Union[int, float]]:
+        def num_chars(example: Dict) -> int:
+            total = 0
+            for key in self.target_fields:
+                value = example.get(key)
+                if isinstance(value, list):
+                    total += sum(len(str(item)) for item in value)
+                elif value is not None:
+                    total += len(str(value))
+            return total
+
+        total_chars = sum(num_chars(example) for example in self.examples)
+        saved_chars = sum(num_chars(self.examples[idx]) for idx in self.representative_of)
+        return {
+            "examples": len(self.examples),
+            "clusters": len(self.clusters),
+            "duplicates": len(self.representative_of),
+            "characters_saved": saved_chars,
+            "saved_ratio": round(saved_chars / total_chars, 4) if total_chars else 0.0,
+        }
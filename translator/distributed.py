@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+def shard_of(qas_id, num_shards: int) -> int:
+    """
+    Shard of an example, stable across processes and hosts (unlike hash())
+    """
+    digest = hashlib.blake2b(str(qas_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % num_shards
+
+
+def partition(examples: List[Dict], num_shards: int, shard_idx: int, strategy: str = "hash") -> List[Dict]:
+    """
+    The examples of one shard, in input order. "hash" spreads the examples by a hash of their qas_id, "range" takes
+    a contiguous slice of the input
+    """
+    assert strategy in ["hash", "range"], f"Invalid shard strategy {strategy}, choose from ['hash', 'range']"
+    assert 0 <= shard_idx < num_shards, f"Shard {shard_idx} out of range for {num_shards} shards"
+    if strategy == "range":
+        return examples[shard_idx * len(examples) // num_shards:(shard_idx + 1) * len(examples) // num_shards]
+    return [example for example in examples if shard_of(example["qas_id"], num_shards) == shard_idx]
+
+
+def claim_marker(path: str, owner: str = None) -> bool:
+    """
+    Atomically create path, True for the single caller that created it (O_EXCL works across hosts on NFSv3+)
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except (FileExistsError, FileNotFoundError):
+        return False
+    with os.fdopen(fd, 'w') as marker_file:
+        marker_file.write(json.dumps({"owner": owner, "host": socket.gethostname(), "pid": os.getpid(),
+                                      "time": time.time()}))
+    return True
+
+
+class ShardCoordinator:
+    """
+    Hand out the shards of a job to workers (processes or hosts) whose only shared state is work_dir. A worker owns
+    a shard while shard-NNNNN.lock names it, the lock modification time is refreshed as a heartbeat and the shard is
+    marked done with shard-NNNNN.done once its output is in place. The lock of a worker that stopped heart-beating for
+    lock_timeout seconds is taken over by the next worker looking for work, so a crashed worker only delays its shard,
+    and the worker that lost its lock leaves the lock and the outputs of the new owner alone.
+    Once every shard is done a single worker takes merge.lock (the same way) to merge the outputs, then writes a
+    DONE marker and removes the shard files. A worker started (or restarted) after that finds DONE and has nothing
+    to do, running the same job again takes an explicit reset (or a new work_dir).
+
+    Example:
+        coordinator = ShardCoordinator("/mnt/shared/job", num_shards=64)
+        for shard_idx in coordinator.wait_for_shards():
+            with coordinator.hold(shard_idx):
+                output = process(shard_idx)
+                if coordinator.owns(shard_idx):
+                    save(output)
+                    coordinator.complete(shard_idx)
+        if coordinator.wait_for_merge():
+            merge(coordinator.iter_outputs())
+            coordinator.finish()
+
+        ShardCoordinator("/mnt/shared/job", num_shards=64).reset()  # Before running the finished job again
+    """
+    def __init__(self, work_dir: str, num_shards: int, lock_timeout: float = 600.0, poll_interval: float = None):
+        assert num_shards > 0, "num_shards must be a positive integer"
+        self.work_dir = work_dir
+        self.num_shards = num_shards
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval if poll_interval is not None else min(30.0, lock_timeout / 10)
+        # Unique per coordinator, two parsers of the same process are different workers
+        self.worker_name = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop_merge_heartbeat = None
+        if not self.is_finished():
+            os.makedirs(self.work_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+    def shard_path(self, shard_idx: int, suffix: str) -> str:
+        return self.path(f"shard-{shard_idx:05d}{suffix}")
+
+    def is_done(self, shard_idx: int) -> bool:
+        return os.path.exists(self.shard_path(shard_idx, ".done"))
+
+    def all_done(self) -> bool:
+        return all(self.is_done(shard_idx) for shard_idx in range(self.num_shards))
+
+    def is_finished(self) -> bool:
+        """
+        True once the merging worker wrote the DONE marker, until reset
+        """
+        return os.path.exists(self.path("DONE"))
+
+    def _is_stale(self, lock_path: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(lock_path) > self.lock_timeout
+        except FileNotFoundError:
+            return False
+
+    def _lock_owner(self, lock_path: str) -> Optional[str]:
+        try:
+            with open(lock_path, encoding='utf-8') as lock_file:
+                return json.load(lock_file).get("owner")
+        except (FileNotFoundError, ValueError):
+            # Missing, or created but not written yet
+            return None
+
+    def _claim_lock(self, lock_path: str) -> bool:
+        if claim_marker(lock_path, owner=self.worker_name):
+            return True
+        if self._is_stale(lock_path):
+            # Only one of the workers racing for a stale lock manages to move it away
+            stale_path = f"{lock_path}.stale-{self.worker_name}"
+            try:
+                os.rename(lock_path, stale_path)
+            except FileNotFoundError:
+                return False
+            os.remove(stale_path)
+            return claim_marker(lock_path, owner=self.worker_name)
+        return False
+
+    def _owns_lock(self, lock_path: str) -> bool:
+        return self._lock_owner(lock_path) == self.worker_name
+
+    def _start_heartbeat(self, lock_path: str, name: str) -> threading.Event:
+        stop_event = threading.Event()
+
+        def heartbeat():
+            while not stop_event.wait(self.lock_timeout / 4):
+                # A worker that lost its lock to another one must not keep the new owner's lock alive
+                if not self._owns_lock(lock_path):
+                    return
+                try:
+                    os.utime(lock_path)
+                except FileNotFoundError:
+                    return
+
+        threading.Thread(target=heartbeat, daemon=True, name=name).start()
+        return stop_event
+
+    def owns(self, shard_idx: int) -> bool:
+        """
+        True while this worker still holds the lock of the shard (it was not taken over after a stall)
+        """
+        return self._owns_lock(self.shard_path(shard_idx, ".lock"))
+
+    def claim(self) -> Optional[int]:
+        """
+        Claim a shard that is neither done nor held by a live worker
+        :return: The shard index, None if there is nothing to claim right now
+        """
+        # Start the scan at a worker specific shard so that workers starting together rarely race for the same lock
+        start = int.from_bytes(hashlib.blake2b(self.worker_name.encode("utf-8"), digest_size=4).digest(), "little")
+        for offset in range(self.num_shards):
+            shard_idx = (start + offset) % self.num_shards
+            if self.is_done(shard_idx):
+                continue
+            lock_path = self.shard_path(shard_idx, ".lock")
+            if self._claim_lock(lock_path):
+                # The shard may have been finished between the done check and the lock, or the whole job merged
+                # (DONE is written before the .done markers are removed)
+                if self.is_finished():
+                    os.remove(lock_path)
+                    return None
+                if self.is_done(shard_idx):
+                    os.remove(lock_path)
+                    continue
+                return shard_idx
+        return None
+
+    @contextmanager
+    def hold(self, shard_idx: int) -> Iterator[None]:
+        """
+        Refresh the lock of the shard while the block runs and release it afterwards, as long as this worker owns it
+        """
+        lock_path = self.shard_path(shard_idx, ".lock")
+        stop_event = self._start_heartbeat(lock_path, name=f"shard-{shard_idx}-heartbeat")
+        try:
+            yield
+        finally:
+            stop_event.set()
+            if self._owns_lock(lock_path):
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+
+    def complete(self, shard_idx: int) -> None:
+        claim_marker(self.shard_path(shard_idx, ".done"), owner=self.worker_name)
+
+    def wait_for_shards(self) -> Iterator[int]:
+        """
+        Yield the shards this worker claims until every shard is done, waiting for the shards held by other workers
+        so that the shards of a crashed worker are picked up once its lock is stale
+        """
+        while not self.is_finished() and not self.all_done():
+            shard_idx = self.claim()
+            if shard_idx is None:
+                time.sleep(self.poll_interval)
+                continue
+            yield shard_idx
+
+    def wait_for_merge(self) -> bool:
+        """
+        Once every shard is done, wait until this worker takes merge.lock (True) or another worker finished the
+        merge (False). The merge lock is heart-beaten like a shard lock, so a crashed merger is replaced
+        """
+        while not self.is_finished():
+            lock_path = self.path("merge.lock")
+            if self._claim_lock(lock_path):
+                self._stop_merge_heartbeat = self._start_heartbeat(lock_path, name="merge-heartbeat")
+                return True
+            time.sleep(self.poll_interval)
+        return False
+
+    def finish(self) -> None:
+        """
+        Called by the merging worker once the merged output is saved: write the DONE marker, then remove the shard
+        outputs, journals and locks that are no longer needed (DONE stays, so late workers do not redo the job)
+        """
+        if self._stop_merge_heartbeat is not None:
+            self._stop_merge_heartbeat.set()
+            self._stop_merge_heartbeat = None
+        claim_marker(self.path("DONE"), owner=self.worker_name)
+        for name in os.listdir(self.work_dir):
+            if name == "DONE":
+                continue
+            path = self.path(name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def reset(self) -> None:
+        """
+        Forget every previous run of the job, DONE included, so that it runs again from scratch. Call it once, while
+        no worker runs the job
+        """
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def iter_outputs(self, suffix: str = ".jsonl") -> Iterator[Dict]:
+        """
+        Every example written to the shard outputs, examples of a shard processed twice (after a take over) are
+        yielded once
+        """
+        seen_ids = set()
+        for shard_idx in range(self.num_shards):
+            shard_output_path = self.shard_path(shard_idx, suffix)
+            if not os.path.exists(shard_output_path):
+                continue
+            with open(shard_output_path, encoding='utf-8') as jfile:
+                for line in jfile:
+                    example = json.loads(line)
+                    qas_id = str(example["qas_id"])
+                    if qas_id not in seen_ids:
+                        seen_ids.add(qas_id)
+                        yield example
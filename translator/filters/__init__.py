@@ -1,2 +1,2 @@
-from .code_filter import have_code
+from .code_filter import have_code, have_code_batch
 from .fail_translation_filter import have_re_code
\ No newline at end of file
@@ -1,33 +1,50 @@
 import re
+from collections import Counter
+from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import Tuple, Union, List
 
 
+CODE_ELEMENTS = [
+    ';', '{', '}', 'function', 'class', 'var', 'int', 'void', 'public',
+    'import', 'for', 'while', 'elif', 'switch', 'case', 'break',
+    'def', 'return', 'const', 'let', 'async', 'await', 'public', 'private',
+    'protected', 'extends', 'implements', 'new', 'try', 'catch', 'throw',
+    'require', 'import', 'module.exports', 'console.log', 'printf', '#include',
+    'namespace', 'using', 'struct', 'typedef', 'enum', 'interface', 'const',
+    'final', 'abstract', 'static', 'main', 'int', 'float', 'double', 'bool',
+    'true', 'false', 'NULL', 'nil', 'void', 'var', 'let', 'const', 'val',
+    'try', 'catch', 'finally', 'raise', 'lambda', 'self', 'super',
+    'instanceof', 'enum', 'switch', 'case', 'break', 'default', 'console', 'python',
+    'csharp' , 'c', 'js', 'javascript', 'java', 'pytorch', 'php', 'asm', '//', '#', 'writeline', 'readline', '```',
+    'json', 'html', 'css', 'lxml', 'xml', '<', '>', '<html>', '<body>', '<li>', '</html>', '</body>', '</ul>', '<ul>', '</li>',
+    '[', ']', '<text>', '</', '<source>', '</source>' , '</text>', 'sql', 'select', 'from' , 'table', 'union', 'group' ,
+    'string', '()', 'Hello, world!', 'C# code', 'python code', 'import re', 'object', 'ABC', 'Ruby', 'regex', 'println'
+]
+
+# Every element is matched case-insensitively as \bELEMENT\b, elements listed several times count several times
+_ELEMENT_WEIGHTS = Counter(element.lower() for element in CODE_ELEMENTS)
+_ELEMENT_PATTERNS = {element: re.compile(rf'\b{re.escape(element)}\b') for element in _ELEMENT_WEIGHTS}
+# One alternation for all the elements, longest first, scanned once per text. The lookahead reports a match at
+# every position, the shorter elements matching at the same position are prefixes of the reported one
+_CODE_PATTERN = re.compile("(?=(" + "|".join(_ELEMENT_PATTERNS[element].pattern
+                                             for element in sorted(_ELEMENT_WEIGHTS, key=len, reverse=True)) + "))")
+_PREFIX_ELEMENTS = {element: [prefix for prefix in _ELEMENT_WEIGHTS if len(prefix) < len(element) and element.startswith(prefix)]
+                    for element in _ELEMENT_WEIGHTS}
+
+
 def code_likelihood_score(text: str) -> Tuple[int, list]:
     # Calculate a score based on code-like elements
     score = 0
-    code_elements = [
-        ';', '{', '}', 'function', 'class', 'var', 'int', 'void', 'public',
-        'import', 'for', 'while', 'elif', 'switch', 'case', 'break',
-        'def', 'return', 'const', 'let', 'async', 'await', 'public', 'private',
-        'protected', 'extends', 'implements', 'new', 'try', 'catch', 'throw',
-        'require', 'import', 'module.exports', 'console.log', 'printf', '#include',
-        'namespace', 'using', 'struct', 'typedef', 'enum', 'interface', 'const',
-        'final', 'abstract', 'static', 'main', 'int', 'float', 'double', 'bool',
-        'true', 'false', 'NULL', 'nil', 'void', 'var', 'let', 'const', 'val',
-        'try', 'catch', 'finally', 'raise', 'lambda', 'self', 'super',
-        'instanceof', 'enum', 'switch', 'case', 'break', 'default', 'console', 'python',
-        'csharp' , 'c', 'js', 'javascript', 'java', 'pytorch', 'php', 'asm', '//', '#', 'writeline', 'readline', '```',
-        'json', 'html', 'css', 'lxml', 'xml', '<', '>', '<html>', '<body>', '<li>', '</html>', '</body>', '</ul>', '<ul>', '</li>',
-        '[', ']', '<text>', '</', '<source>', '</source>' , '</text>', 'sql', 'select', 'from' , 'table', 'union', 'group' ,
-        'string', '()', 'Hello, world!', 'C# code', 'python code', 'import re', 'object', 'ABC', 'Ruby', 'regex', 'println'
-    ]
     if text and isinstance(text, str):
         text = text.lower()  # Convert the text to lowercase for case-insensitive comparison
         found_elements = []
-        for element in code_elements:
-            element = element.lower()  # Convert elements to lowercase for case-insensitive comparison
-            matches = re.finditer(rf'\b{re.escape(element)}\b', text)
-            found_elements.extend([match.group() for match in matches])
+        for match in _CODE_PATTERN.finditer(text):
+            element = match.group(1)
+            found_elements += [element] * _ELEMENT_WEIGHTS[element]
+            for prefix in _PREFIX_ELEMENTS[element]:
+                if _ELEMENT_PATTERNS[prefix].match(text, match.start()):
+                    found_elements += [prefix] * _ELEMENT_WEIGHTS[prefix]
         score += len(found_elements) # / (len(text.split(" ")) * 0.1)
 
         return score, found_elements
@@ -52,6 +69,20 @@ def have_code(text: Union[str, List[str]], threshold: int=8) -> Tuple[bool, int,
     return False, score, found_elements
 
 
+def have_code_batch(texts: List[Union[str, List[str]]], threshold: int=8,
+                    num_proc: int=1, chunksize: int=1000, executor: Executor=None) -> List[Tuple[bool, int, list]]:
+    """
+    Run have_code over many fields at once, in a process pool when num_proc > 1 (the scan is CPU bound and holds the GIL)
+    or in the given executor (e.g. a pool shared with the other CPU bound stages)
+    """
+    if (executor is None and num_proc <= 1) or len(texts) <= chunksize:
+        return [have_code(text, threshold=threshold) for text in texts]
+    if executor is not None:
+        return list(executor.map(partial(have_code, threshold=threshold), texts, chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=num_proc) as executor:
+        return list(executor.map(partial(have_code, threshold=threshold), texts, chunksize=chunksize))
+
+
 if __name__ == "__main__":
     code_text =[\
     '''
@@ -0,0 +1,148 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from providers import Provider
+
+
+# (example idx, field name, list idx or None for string fields)
+Slot = Tuple[int, str, Optional[int]]
+
+
+class RequestPacker:
+    """
+    Gather the short strings of many examples into provider sized batches and scatter the translations back by
+    position, so that a 10 characters system prompt does not cost a round-trip of its own.
+
+    Providers that translate a list with one request per item (googletrans, translators) set
+    Provider.pack_separator, the batch is then joined into a single request with numbered markers and split back.
+    If the markers do not survive the translation the batch falls back to a plain list translation.
+    """
+    def __init__(self, max_batch_chars: int = 4500, max_batch_items: int = 64):
+        """
+        :param max_batch_chars: Maximum number of characters in one batch, longer strings are sent on their own
+        :param max_batch_items: Maximum number of strings in one batch
+        """
+        self.max_batch_chars = max_batch_chars
+        self.max_batch_items = max_batch_items
+
+    def pack(self, examples: List[Dict], target_fields: List[str]) -> List[List[Slot]]:
+        """
+        Split every non-empty string of the target fields into batches, keeping the input order
+        """
+        batches = []
+        batch, batch_chars = [], 0
+        for example_idx, example in enumerate(examples):
+            for key in target_fields:
+                value = example[key]
+                if value is None or value == "":
+                    continue
+                slots = [(example_idx, key, None)] if isinstance(value, str) else \
+                    [(example_idx, key, list_idx) for list_idx in range(len(value))]
+
+                for slot in slots:
+                    text_chars = len(self.get_text(examples, slot))
+                    if batch and (batch_chars + text_chars > self.max_batch_chars or len(batch) >= self.max_batch_items):
+                        batches.append(batch)
+                        batch, batch_chars = [], 0
+                    batch.append(slot)
+                    batch_chars += text_chars
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def get_text(examples: List[Dict], slot: Slot) -> str:
+        example_idx, key, list_idx = slot
+        value = examples[example_idx][key]
+        return value if list_idx is None else value[list_idx]
+
+    @staticmethod
+    def set_text(examples: List[Dict], slot: Slot, text: str) -> None:
+        example_idx, key, list_idx = slot
+        if list_idx is None:
+            examples[example_idx][key] = text
+        else:
+            examples[example_idx][key][list_idx] = text
+
+    @staticmethod
+    def join_texts(texts: List[str], separator: str) -> str:
+        return "".join(separator.format(idx=idx) + text for idx, text in enumerate(texts))
+
+    @staticmethod
+    def marker_pattern(separator: str) -> str:
+        # Only the marker itself, the whitespace around it is part of the texts (see split_texts)
+        marker_prefix, marker_suffix = (re.escape(part.strip()) for part in separator.split("{idx}"))
+        return rf"{marker_prefix}\s*(\d+)\s*{marker_suffix}"
+
+    @staticmethod
+    def split_texts(translated_text: str, separator: str, num_texts: int) -> Optional[List[str]]:
+        """
+        Split a joined translation back, None if the markers were altered by the translation.
+        Only the whitespace of the separator itself is trimmed, the leading and trailing newlines of a text are kept
+        """
+        parts = re.split(RequestPacker.marker_pattern(separator), translated_text)
+        # re.split with one capture group gives [prefix, idx_0, text_0, idx_1, text_1, ...]
+        if parts[0].strip() or len(parts) != 2 * num_texts + 1:
+            return None
+        indexes, texts = parts[1::2], parts[2::2]
+        if indexes != [str(idx) for idx in range(num_texts)]:
+            return None
+
+        # With "\n[[{idx}]]\n", a text is preceded by the "\n" after its marker and followed by the "\n" before the next one
+        separator_prefix, separator_suffix = separator.split("{idx}")
+        before_marker = separator_prefix[:len(separator_prefix) - len(separator_prefix.lstrip())]
+        after_marker = separator_suffix[len(separator_suffix.rstrip()):]
+        for idx, text in enumerate(texts):
+            if after_marker and text.startswith(after_marker):
+                text = text[len(after_marker):]
+            if before_marker and idx < num_texts - 1 and text.endswith(before_marker):
+                text = text[:-len(before_marker)]
+            texts[idx] = text
+        return texts
+
+    def translate_batch(self, texts: List[str], translator: Provider,
+                        src: str, dest: str,
+                        fail_translation_code: str = "P1OP1_F") -> List[str]:
+        if len(texts) == 1:
+            return [translator.translate(texts[0], src=src, dest=dest, fail_translation_code=fail_translation_code)]
+
+        if translator.pack_separator is None:
+            return self._translate_list(texts, translator, src, dest, fail_translation_code)
+
+        if translator.cache is None:
+            return self._translate_joined(texts, translator, src, dest, fail_translation_code)
+
+        # Only join the strings that are not cached yet, so the cache keeps working per string
+        keys, cached, missing_texts = translator._cache_lookup(texts, src=src, dest=dest)
+        translated_missing_texts = None
+        if missing_texts is not None:
+            translated_missing_texts = self._translate_joined(missing_texts, translator, src, dest, fail_translation_code)
+        return translator._cache_merge(texts, keys, cached, translated_missing_texts, fail_translation_code)
+
+    def _translate_list(self, texts: List[str], translator: Provider,
+                        src: str, dest: str,
+                        fail_translation_code: str = "P1OP1_F") -> List[str]:
+        translated_texts = translator.translate(texts, src=src, dest=dest, fail_translation_code=fail_translation_code)
+        # Some providers return a fixed size list of fail codes on unavoidable errors
+        if len(translated_texts) != len(texts):
+            return [fail_translation_code] * len(texts)
+        return translated_texts
+
+    def _translate_joined(self, texts: List[str], translator: Provider,
+                          src: str, dest: str,
+                          fail_translation_code: str = "P1OP1_F") -> List[str]:
+        if len(texts) == 1:
+            return [translator.translate(texts[0], src=src, dest=dest, fail_translation_code=fail_translation_code)]
+        # A text that already contains a marker could not be told apart from the markers once joined
+        marker_pattern = self.marker_pattern(translator.pack_separator)
+        if any(re.search(marker_pattern, text) for text in texts):
+            return self._translate_list(texts, translator, src, dest, fail_translation_code)
+
+        translated_text = translator.translate(self.join_texts(texts, translator.pack_separator),
+                                               src=src, dest=dest, fail_translation_code=fail_translation_code)
+        translated_texts = None
+        if fail_translation_code not in translated_text:
+            translated_texts = self.split_texts(translated_text, translator.pack_separator, len(texts))
+        if translated_texts is None:
+            return self._translate_list(texts, translator, src, dest, fail_translation_code)
+        return translated_texts
@@ -0,0 +1,140 @@
+import time
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from tqdm.auto import tqdm
+
+from providers.utils import get_metrics_registry
+from .utils import ReorderBuffer, backoff_delay
+
+
+_SENTINEL = object()
+
+
+class StreamingPipeline:
+    """
+    Bounded producer/consumer pipeline: a feeder thread pulls examples from a (lazy) source into a bounded
+    input queue, worker threads process them into a bounded output queue and the calling thread hands
+    every result to the sink as soon as it arrives. Peak memory is set by the queue sizes, not the dataset size.
+    With ordered=True results go through a ReorderBuffer and reach the sink in input order, the feeder never runs
+    more than queue_size examples ahead of the oldest unfinished one. Otherwise they follow completion order.
+    """
+    def __init__(self,
+                 source: Iterable[Dict],
+                 process_fn: Callable[[Dict, int], Optional[Dict]],  # Called with (example, worker_idx), return None to drop the example
+                 num_workers: int = 16,
+                 queue_size: int = 1000,
+                 max_retries: int = 3,
+                 retry_base_delay: float = 1.0,  # Base delay in seconds of the exponential backoff (with jitter) between retries
+                 on_source_item: Callable[[Dict], None] = None,  # Called by the feeder thread for every example read from source
+                 on_error: Callable[[Dict, Exception], None] = None,  # Called when an example failed more than max_retries times
+                 ordered: bool = True,
+                 desc: str = "Streaming translation"):
+        self.source = source
+        self.process_fn = process_fn
+        self.num_workers = num_workers
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.on_source_item = on_source_item
+        self.on_error = on_error
+        self.ordered = ordered
+        self.queue_size = queue_size
+        self.desc = desc
+        self.metrics = get_metrics_registry()
+
+        self.input_queue = queue.Queue(maxsize=queue_size)
+        self.output_queue = queue.Queue(maxsize=queue_size)
+
+        self.num_read = 0
+        self.num_written = 0
+        self.num_dropped = 0
+        self.num_failed = 0
+        self._feeder_error = None
+        self._stats_lock = threading.Lock()
+        self._reorder_buffer = None
+
+    def _feed(self) -> None:
+        try:
+            for idx, example in enumerate(self.source):
+                if self.on_source_item is not None:
+                    self.on_source_item(example)
+                if self._reorder_buffer is not None:
+                    self._reorder_buffer.wait_for_slot(idx)
+                self.input_queue.put((idx, example))
+                self.num_read += 1
+        except Exception as e:
+            self._feeder_error = e
+        finally:
+            for _ in range(self.num_workers):
+                self.input_queue.put(_SENTINEL)
+
+    def _work(self, worker_idx: int) -> None:
+        while True:
+            item = self.input_queue.get()
+            if item is _SENTINEL:
+                self.output_queue.put(_SENTINEL)
+                return
+            idx, example = item
+
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = self.process_fn(example, worker_idx)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        tqdm.write(f"Example {example.get('qas_id')} failed after {attempt + 1} attempts: {e}")
+                        self.metrics.inc("gave_up_total", stage="example")
+                        with self._stats_lock:
+                            self.num_failed += 1
+                        if self.on_error is not None:
+                            self.on_error(example, e)
+                        result = None
+                    else:
+                        delay = backoff_delay(attempt + 1, self.retry_base_delay)
+                        tqdm.write(f"Example {example.get('qas_id')} failed with the following error: {e}. Retrying in {delay:.1f}s...")
+                        self.metrics.inc("retries_total", stage="example")
+                        time.sleep(delay)
+
+            self.output_queue.put((idx, result))
+
+    def run(self, sink: Callable[[Dict], None]) -> Dict[str, int]:
+        def release(result: Dict) -> None:
+            sink(result)
+            self.num_written += 1
+
+        if self.ordered:
+            self._reorder_buffer = ReorderBuffer(on_release=release, max_pending=self.queue_size)
+
+        threads = [threading.Thread(target=self._feed, daemon=True)]
+        threads += [threading.Thread(target=self._work, args=(idx,), daemon=True) for idx in range(self.num_workers)]
+        for thread in threads:
+            thread.start()
+
+        finished_workers = 0
+        with tqdm(desc=self.desc, unit="example") as progress_bar:
+            while finished_workers < self.num_workers:
+                item = self.output_queue.get()
+                if item is _SENTINEL:
+                    finished_workers += 1
+                    continue
+                idx, result = item
+                progress_bar.update(1)
+                if result is None:
+                    self.num_dropped += 1
+                if self._reorder_buffer is not None:
+                    self._reorder_buffer.push(idx, result)
+                elif result is not None:
+                    release(result)
+
+        for thread in threads:
+            thread.join()
+        if self._feeder_error is not None:
+            raise self._feeder_error
+
+        return {
+            "read": self.num_read,
+            "written": self.num_written,
+            "filtered": self.num_dropped - self.num_failed,
+            "failed": self.num_failed,
+        }
@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import mmap
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[0-9.eE+\-]*")
+
+
+class _JsonStream:
+    """
+    Text buffer over a file that only keeps the part of the JSON document that has not been consumed yet
+    """
+    def __init__(self, file: TextIO, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self) -> bool:
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Next non-whitespace character, "" at the end of the file
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}' but found '{found}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """
+        Decode the next complete JSON value, reading more of the file until it is complete
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut by the end of the buffer (e.g. "-2." of "-2.5e10") decodes to its prefix
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    end_of_number = _NUMBER_CHARS.match(self.buffer, end).end()
+                else:
+                    end_of_number = end
+                if end_of_number < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more()
+
+
+def iter_json_array(path: str, array_path: str = "", chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array one at a time without loading the document, memory stays bounded by the size
+    of one element and the read chunk. The array is the whole document or is reached through array_path, a dot
+    separated list of object keys (e.g. "data.conversations"). Values of the keys skipped on the way are decoded
+    and discarded, so a huge sibling placed before the array is still loaded once.
+
+    Example:
+        for example in iter_json_array("ShareGPT_V3_unfiltered_cleaned_split.json"):
+            ...
+    """
+    with open(path, encoding='utf-8') as jfile:
+        stream = _JsonStream(jfile, chunk_size)
+        for key in [key for key in array_path.split(".") if key]:
+            stream.expect("{")
+            while True:
+                if stream.peek() == "}":
+                    raise KeyError(f"Key '{key}' of '{array_path}' not found in {path}")
+                current_key = stream.decode_value()
+                stream.expect(":")
+                if current_key == key:
+                    break
+                stream.decode_value()
+                if stream.peek() == ",":
+                    stream.pos += 1
+
+        stream.expect("[")
+        if stream.peek() == "]":
+            return
+        while True:
+            yield stream.decode_value()
+            separator = stream.peek()
+            stream.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise json.JSONDecodeError(f"Expecting ',' or ']' but found '{separator}'", stream.buffer, stream.pos - 1)
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _parse_range(path: str, offsets: List[int], map_fn: Callable[[Any], Any] = None) -> List[Any]:
+    """
+    Parse the lines of path at the flattened [start_0, end_0, start_1, end_1, ...] offsets, used by the worker processes
+    """
+    with open(path, 'rb') as jfile, mmap.mmap(jfile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        records = [_loads(mm[start:end]) for start, end in zip(offsets[0::2], offsets[1::2])]
+    return records if map_fn is None else [map_fn(record) for record in records]
+
+
+class JsonlReader:
+    """
+    Memory-mapped line-delimited JSON reader. A byte-offset index of the line starts is built on first use and saved
+    next to the file (path + ".idx"), it is reused as long as the file size and modification time do not change.
+    Records are parsed lazily, can be accessed by index (reader[i], reader.iter_range(start, stop)) and can be
+    parsed in parallel across processes with iter_parallel, so the file never has to fit in memory.
+
+    Example:
+        reader = JsonlReader("data.jsonl")
+        print(len(reader), reader[10])
+        for example in reader.iter_parallel(num_proc=8):
+            ...
+    """
+    def __init__(self, path: str, use_index_file: bool = True):
+        """
+        :param path: The JSONL file, one JSON value per line, empty lines are skipped
+        :param use_index_file: Load/save the offset index from/to path + ".idx"
+        """
+        self.path = path
+        self.index_path = path + ".idx" if use_index_file else None
+        self._file = open(path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        # mmap can not map an empty file
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b""
+        # Line i is the byte range [_starts[i], _ends[i]) of the file, newline excluded
+        self._starts, self._ends = self._load_index()
+
+    def _index_signature(self) -> array:
+        stat = os.stat(self.path)
+        return array('q', [stat.st_size, stat.st_mtime_ns])
+
+    def _load_index(self):
+        if self.index_path is not None and os.path.exists(self.index_path):
+            index = array('q')
+            with open(self.index_path, 'rb') as index_file:
+                index.frombytes(index_file.read())
+            if len(index) >= 2 and index[:2] == self._index_signature():
+                num_lines = (len(index) - 2) // 2
+                return index[2:2 + num_lines], index[2 + num_lines:]
+
+        starts, ends = self._build_index()
+        if self.index_path is not None:
+            try:
+                with open(self.index_path, 'wb') as index_file:
+                    index_file.write((self._index_signature() + starts + ends).tobytes())
+            except OSError:
+                # Read-only directory, the index is simply rebuilt next time
+                pass
+        return starts, ends
+
+    def _build_index(self):
+        if np is not None and self._size:
+            # Vectorised scan of the newlines, in blocks so the file is never copied in memory at once
+            newlines = []
+            block_size = 1 << 28
+            for block_start in range(0, self._size, block_size):
+                block = np.frombuffer(self._mm, dtype=np.uint8, count=min(block_size, self._size - block_start),
+                                      offset=block_start)
+                newlines.append(np.flatnonzero(block == ord("\n")) + block_start)
+            newlines = np.concatenate(newlines)
+            starts = np.concatenate(([0], newlines + 1))
+            ends = np.concatenate((newlines, [self._size]))
+            # Drop empty lines
+            keep = ends > starts
+            return array('q', starts[keep].tolist()), array('q', ends[keep].tolist())
+
+        starts, ends = array('q'), array('q')
+        start = 0
+        while start < self._size:
+            end = self._mm.find(b"\n", start)
+            end = self._size if end == -1 else end
+            if end > start:
+                starts.append(start)
+                ends.append(end)
+            start = end + 1
+        return starts, ends
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, idx: int) -> Any:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Line {idx} out of range for {self.path} with {len(self)} lines")
+        return _loads(self._mm[self._starts[idx]:self._ends[idx]])
+
+    def iter_range(self, start: int = 0, stop: int = None) -> Iterator[Any]:
+        """
+        Lazily parse the lines [start, stop)
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for idx in range(start, stop):
+            yield _loads(self._mm[self._starts[idx]:self._ends[idx]])
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.iter_range()
+
+    def iter_parallel(self, num_proc: int = None, chunk_size: int = 10000,
+                      start: int = 0, stop: int = None,
+                      map_fn: Callable[[Any], Any] = None) -> Iterator[Any]:
+        """
+        Parse the lines [start, stop) in chunks of chunk_size lines across num_proc processes and yield the records
+        in file order, at most 2 * num_proc chunks are in flight at once.
+        map_fn (a picklable, module level function) is applied to every record in the worker processes, which is where
+        the speed up comes from when records need more than parsing (e.g. a conversion to the target config)
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        num_proc = num_proc or os.cpu_count()
+        chunk_bounds = [(chunk_start, min(chunk_start + chunk_size, stop)) for chunk_start in range(start, stop, chunk_size)]
+        if num_proc <= 1 or len(chunk_bounds) <= 1:
+            for record in self.iter_range(start, stop):
+                yield record if map_fn is None else map_fn(record)
+            return
+
+        with ProcessPoolExecutor(max_workers=num_proc) as executor:
+            pending = deque()
+            for chunk_start, chunk_stop in chunk_bounds:
+                # Only the offsets are sent to the workers, they map the file themselves
+                pending.append(executor.submit(_parse_range, self.path,
+                                               self._chunk_offsets(chunk_start, chunk_stop), map_fn))
+                if len(pending) >= 2 * num_proc:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def _chunk_offsets(self, start: int, stop: int) -> List[int]:
+        return [offset for idx in range(start, stop) for offset in (self._starts[idx], self._ends[idx])]
+
+    def close(self) -> None:
+        if self._size:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "JsonlReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,99 @@
+import re
+from typing import List, Tuple
+
+
+# Fenced code blocks (``` or ~~~), kept whole whenever they fit in a segment
+CODE_FENCE_PATTERN = re.compile(r"(?ms)^[ \t]*(```|~~~).*?^[ \t]*\1[^\n]*(?:\n|\Z)")
+PARAGRAPH_PATTERN = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?;:。！？；])\s+")
+LINE_PATTERN = re.compile(r"(?<=\n)")
+WORD_PATTERN = re.compile(r"(?<=\s)(?=\S)")
+
+
+def _split_keep_separators(text: str, pattern: re.Pattern) -> List[str]:
+    """
+    Split text after every match of pattern, the separators stay attached to the end of the preceding piece
+    """
+    pieces, start = [], 0
+    for match in pattern.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _split_blocks(text: str) -> List[Tuple[str, bool]]:
+    """
+    Split text into paragraphs and fenced code blocks, return a list of (block, is_code)
+    """
+    blocks, start = [], 0
+    for match in CODE_FENCE_PATTERN.finditer(text):
+        blocks += [(paragraph, False) for paragraph in _split_keep_separators(text[start:match.start()], PARAGRAPH_PATTERN)]
+        blocks.append((match.group(), True))
+        start = match.end()
+    blocks += [(paragraph, False) for paragraph in _split_keep_separators(text[start:], PARAGRAPH_PATTERN)]
+    return blocks
+
+
+def _split_oversized(unit: str, max_chars: int, patterns: List[re.Pattern]) -> List[str]:
+    """
+    Recursively split a unit larger than max_chars with finer and finer patterns, hard cut as a last resort
+    """
+    if len(unit) <= max_chars:
+        return [unit]
+    if not patterns:
+        return [unit[start:start + max_chars] for start in range(0, len(unit), max_chars)]
+
+    pieces = _split_keep_separators(unit, patterns[0])
+    if len(pieces) == 1:
+        return _split_oversized(unit, max_chars, patterns[1:])
+    units = []
+    for piece in pieces:
+        units += _split_oversized(piece, max_chars, patterns[1:])
+    return units
+
+
+def segment_text(text: str, max_chars: int = 15000) -> List[str]:
+    """
+    Split text into segments of at most max_chars characters on paragraph boundaries, then sentence, line and word
+    boundaries for paragraphs that are still too long. Fenced code blocks are never split unless they alone exceed
+    max_chars, in which case they are split on line boundaries.
+    No character is lost, "".join(segment_text(text)) == text
+    :param text: The text to split
+    :param max_chars: The maximum number of characters of a segment
+    :return: The list of segments, in order
+    """
+    assert max_chars > 0, "max_chars must be a positive integer"
+    if len(text) <= max_chars:
+        return [text]
+
+    units = []
+    for block, is_code in _split_blocks(text):
+        patterns = [LINE_PATTERN, WORD_PATTERN] if is_code else [SENTENCE_PATTERN, LINE_PATTERN, WORD_PATTERN]
+        units += _split_oversized(block, max_chars, patterns)
+
+    # Greedily merge consecutive units back into segments as large as possible
+    segments, segment = [], ""
+    for unit in units:
+        if segment and len(segment) + len(unit) > max_chars:
+            segments.append(segment)
+            segment = ""
+        segment += unit
+    if segment:
+        segments.append(segment)
+    return segments
+
+
+def split_surrounding_whitespace(segment: str) -> Tuple[str, str, str]:
+    """
+    Split a segment into (leading whitespace, content, trailing whitespace), providers usually strip the
+    surrounding whitespace so it is put back around the translated content to keep the markdown structure
+    """
+    content = segment.strip()
+    if not content:
+        return segment, "", ""
+    leading = segment[:len(segment) - len(segment.lstrip())]
+    trailing = segment[len(segment.rstrip()):]
+    return leading, content, trailing
@@ -1,2 +1,5 @@
 from .super_call_wrapper import force_super_call, ForceBaseCallMeta
-from .utils import timeit, have_internet
\ No newline at end of file
+from .utils import timeit, have_internet
+from .retry_scheduler import RetryScheduler, backoff_delay
+from .reorder_buffer import ReorderBuffer
+from .cpu_pool import CPUPool
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import math
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List
+
+
+class CPUPool:
+    """
+    Process pool shared by the CPU bound stages of a run (convert, code filter, JSON encoding) so that they use every
+    core instead of competing for the GIL with the network threads, which stay in the main process. The workers are
+    started on first use and reused by every stage until shutdown. Items are sent in chunks, one pickle per chunk.
+    Functions must be picklable (module level), they run in the worker processes.
+
+    Example:
+        with CPUPool(num_proc=8) as pool:
+            converted = pool.map(convert_record, records)
+    """
+    def __init__(self, num_proc: int = None, mp_context: str = None, min_chunk_size: int = 256):
+        """
+        :param num_proc: Number of worker processes, None for one per core, 1 to run everything in the calling process
+        :param mp_context: Multiprocessing start method, default to "forkserver" where available so that the workers
+            never fork a process holding network threads, "spawn" otherwise
+        :param min_chunk_size: Minimum number of items per chunk, smaller inputs are mapped in the calling process
+        """
+        self.num_proc = num_proc or os.cpu_count() or 1
+        if mp_context is None:
+            mp_context = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.mp_context = mp_context
+        self.min_chunk_size = min_chunk_size
+        self._executor = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.num_proc > 1
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.num_proc,
+                                                 mp_context=multiprocessing.get_context(self.mp_context))
+        return self._executor
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any], chunksize: int = None) -> List[Any]:
+        """
+        fn applied to every item, in input order
+        :param chunksize: Items per chunk, default to about 4 chunks per worker
+        """
+        items = items if isinstance(items, list) else list(items)
+        if chunksize is None:
+            chunksize = max(self.min_chunk_size, math.ceil(len(items) / (self.num_proc * 4)))
+        if not self.enabled or len(items) <= chunksize:
+            return [fn(item) for item in items]
+        return list(self.executor.map(fn, items, chunksize=chunksize))
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers, the pool starts new ones if it is used again
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "CPUPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
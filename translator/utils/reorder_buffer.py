@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class ReorderBuffer:
+    """
+    Collect results that complete out of order and release them in input order as soon as the prefix is complete.
+    With max_pending set, producers call wait_for_slot(idx) before submitting item idx, which blocks while idx is
+    max_pending or more ahead of the next item to release, so a single slow item can not make the buffer grow
+    without bound.
+
+    Example:
+        buffer = ReorderBuffer(on_release=lambda result: output.write(result))
+        buffer.push(1, "b")  # Held until 0 arrives
+        buffer.push(0, "a")  # Releases "a" then "b"
+    """
+    def __init__(self, on_release: Callable[[Any], None], max_pending: int = None, start_idx: int = 0):
+        """
+        :param on_release: Called in input order with every item that is not None, from the thread that pushed the
+            item completing the prefix
+        :param max_pending: Maximum distance between the next item to release and the newest submitted item
+        :param start_idx: Index of the first item
+        """
+        assert max_pending is None or max_pending > 0, "max_pending must be a positive integer"
+        self.on_release = on_release
+        self.max_pending = max_pending
+        self.next_idx = start_idx
+        self._pending: Dict[int, Any] = {}
+        self._condition = threading.Condition()
+
+    def wait_for_slot(self, idx: int) -> None:
+        """
+        Block until item idx is within max_pending items of the next item to release
+        """
+        if self.max_pending is None:
+            return
+        with self._condition:
+            self._condition.wait_for(lambda: idx < self.next_idx + self.max_pending)
+
+    def push(self, idx: int, item: Any) -> None:
+        """
+        Add the result of item idx, None marks a dropped item that still completes the prefix
+        """
+        with self._condition:
+            assert idx >= self.next_idx and idx not in self._pending, f"Item {idx} was already pushed"
+            self._pending[idx] = item
+            # Release under the lock so that concurrent pushers can not interleave the output
+            while self.next_idx in self._pending:
+                ready_item = self._pending.pop(self.next_idx)
+                self.next_idx += 1
+                if ready_item is not None:
+                    self.on_release(ready_item)
+            self._condition.notify_all()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._pending)
@@ -0,0 +1,96 @@
+import time
+import heapq
+import random
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List
+
+from providers.utils import get_metrics_registry
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """
+    Exponential backoff with jitter, half of the delay is fixed and the other half is random
+    :param attempt: The number of failed attempts so far (starting from 1)
+    """
+    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryScheduler:
+    """
+    Run tasks on an executor and resubmit the failed ones with exponential backoff and jitter until their retry
+    budget is spent. Completion is event driven through concurrent.futures.wait(FIRST_COMPLETED), so the waiting
+    thread sleeps until a task finishes or a retry is due instead of spinning over the futures.
+
+    Example:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            scheduler = RetryScheduler(executor, max_retries=3)
+            failures = scheduler.run([lambda: translate(chunk) for chunk in chunks],
+                                     on_success=lambda idx, result: print(idx, result))
+    """
+    def __init__(self, executor: Executor,
+                 max_retries: int = 5,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0,
+                 on_retry: Callable[[int, Exception, float], None] = None,  # Called with (task idx, error, delay) before a retry
+                 on_give_up: Callable[[int, Exception], None] = None,  # Called with (task idx, error) once the retry budget is spent
+                 stage: str = "task"  # Label of the retries and give ups in the metrics registry
+                 ):
+        self.executor = executor
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_retry = on_retry
+        self.on_give_up = on_give_up
+        self.stage = stage
+        self.metrics = get_metrics_registry()
+        self.num_retries = 0
+
+    def run(self, tasks: List[Callable[[], Any]],
+            on_success: Callable[[int, Any], None]) -> Dict[int, Exception]:
+        """
+        Run every task until it succeeds or its retry budget is spent
+        :param tasks: The tasks to run, a task is called again from scratch when retried
+        :param on_success: Called from the calling thread with (task idx, result) as soon as a task succeeds
+        :return: The last error of every task that gave up, keyed by task idx
+        """
+        attempts = [0] * len(tasks)
+        failures = {}
+        pending = {self.executor.submit(task): idx for idx, task in enumerate(tasks)}
+        retry_queue = []  # Heap of (ready time, task idx)
+
+        while pending or retry_queue:
+            now = time.monotonic()
+            while retry_queue and retry_queue[0][0] <= now:
+                _, idx = heapq.heappop(retry_queue)
+                pending[self.executor.submit(tasks[idx])] = idx
+
+            timeout = max(0.0, retry_queue[0][0] - now) if retry_queue else None
+            if not pending:
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    on_success(idx, future.result())
+                    continue
+
+                attempts[idx] += 1
+                if attempts[idx] > self.max_retries:
+                    failures[idx] = error
+                    self.metrics.inc("gave_up_total", stage=self.stage)
+                    if self.on_give_up is not None:
+                        self.on_give_up(idx, error)
+                    continue
+
+                delay = backoff_delay(attempts[idx], self.base_delay, self.max_delay)
+                self.num_retries += 1
+                self.metrics.inc("retries_total", stage=self.stage)
+                if self.on_retry is not None:
+                    self.on_retry(idx, error, delay)
+                heapq.heappush(retry_queue, (time.monotonic() + delay, idx))
+
+        return failures
@@ -1,37 +1,42 @@
+from contextvars import ContextVar
 from functools import wraps
 import abc
 
 
 def force_super_call(method):
-    # If the instance is ever used in parallel code, like in multiple threads
-    # or async-tasks, the flag bellow should use a contextvars.ContectVar
-    # (or threading.local)
-    base_method_called = False
+    # State of the innermost running override of the method, one per thread/async task: a one item list flipped to
+    # True once the base method runs
+    base_method_called = ContextVar(f"{method.__name__}_base_method_called", default=None)
 
     @wraps(method)
     def checker_wrapper(*args, **kwargs):
-        nonlocal base_method_called
         try:
             result = method(*args, **kwargs)
         finally:
-            base_method_called = True
+            state = base_method_called.get()
+            if state is not None:
+                state[0] = True
         return result
 
-    # This will be used dinamically on each method call:
+    # Applied once per overriding class by the metaclass, at class creation:
     def client_decorator(leaf_method):
         @wraps(leaf_method)
         def client_wrapper(*args, **kwargs):
-            nonlocal base_method_called
-            base_method_called = False
+            state = [False]
+            token = base_method_called.set(state)
             try:
                 result = leaf_method(*args, **kwargs)
             finally:
-                if not base_method_called:
+                base_method_called.reset(token)
+                if not state[0]:
                     raise RuntimeError(f"Overriden method '{method.__name__}' did not cause the base method to be called")
-
-                base_method_called = False
+                # An intermediate override reached the base method, so did the override calling it
+                outer_state = base_method_called.get()
+                if outer_state is not None:
+                    outer_state[0] = True
 
             return result
+        client_wrapper.force_super_call_client = True
         return client_wrapper
 
     # attach the client-wrapper to the decorated base method, so that the mechanism
@@ -42,28 +47,44 @@ def force_super_call(method):
     return checker_wrapper
 
 
-def forcecall__getattribute__(self, name):
-    cls = type(self)
+def _client_decorator(attribute):
+    # force_super_call may also sit under a @property (e.g. DataParser.save)
+    if isinstance(attribute, property):
+        attribute = attribute.fget
+    return getattr(attribute, "client_decorator", None)
 
-    method = object.__getattribute__(self, name)
-    registry = type(cls).forcecall_registry
 
-    for superclass in cls.__mro__[1:]:
-        if superclass in registry and name in registry[superclass]:
-            # Apply the decorator with ordinary, function-call syntax:
-            method = registry[superclass][name](method)
-            break
-    return method
+def _wrap_override(attribute, client_decorator):
+    if isinstance(attribute, property):
+        if attribute.fget is None or getattr(attribute.fget, "force_super_call_client", False):
+            return attribute
+        return attribute.getter(client_decorator(attribute.fget))
+    if not callable(attribute) or getattr(attribute, "force_super_call_client", False):
+        return attribute
+    return client_decorator(attribute)
 
 
 class ForceBaseCallMeta(abc.ABCMeta):
+    """
+    Metaclass enforcing that the overrides of the methods decorated with force_super_call call the base method.
+    The overrides are wrapped once when their class is created, attribute access on the instances is not affected
+    """
     forcecall_registry = {}
 
     def __new__(mcls, name, bases, namespace, **kwargs):
         cls = super().__new__(mcls, name, bases, namespace, **kwargs)
         mcls.forcecall_registry[cls] = {}
-        for name, method in cls.__dict__.items():
-            if hasattr(method, "client_decorator"):
-                mcls.forcecall_registry[cls][name] = method.client_decorator
-        cls.__getattribute__ = forcecall__getattribute__
-        return cls
\ No newline at end of file
+        for attr_name, attribute in cls.__dict__.items():
+            client_decorator = _client_decorator(attribute)
+            if client_decorator is not None:
+                mcls.forcecall_registry[cls][attr_name] = client_decorator
+
+        # Wrap the methods of this class overriding a force_super_call method of a base class, the nearest base
+        # class decides like the method resolution order
+        wrapped = set(mcls.forcecall_registry[cls])
+        for superclass in cls.__mro__[1:]:
+            for attr_name, client_decorator in mcls.forcecall_registry.get(superclass, {}).items():
+                if attr_name in namespace and attr_name not in wrapped:
+                    setattr(cls, attr_name, _wrap_override(namespace[attr_name], client_decorator))
+                    wrapped.add(attr_name)
+        return cls
@@ -4,6 +4,8 @@ import socket
 sys.path.insert(0,r'./')
 from functools import wraps
 
+from providers.utils import get_metrics_registry
+
 
 def timeit(func):
     @wraps(func)
@@ -13,6 +15,7 @@ def timeit(func):
         end_time = time.perf_counter()
         total_time = end_time - start_time
         print(f'Function {func.__name__} Took {total_time:.4f} seconds')
+        get_metrics_registry().set_gauge("stage_seconds", total_time, stage=func.__name__)
 
         return result
     return timeit_wrapper
@@ -25,8 +28,8 @@ def have_internet(host="8.8.8.8", port=53, timeout=3) -> bool:
     Service: domain (DNS/TCP)
     """
     try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
+        # The timeout only applies to this connection, not to every socket of the process
+        socket.create_connection((host, port), timeout=timeout).close()
         return True
     except socket.error as ex:
         print(ex)
@@ -0,0 +1,304 @@
+import os
+import gzip
+import json
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union, get_type_hints, get_origin, get_args
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def encode_json(example: Dict) -> bytes:
+    """
+    Encode one example as a UTF-8 JSON line body, orjson when installed (same output as json.dumps with
+    ensure_ascii=False, without the separator spaces)
+    """
+    if orjson is not None:
+        return orjson.dumps(example)
+    return json.dumps(example, ensure_ascii=False).encode("utf-8")
+
+
+def snapshot_example(example: Dict) -> Dict:
+    """
+    Copy of an example as it is now, for the writers created with copy_examples=True. The writers buffer the
+    examples and encode them later (on another thread or process, or once a shard is full), a caller that keeps
+    changing the examples after writing them needs the copy. It costs a dict and a list per list field for every
+    example, so it is off by default. List fields are copied since they are translated item by item
+    """
+    return {key: list(value) if isinstance(value, list) else value for key, value in example.items()}
+
+
+def encode_jsonl_batch(examples: List[Dict], encoder: Callable[[Dict], bytes] = encode_json) -> bytes:
+    return b"".join(encoder(example) + b"\n" for example in examples)
+
+
+class JsonlWriter:
+    """
+    Line-delimited JSON writer that encodes examples in batches and writes every batch with a single call, on a
+    background thread so encoding, compression and I/O overlap with the producer. With num_encode_workers > 1 the
+    batches are encoded in a process pool. Batches are always written in the order they were submitted.
+    The output can be read with datasets.load_dataset("json", data_files=writer.path), the compression is inferred
+    from the file suffix.
+
+    Example:
+        with JsonlWriter("out.json", compression="zstd") as writer:
+            for example in examples:
+                writer.write(example)
+    """
+    def __init__(self, path: str,
+                 compression: str = None,  # None, "gzip" or "zstd", the matching suffix is appended to path
+                 compression_level: int = None,
+                 batch_size: int = 1000,  # Examples encoded and written at once
+                 num_encode_workers: int = 0,  # Processes encoding the batches, 0 or 1 to encode on the writer thread
+                 encode_executor: Executor = None,  # Process pool shared with other stages (e.g. CPUPool.executor) encoding the
+                                                    # batches instead of num_encode_workers processes of its own
+                 max_pending_batches: int = 4,  # Batches queued for writing before write blocks the producer
+                 encoder: Callable[[Dict], bytes] = encode_json,
+                 copy_examples: bool = False  # Copy every example when written (snapshot_example), for callers that change
+                                              # the examples afterwards
+                 ):
+        assert compression in COMPRESSION_SUFFIXES, \
+            f"Invalid compression {compression}, choose from {list(COMPRESSION_SUFFIXES)}"
+        assert compression != "zstd" or zstandard is not None, \
+            "zstd compression requires the zstandard package, pip install zstandard"
+        suffix = COMPRESSION_SUFFIXES[compression]
+        self.path = path if path.endswith(suffix) else path + suffix
+        self.compression = compression
+        self.batch_size = batch_size
+        self.max_pending_batches = max_pending_batches
+        self.encoder = encoder
+        self.copy_examples = copy_examples
+        self.num_written = 0
+
+        self._raw_file = open(self.path, 'wb')
+        if compression == "gzip":
+            self._file = gzip.GzipFile(fileobj=self._raw_file, mode='wb',
+                                       compresslevel=compression_level if compression_level is not None else 6)
+        elif compression == "zstd":
+            # threads=-1 compresses on as many threads as there are cores
+            compressor = zstandard.ZstdCompressor(level=compression_level if compression_level is not None else 3,
+                                                  threads=-1)
+            self._file = compressor.stream_writer(self._raw_file, closefd=False)
+        else:
+            self._file = self._raw_file
+
+        self._batch: List[Dict] = []
+        self._pending: deque = deque()
+        self._write_executor = ThreadPoolExecutor(max_workers=1)
+        self._owns_encode_executor = encode_executor is None and num_encode_workers > 1
+        self._encode_executor = ProcessPoolExecutor(max_workers=num_encode_workers) if self._owns_encode_executor else encode_executor
+
+    def write(self, example: Dict) -> None:
+        self._batch.append(snapshot_example(example) if self.copy_examples else example)
+        if len(self._batch) >= self.batch_size:
+            self._submit_batch()
+
+    def write_many(self, examples: Iterable[Dict]) -> None:
+        for example in examples:
+            self.write(example)
+
+    def _submit_batch(self) -> None:
+        batch, self._batch = self._batch, []
+        if self._encode_executor is not None:
+            encoded = self._encode_executor.submit(encode_jsonl_batch, batch, self.encoder)
+        else:
+            encoded = batch
+        self._pending.append(self._write_executor.submit(self._write_batch, encoded))
+        self.num_written += len(batch)
+
+        # Backpressure, also surfaces the errors of the writer thread
+        while len(self._pending) > self.max_pending_batches:
+            self._pending.popleft().result()
+
+    def _write_batch(self, encoded: Union[List[Dict], Future]) -> None:
+        if isinstance(encoded, Future):
+            data = encoded.result()
+        else:
+            data = encode_jsonl_batch(encoded, self.encoder)
+        self._file.write(data)
+
+    def flush(self) -> None:
+        if self._batch:
+            self._submit_batch()
+        while self._pending:
+            self._pending.popleft().result()
+        self._file.flush()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._write_executor.shutdown(wait=True)
+            if self._owns_encode_executor:
+                self._encode_executor.shutdown(wait=True)
+            if self._file is not self._raw_file:
+                self._file.close()
+            self._raw_file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def annotation_to_arrow_type(annotation: Any) -> Optional["pa.DataType"]:
+    """
+    Arrow type of a Config field annotation, None if it can not be derived (the type is then inferred from the data)
+    """
+    scalar_types = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+    if annotation in scalar_types:
+        return scalar_types[annotation]
+    # Bare list fields of the configs hold strings (dialog turns, contexts, answers)
+    if annotation is list:
+        return pa.list_(pa.string())
+    if get_origin(annotation) is list:
+        item_args = get_args(annotation)
+        item_type = annotation_to_arrow_type(item_args[0]) if item_args else pa.string()
+        return pa.list_(item_type) if item_type is not None else None
+    if get_origin(annotation) is Union:
+        # Optional[X]
+        non_none_args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return annotation_to_arrow_type(non_none_args[0]) if len(non_none_args) == 1 else None
+    return None
+
+
+def config_to_arrow_schema(config: type) -> Dict[str, Optional["pa.DataType"]]:
+    """
+    Column types derived from the annotations of a Config dataclass, in field order
+    """
+    type_hints = get_type_hints(config)
+    return {key: annotation_to_arrow_type(type_hints[key]) for key in config.get_keys()}
+
+
+class ShardedTableWriter:
+    """
+    Write examples as Parquet (or Arrow IPC stream) shards of rows_per_shard rows, with column types derived from
+    the Config annotations. Every shard is written as soon as it is full and listed in a manifest.json next to the
+    shards, so finished shards can be uploaded or loaded while the run goes on (complete is False until close).
+    The shards load with datasets.load_dataset("parquet", data_files=f"{writer.path}/shard-*.parquet") (or "arrow"
+    and *.arrow), and Arrow shards can be memory-mapped with pyarrow.memory_map.
+
+    Example:
+        with ShardedTableWriter("output/ShareGPT_translated_vi", DialogsConfig, rows_per_shard=50000) as writer:
+            writer.write_many(examples)
+    """
+    FILE_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+
+    def __init__(self, path: str,
+                 config: type,  # The Config dataclass of the examples
+                 output_format: str = "parquet",  # "parquet" or "arrow"
+                 rows_per_shard: int = 100000,
+                 compression: str = "zstd",  # Parquet compression codec, ignored for arrow
+                 copy_examples: bool = False  # Copy every example when written (snapshot_example), for callers that change
+                                              # the examples afterwards
+                 ):
+        assert pa is not None, "Parquet/Arrow output requires the pyarrow package, pip install pyarrow"
+        assert output_format in self.FILE_SUFFIXES, \
+            f"Invalid output format {output_format}, choose from {list(self.FILE_SUFFIXES)}"
+        assert rows_per_shard > 0, "rows_per_shard must be a positive integer"
+        self.path = path
+        self.output_format = output_format
+        self.rows_per_shard = rows_per_shard
+        self.compression = compression
+        self.copy_examples = copy_examples
+        self.column_types = config_to_arrow_schema(config)
+        self.num_written = 0
+        self.shards: List[Dict] = []
+        self._schema = None  # Schema of the written shards
+
+        os.makedirs(self.path, exist_ok=True)
+        # Shards of a previous run with the same name would be mixed with the new ones
+        for file_name in os.listdir(self.path):
+            if file_name.startswith("shard-") or file_name == "manifest.json":
+                os.remove(os.path.join(self.path, file_name))
+        self._rows: List[Dict] = []
+        self._write_manifest(complete=False)
+
+    def write(self, example: Dict) -> None:
+        self._rows.append(snapshot_example(example) if self.copy_examples else example)
+        if len(self._rows) >= self.rows_per_shard:
+            self._write_shard()
+
+    def write_many(self, examples: Iterable[Dict]) -> None:
+        for example in examples:
+            self.write(example)
+
+    def _to_table(self, rows: List[Dict]) -> "pa.Table":
+        arrays, fields = [], []
+        for key, arrow_type in self.column_types.items():
+            values = [row.get(key) for row in rows]
+            try:
+                array = pa.array(values, type=arrow_type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # The data does not match the annotation (e.g. int ids in a str field), keep the inferred type
+                array = pa.array(values)
+            arrays.append(array)
+            fields.append(pa.field(key, array.type))
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+    def _write_shard(self) -> None:
+        rows, self._rows = self._rows, []
+        table = self._to_table(rows)
+        file_name = f"shard-{len(self.shards):05d}{self.FILE_SUFFIXES[self.output_format]}"
+        shard_path = os.path.join(self.path, file_name)
+        # Write to a temporary file first so a listed shard is always complete
+        tmp_path = shard_path + ".tmp"
+        if self.output_format == "parquet":
+            pq.write_table(table, tmp_path, compression=self.compression)
+        else:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_stream(sink, table.schema) as stream_writer:
+                stream_writer.write_table(table)
+        os.replace(tmp_path, shard_path)
+
+        self.shards.append({"file": file_name, "num_rows": table.num_rows})
+        self.num_written += table.num_rows
+        self._schema = table.schema
+        self._write_manifest(complete=False)
+
+    def _write_manifest(self, complete: bool) -> None:
+        schema = self._schema
+        manifest = {
+            "format": self.output_format,
+            "complete": complete,
+            "num_rows": self.num_written,
+            "rows_per_shard": self.rows_per_shard,
+            "schema": {field.name: str(field.type) for field in schema} if schema is not None else
+                      {key: str(arrow_type) for key, arrow_type in self.column_types.items()},
+            "shards": self.shards,
+        }
+        manifest_path = os.path.join(self.path, "manifest.json")
+        with open(manifest_path + ".tmp", 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def flush(self) -> None:
+        if self._rows:
+            self._write_shard()
+
+    def close(self) -> None:
+        self.flush()
+        self._write_manifest(complete=True)
+
+    def __enter__(self) -> "ShardedTableWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()